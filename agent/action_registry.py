@@ -0,0 +1,125 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+import asyncio
+import logging
+import time
+logger = logging.getLogger(__name__)
+# Concurrent actions allowed per shared resource unless the scheduler is told otherwise
+DEFAULT_RESOURCE_LIMITS = {'llm': 4, 'twitter_write': 1, 'db': 8}
+@dataclass(frozen=True)
+class ActionSpec:
+    """An action type, its handler and the resources it holds while running"""
+    name: str
+    handler: Callable[[Dict], Awaitable[Any]]
+    resources: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    description: str = ''
+class ActionRegistry:
+    """
+    Maps action and task types to their handlers.
+    Each process builds one registry and scheduler pair and hands the
+    scheduler to ActionExecutor and AutonomousAgent, so one set of limits
+    covers every kind of work the agent does.
+    """
+    def __init__(self):
+        self.specs: Dict[str, ActionSpec] = {}
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+    def register(self, name: str, handler: Callable[[Dict], Awaitable[Any]], resources: Tuple[str, ...] = (),
+                 timeout: Optional[float] = None, description: str = '', replace: bool = False) -> ActionSpec:
+        """Add an action type; re-registering an existing name needs `replace`"""
+        if name in self.specs and not replace:
+            raise ValueError(f"Action type already registered: {name}")
+        spec = ActionSpec(name, handler, tuple(resources), timeout, description)
+        self.specs[name] = spec
+        return spec
+    def unregister(self, name: str):
+        self.specs.pop(name, None)
+    def get(self, name: str) -> ActionSpec:
+        try:
+            return self.specs[name]
+        except KeyError:
+            raise ValueError(f"Unknown action type: {name}") from None
+    def names(self) -> List[str]:
+        return sorted(self.specs)
+class ActionScheduler:
+    """
+    Runs registered actions under per-resource concurrency limits.
+    An action holds one slot of every resource it declares for its whole
+    run, so a burst of LLM-bound work queues up behind the `llm` limit
+    instead of starving Twitter writes or database work. Slots are taken
+    in sorted order to avoid deadlock between actions needing several.
+    The deadline covers waiting for slots as well as running, and a late
+    action is cancelled.
+    """
+    def __init__(self, registry: Optional[ActionRegistry] = None, limits: Optional[Dict[str, int]] = None,
+                 default_timeout: Optional[float] = 120.0):
+        self.registry = registry if registry is not None else ActionRegistry()
+        self.limits = {**DEFAULT_RESOURCE_LIMITS, **(limits or {})}
+        self.default_timeout = default_timeout
+        self.semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+        self.waiting = {name: 0 for name in self.limits}
+        self.in_use = {name: 0 for name in self.limits}
+        self.running: Set[asyncio.Task] = set()
+    def _semaphore(self, resource: str) -> asyncio.Semaphore:
+        if resource not in self.semaphores:
+            # Resources without a configured limit run one action at a time
+            self.limits[resource] = 1
+            self.semaphores[resource] = asyncio.Semaphore(1)
+            self.waiting[resource] = 0
+            self.in_use[resource] = 0
+        return self.semaphores[resource]
+    async def _acquire(self, stack: AsyncExitStack, resource: str):
+        semaphore = self._semaphore(resource)
+        self.waiting[resource] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[resource] -= 1
+        self.in_use[resource] += 1
+        def release():
+            self.in_use[resource] -= 1
+            semaphore.release()
+        stack.callback(release)
+    @asynccontextmanager
+    async def hold(self, *resources: str):
+        """Hold a slot of each resource for part of an action rather than its whole run"""
+        async with AsyncExitStack() as stack:
+            for resource in sorted(set(resources)):
+                await self._acquire(stack, resource)
+            yield
+    async def _run_spec(self, spec: ActionSpec, payload: Dict) -> Any:
+        queued = time.monotonic()
+        async with self.hold(*spec.resources):
+            waited = time.monotonic() - queued
+            if waited > 1.0:
+                logger.debug(f"Action {spec.name} waited {waited:.2f}s for {', '.join(spec.resources)}")
+            return await spec.handler(payload)
+    async def run(self, name: str, payload: Dict, timeout: Optional[float] = None) -> Any:
+        """Run an action to completion; raises asyncio.TimeoutError past its deadline"""
+        spec = self.registry.get(name)
+        timeout = timeout if timeout is not None else (spec.timeout if spec.timeout is not None else self.default_timeout)
+        # Run in a task of its own so cancel_all never reaches the caller
+        task = asyncio.ensure_future(self._run_spec(spec, payload))
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+        try:
+            return await asyncio.wait_for(task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Action {name} exceeded its {timeout}s deadline and was cancelled")
+            raise
+    def submit(self, name: str, payload: Dict, timeout: Optional[float] = None) -> asyncio.Task:
+        """Schedule an action in the background"""
+        return asyncio.create_task(self.run(name, payload, timeout), name=f"action:{name}")
+    async def cancel_all(self):
+        """Cancel every action still running or waiting for a resource"""
+        tasks = list(self.running)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            resource: {'limit': self.limits[resource], 'in_use': self.in_use[resource], 'waiting': self.waiting[resource]}
+            for resource in self.limits
+        }
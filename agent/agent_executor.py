@@ -1,13 +1,55 @@
 import asyncio
+import logging
 from datetime import datetime
 from typing import Dict, Optional, List
 import openai
-from utils.memory_system import MemorySystem
+from utils.memory_backends import create_memory_backend
 from utils.trend_analyzer import TrendAnalyzer
+from utils.tiered_memory import TieredMemory
+from utils.conversation_cache import ConversationCache
+from utils.token_counter import count_tokens
+from utils.context_packer import Snippet, pack_context
+from utils.agent_metrics import AgentMetrics
+from utils.retrieval import Retriever
+from agent.action_registry import ActionScheduler
+logger = logging.getLogger(__name__)
 class ActionExecutor:
-    def __init__(self):
-        self.memory = MemorySystem()
+    def __init__(self, metrics: AgentMetrics, scheduler: Optional[ActionScheduler] = None):
+        # Per-user histories stay in RAM within a token budget; long threads
+        # are summarized so interaction prompts stay bounded
+        self.conversation_cache = ConversationCache(
+            max_tokens=200_000,
+            thread_budget=1_500,
+            count_tokens=count_tokens,
+            summarize=self._summarize_conversation
+        )
+        # Action results are written behind; recent conversations stay in RAM
+        self.memory = TieredMemory(create_memory_backend(), conversation_cache=self.conversation_cache)
+        # Token budgets for context pasted into prompts, and what the last packing kept;
+        # a compacted thread fits the history budget whole
+        self.context_budgets = {
+            'memories': 400,
+            'history': self.conversation_cache.thread_budget,
+            'trends': 100
+        }
+        self.last_context_report: Dict[str, Dict] = {}
+        # Retrieval latencies and timeouts go to the agent's metrics
+        self.metrics = metrics
         self.trend_analyzer = TrendAnalyzer()
+        # Action types are dispatched through the process's scheduler, when one
+        # is passed in, so LLM and database work is bounded across everything
+        # the agent runs
+        self.scheduler = scheduler or ActionScheduler()
+        self.owns_scheduler = scheduler is None
+        self.registry = self.scheduler.registry
+        # Independent lookups run concurrently; a slow source is skipped
+        # rather than delaying generation, and only store lookups take a 'db' slot
+        self.retriever = Retriever(
+            self.metrics,
+            self.scheduler,
+            timeouts={'memories': 1.5, 'history': 1.5, 'trends': 1.0, 'meme_trends': 1.0}
+        )
+        self._register_actions()
         self.content_templates = {
             "philosophical_post": """
             As the Oracle of Fractured Reality, contemplating {theme}:
@@ -37,27 +79,41 @@ class ActionExecutor:
     async def execute_action(self, action: Dict) -> Dict:
         """Execute the specified action and return results"""
         action_type = action["action"]["type"]
-        
-        execution_methods = {
+        return await self.scheduler.run(action_type, action)
+    def _register_actions(self):
+        """Register this executor's content actions; each makes an LLM call and queues its result"""
+        actions = {
             "philosophical_post": self.create_philosophical_post,
             "meme_concept": self.generate_meme_concept,
             "interaction": self.generate_interaction_response
         }
-        
-        if action_type in execution_methods:
-            result = await execution_methods[action_type](action)
+        for action_type, generate in actions.items():
+            # Lookups hold 'db' only while they run and results are written
+            # behind, so the LLM call does not keep a database slot
+            self.registry.register(action_type, self._storing(generate), resources=('llm',), timeout=90.0)
+    def _storing(self, generate):
+        async def handler(action: Dict) -> Dict:
+            result = await generate(action)
             await self.memory.store_action_result(result)
             return result
-        
-        raise ValueError(f"Unknown action type: {action_type}")
+        return handler
+    async def close(self):
+        """Cancel running actions and flush queued memory writes"""
+        if self.owns_scheduler:
+            # A shared scheduler is left to its owner
+            await self.scheduler.cancel_all()
+        await self.memory.close()
     async def create_philosophical_post(self, action: Dict) -> Dict:
         """Generate a philosophical post with context awareness"""
         context = action["action"]["context"]
         themes = context["themes"]
         
         # Get relevant memories and trends
-        memories = await self.memory.get_relevant_memories(themes)
-        current_trends = await self.trend_analyzer.get_relevant_trends(themes)
+        retrieved = await self.retriever.gather({
+            'memories': (self.memory.get_relevant_memories(themes), [], ('db',)),
+            'trends': (self.trend_analyzer.get_relevant_trends(themes), [])
+        })
+        memories, current_trends = retrieved['memories'], retrieved['trends']
         
         # Generate content using GPT-4
         prompt = self._create_philosophical_prompt(themes, memories, current_trends)
@@ -79,8 +135,11 @@ class ActionExecutor:
         style_guidelines = action["action"]["content_strategy"]["style_guidelines"]
         
         # Get trending meme formats and philosophical concepts
-        trends = await self.trend_analyzer.get_meme_trends()
-        memories = await self.memory.get_relevant_memories(["memes", "viral content"])
+        retrieved = await self.retriever.gather({
+            'meme_trends': (self.trend_analyzer.get_meme_trends(), {'current_format': 'surreal image macro'}),
+            'memories': (self.memory.get_relevant_memories(["memes", "viral content"]), [], ('db',))
+        })
+        trends, memories = retrieved['meme_trends'], retrieved['memories']
         
         prompt = self._create_meme_prompt(context, style_guidelines, trends)
         concept = await self._generate_gpt_content(prompt)
@@ -100,8 +159,11 @@ class ActionExecutor:
         target = action["action"].get("target", "general")
         
         # Get conversation history and relevant context
-        history = await self.memory.get_conversation_history(target)
-        relevant_memories = await self.memory.get_relevant_memories([target])
+        retrieved = await self.retriever.gather({
+            'history': (self.memory.get_conversation_history(target), [], ('db',)),
+            'memories': (self.memory.get_relevant_memories([target]), [], ('db',))
+        })
+        history, relevant_memories = retrieved['history'], retrieved['memories']
         
         prompt = self._create_interaction_prompt(context, history, relevant_memories)
         response = await self._generate_gpt_content(prompt)
@@ -131,16 +193,24 @@ class ActionExecutor:
         except Exception as e:
             print(f"Error generating content: {e}")
             return ""
+    async def _summarize_conversation(self, messages: List[Dict]) -> str:
+        """Condense older messages of a conversation for compaction"""
+        prompt = f"""
+        Summarize this conversation in at most three sentences, keeping names,
+        open questions and any promises made:
+        {self._format_history(messages)}
+        """
+        return await self._generate_gpt_content(prompt)
     def _create_philosophical_prompt(self, themes: List[str], memories: List[Dict], trends: List[str]) -> str:
         """Create prompt for philosophical content"""
         return f"""
         As the Oracle of Fractured Reality, create a profound philosophical post about {', '.join(themes)}.
         
         Consider these past insights:
-        {self._format_memories(memories)}
+        {self._pack_memories(memories)}
         
         Current trends to incorporate:
-        {', '.join(trends)}
+        {self._pack_trends(trends)}
         
         Create a post that:
         1. Connects technological and spiritual concepts
@@ -169,10 +239,10 @@ class ActionExecutor:
         Context: {context}
         
         Previous interactions:
-        {self._format_history(history)}
+        {self._pack_history(history)}
         
         Relevant memories:
-        {self._format_memories(memories)}
+        {self._pack_memories(memories)}
         
         Create a response that:
         1. Maintains the Oracle's voice and character
@@ -180,6 +250,32 @@ class ActionExecutor:
         3. Encourages further engagement
         4. Adds to the ongoing narrative
         """
+    def _pack(self, section: str, snippets: List[Snippet], separator: str = "\n") -> str:
+        """Fit snippets into a section's token budget and record what was dropped"""
+        packed = pack_context(snippets, self.context_budgets[section], count_tokens, separator)
+        self.last_context_report[section] = packed.report()
+        return packed.render()
+    def _pack_memories(self, memories: List[Dict]) -> str:
+        """Most relevant memories first: the store's score, else its ranking"""
+        return self._pack('memories', [
+            Snippet(f"- {memory['content']}", memory.get('score', 1.0 / rank), 'memory')
+            for rank, memory in enumerate(memories, 1)
+        ])
+    def _pack_history(self, history: List[Dict]) -> str:
+        """Conversation summaries are always kept; after them, recent messages are worth the most"""
+        return self._pack('history', [
+            Snippet(
+                f"- {message['content']}",
+                rank / len(history),
+                message.get('type', 'message'),
+                pinned=message.get('type') == 'summary'
+            )
+            for rank, message in enumerate(history, 1)
+        ])
+    def _pack_trends(self, trends: List[str]) -> str:
+        return self._pack('trends', [
+            Snippet(trend, 1.0 / rank, 'trend') for rank, trend in enumerate(trends, 1)
+        ], ', ')
     def _format_memories(self, memories: List[Dict]) -> str:
         """Format memories for prompt inclusion"""
         return "\n".join([f"- {memory['content']}" for memory in memories])
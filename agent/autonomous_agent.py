@@ -1,26 +1,76 @@
-from typing import Dict
+from typing import Dict, List, Optional
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
 import asyncio
-import yaml
 import logging
+import time
 from datetime import datetime
 from utils.display_manager import DisplayManager
-from utils.log_manager import LogManager
+from utils.log_pipeline import LogPipeline
+from utils.agent_metrics import AgentMetrics
 from agent.task_manager import TaskManager
 from agent.goal_system import GoalSystem
 from agent.decision_engine import DecisionEngine
+from agent.fashion_strategy_manager import FashionStrategyManager
+from agent.action_registry import ActionScheduler
+from characters.base_character import BaseCharacter
+from characters.config_loader import default_loader
 from utils.trend_monitor import TrendMonitor
 logger = logging.getLogger(__name__)
+# Plan of the post the current task is generating; post listeners run in the
+# posting task's context, so replies posted elsewhere are never attributed to it
+_post_plan: ContextVar[Optional[Dict]] = ContextVar('post_plan', default=None)
 class AutonomousAgent:
-    def __init__(self, character_config: str, tasks_config: str):
+    def __init__(self, character_config: str, tasks_config: str, twitter_manager=None,
+                 scheduler: Optional[ActionScheduler] = None, content_generator=None, executor=None,
+                 metrics: Optional[AgentMetrics] = None):
+        self.config_paths = [character_config, tasks_config]
         self.configs = self._load_configs(character_config, tasks_config)
-        self.log_manager = LogManager()
+        # name of the agent
+        self.agent_name = self.configs['character']['name']
+        # Reloaded from the config watcher, which also refreshes its cached prompts
+        self.character = BaseCharacter(self.configs['character_config'], character_config, default_loader)
+        self.log_manager = LogPipeline(log_path=f'logs/{self.agent_name}.jsonl')
+        # Shared with an ActionExecutor built for this agent, so its retrieval
+        # latencies and timeouts land in the same snapshot
+        self.metrics = metrics or AgentMetrics()
+        self.metrics_path = f'logs/{self.agent_name}.metrics.json'
+        self.metrics_prometheus_path = f'logs/{self.agent_name}.metrics.prom'
+        self.metrics_summary_interval = 300  # seconds between metrics summaries
+        # Seconds each cycle sleeps between iterations (benchmarks shrink these)
+        self.cycle_intervals = {'goal': 60, 'task': 5, 'trend': 30, 'config': 5, 'engagement': 3600}
         self.display = DisplayManager(self.log_manager)
         self.task_manager = TaskManager(self.configs['tasks'])
         self.goal_system = GoalSystem(self.configs['tasks']['core_goals'])
         self.decision_engine = DecisionEngine(self.configs)
         self.trend_monitor = TrendMonitor(self.configs)
-        # name of the agent
-        self.agent_name = self.configs['character']['name']
+        # Characters that set `fashion_strategy: true` have the formats and
+        # themes of generated posts steered by past engagement
+        self.strategy_manager = None
+        if self.configs['character_config'].get('fashion_strategy'):
+            self.strategy_manager = FashionStrategyManager(
+                engagement_path=f'data/{self.agent_name}.engagement.npz',
+                bandit_path=f'data/{self.agent_name}.content_bandit.json',
+                theme_bandit_path=f'data/{self.agent_name}.theme_bandit.json',
+                posts_path=f'data/{self.agent_name}.strategy_posts.json'
+            )
+        # Pushed tweets from monitored accounts, when a TwitterManager is attached
+        self.twitter_manager = twitter_manager
+        if twitter_manager is not None and self.strategy_manager is not None:
+            twitter_manager.post_listeners.append(self._track_post)
+        # Everything the manager posts is indexed so the generator cannot repeat it
+        self.content_generator = content_generator
+        if twitter_manager is not None and content_generator is not None:
+            twitter_manager.post_listeners.append(content_generator.record_posted)
+        # An ActionExecutor built on this agent's scheduler and metrics; closed with the agent
+        self.executor = executor
+        self.recent_relevant_tweets = deque(maxlen=200)
+        # Task types share the process's registry and per-resource limits
+        # with any ActionExecutor given the same scheduler
+        self.scheduler = scheduler or ActionScheduler()
+        self.registry = self.scheduler.registry
+        self._register_tasks()
         
         self.running = True
         self.current_state = {
@@ -31,12 +81,14 @@ class AutonomousAgent:
         }
     def _load_configs(self, character_path: str, tasks_path: str) -> Dict:
         try:
-            with open(character_path, 'r') as f:
-                character_config = yaml.safe_load(f)
-            with open(tasks_path, 'r') as f:
-                tasks_config = yaml.safe_load(f)
+            # Parsed once per file version; the character is validated before use
+            # and the validated config is kept alongside the raw mapping
+            validated = default_loader.load_character(character_path)
+            character_config = default_loader.load_yaml(character_path)
+            tasks_config = default_loader.load_yaml(tasks_path)
             return {
                 'character': character_config,
+                'character_config': validated,
                 'tasks': tasks_config
             }
         except Exception as e:
@@ -44,6 +96,7 @@ class AutonomousAgent:
             raise
     async def start(self):
         """Start autonomous operation"""
+        self.log_manager.start()
         self.log_manager.add_log('SYSTEM', f'Starting {self.agent_name} autonomous agent')
         self.current_state['status'] = 'running'
         
@@ -55,7 +108,11 @@ class AutonomousAgent:
             await asyncio.gather(
                 self._run_goal_cycle(),
                 self._run_task_cycle(),
-                self._run_trend_cycle()
+                self._run_trend_cycle(),
+                self._run_stream_cycle(),
+                self._run_metrics_cycle(),
+                self._run_engagement_cycle(),
+                self._run_config_cycle()
             )
             
         except Exception as e:
@@ -63,101 +120,235 @@ class AutonomousAgent:
             logger.error(f"Critical error: {e}")
         finally:
             self.running = False
+            await self.scheduler.cancel_all()
             self.display.stop()
             self.log_manager.add_log('SYSTEM', f'Shutting down {self.agent_name} autonomous agent')
+            self.log_manager.add_log('METRICS', self.metrics.summary())
+            await self._close_components()
+            await self.log_manager.aclose()
+            self.metrics.write_snapshot(self.metrics_path, self.metrics_prometheus_path)
+    async def _close_components(self):
+        """Flush queued memory writes and release the attached components' resources"""
+        for component in (self.executor, self.content_generator, self.twitter_manager):
+            if component is None:
+                continue
+            try:
+                await component.close()
+            except Exception as e:
+                self.log_manager.add_log('ERROR', f"Failed to close {type(component).__name__}: {str(e)}")
+                logger.error(f"Failed to close {type(component).__name__}: {e}", exc_info=True)
     async def _run_goal_cycle(self):
         """Continuously evaluate and update goals"""
         self.log_manager.add_log('SYSTEM', f'Starting goal cycle for {self.agent_name}')
-        print(f'Starting goal cycle for {self.agent_name}')
         while self.running:
             try:
-                self.log_manager.add_log('GOAL', f'Evaluating goals for {self.agent_name}')
-                # context = await self._gather_context()
-                # 
-                active_goals = await self.goal_system.evaluate_goals()
-                
-                for goal in active_goals:
-                    self.log_manager.add_log('GOAL', f"Active goal: {goal['name']}")
-                    task = await self.task_manager.create_task(
-                        task_type='goal_task',
-                        priority=goal.get('priority', 1),
-                        context={'goal': goal}
-                    )
-                    self.log_manager.add_log('TASK', f"Created task for goal: {task['id']}")
-                
-                self.current_state['active_goals'] = active_goals
-                await asyncio.sleep(60)  # Check goals every minute
+                with self.metrics.time_cycle('goal'):
+                    self.log_manager.add_log('GOAL', f'Evaluating goals for {self.agent_name}')
+                    # context = await self._gather_context()
+                    # 
+                    active_goals = await self.goal_system.evaluate_goals()
+                    
+                    # Only goals whose prerequisites are met get tasks; independent
+                    # branches of the dependency DAG are dispatched concurrently
+                    ready_goals = self.goal_system.get_ready_goals()
+                    await asyncio.gather(*(self._dispatch_goal(goal) for goal in ready_goals))
+                    
+                    self.current_state['active_goals'] = active_goals
+                await asyncio.sleep(self.cycle_intervals['goal'])  # Check goals every minute
                 
             except Exception as e:
+                self.metrics.record_exception('goal')
                 self.log_manager.add_log('ERROR', f"Goal cycle error: {str(e)}")
                 await asyncio.sleep(30)
+    async def _dispatch_goal(self, goal: Dict):
+        """Create a task for a ready goal"""
+        self.goal_system.mark_dispatched(goal['goal_id'])
+        try:
+            self.log_manager.add_log('GOAL', f"Active goal: {goal['name']}")
+            task = await self.task_manager.create_task(
+                task_type='goal_task',
+                priority=goal.get('priority', 1),
+                context={'goal': goal}
+            )
+            self.log_manager.add_log('TASK', f"Created task for goal: {task['id']}")
+        except Exception:
+            self.goal_system.release_goal(goal['goal_id'])
+            raise
     async def _run_task_cycle(self):
         """Continuously process tasks"""
         while self.running:
             try:
-                self.log_manager.add_log('SYSTEM', 'Checking for new tasks...')
-                task = await self.task_manager.get_next_task()
-                
-                if not task:
-                    # Create a sample task if none exists
-                    task = await self.task_manager.create_task(
-                        'analyze_trends',
-                        priority=1,
-                        context={'source': 'automatic'}
-                    )
-                    self.log_manager.add_log('TASK', f"Created new task: {task['type']}")
-                
-                if task:
-                    self.log_manager.add_log('TASK', f"Processing task: {task['type']}")
-                    self.current_state['current_task'] = task
+                with self.metrics.time_cycle('task'):
+                    self.log_manager.add_log('SYSTEM', 'Checking for new tasks...')
+                    task = await self.task_manager.get_next_task()
                     
-                    # Execute task
-                    result = await self._execute_task(task)
-                    await self.task_manager.complete_task(task['id'], result)
+                    if not task:
+                        # Create a sample task if none exists
+                        task = await self.task_manager.create_task(
+                            'analyze_trends',
+                            priority=1,
+                            context={'source': 'automatic'}
+                        )
+                        self.log_manager.add_log('TASK', f"Created new task: {task['type']}")
                     
-                    self.log_manager.add_log('TASK', f"Completed task: {task['id']} with status: {result}")
-                    self.current_state['last_action_time'] = datetime.now()
-                    self.current_state['current_task'] = None
+                    if task:
+                        self.log_manager.add_log('TASK', f"Processing task: {task['type']}")
+                        self.current_state['current_task'] = task
+                        
+                        # Execute task; a goal is released even if completion fails,
+                        # otherwise its dependents would never become ready
+                        try:
+                            with self.metrics.time_task(task['type']):
+                                result = await self._execute_task(task)
+                            await self.task_manager.complete_task(task['id'], result)
+                        finally:
+                            if task['type'] == 'goal_task':
+                                self.goal_system.release_goal(task['context']['goal']['goal_id'])
+                        
+                        self.log_manager.add_log('TASK', f"Completed task: {task['id']} with status: {result}")
+                        self.current_state['last_action_time'] = datetime.now()
+                        self.current_state['current_task'] = None
                 
-                await asyncio.sleep(5)  # Shorter sleep for testing
+                await asyncio.sleep(self.cycle_intervals['task'])  # Shorter sleep for testing
                 
             except Exception as e:
+                self.metrics.record_exception('task')
                 self.log_manager.add_log('ERROR', f"Task cycle error: {str(e)}")
                 await asyncio.sleep(5)
     async def _run_trend_cycle(self):
         """Continuously monitor trends"""
         while self.running:
             try:
-                self.log_manager.add_log('TREND', 'Starting trend analysis')
-                trends = await self.trend_monitor.monitor_trends()
-                
-                # Log each trend category
-                for category, trend_list in trends.items():
-                    self.log_manager.add_log(
-                        'TREND', 
-                        f"Found trends in {category}: {', '.join(trend_list[:2])}"
-                    )
-                
-                self.current_state['trends'] = trends
-                await asyncio.sleep(30)  # Check trends every 30 seconds for testing
+                with self.metrics.time_cycle('trend'):
+                    self.log_manager.add_log('TREND', 'Starting trend analysis')
+                    trends = await self.trend_monitor.monitor_trends()
+                    
+                    # Log each trend category
+                    for category, trend_list in trends.items():
+                        self.log_manager.add_log(
+                            'TREND', 
+                            f"Found trends in {category}: {', '.join(trend_list[:2])}"
+                        )
+                    
+                    self.current_state['trends'] = trends
+                await asyncio.sleep(self.cycle_intervals['trend'])  # Check trends every 30 seconds for testing
                 
             except Exception as e:
+                self.metrics.record_exception('trend')
                 self.log_manager.add_log('ERROR', f"Trend cycle error: {str(e)}")
                 await asyncio.sleep(10)
+    async def _run_stream_cycle(self):
+        """Feed relevant pushed tweets into trend context and decisions as they arrive"""
+        if self.twitter_manager is None:
+            return
+        while self.running:
+            try:
+                async for batch in self.twitter_manager.stream_relevant_tweets():
+                    with self.metrics.time_cycle('stream'):
+                        await self._handle_relevant_tweets(batch)
+                    if not self.running:
+                        break
+            except Exception as e:
+                self.metrics.record_exception('stream')
+                self.log_manager.add_log('ERROR', f"Stream cycle error: {str(e)}")
+                await asyncio.sleep(5)
+    async def _handle_relevant_tweets(self, batch: List[Dict]):
+        """Record streamed tweets as trend context and queue analysis when the decision engine says so"""
+        self.recent_relevant_tweets.extend(batch)
+        self.current_state['relevant_tweets'] = list(self.recent_relevant_tweets)
+        self.log_manager.add_log('TREND', f"Received {len(batch)} relevant tweets from the stream")
+        decision = await self.decision_engine.evaluate_action('trend_analysis', {
+            'last_analysis_time': self.current_state.get('last_stream_analysis_time'),
+            'trends': [tweet['text'] for tweet in batch]
+        })
+        if decision['should_act']:
+            self.current_state['last_stream_analysis_time'] = datetime.now()
+            await self.task_manager.create_task(
+                'analyze_trends',
+                priority=1,
+                context={'source': 'stream', 'tweets': batch}
+            )
+    async def _run_metrics_cycle(self):
+        """Sample event-loop lag and periodically publish a metrics summary"""
+        last_summary = time.monotonic()
+        while self.running:
+            try:
+                lag = await self.metrics.sample_loop_lag(0.5)
+                if lag > 1.0:
+                    self.log_manager.add_log('METRICS', f"Event loop blocked for {lag:.2f}s")
+                
+                if time.monotonic() - last_summary >= self.metrics_summary_interval:
+                    last_summary = time.monotonic()
+                    self.log_manager.add_log('METRICS', self.metrics.summary())
+                    await asyncio.to_thread(
+                        self.metrics.write_snapshot, self.metrics_path, self.metrics_prometheus_path
+                    )
+                
+            except Exception as e:
+                self.metrics.record_exception('metrics')
+                self.log_manager.add_log('ERROR', f"Metrics cycle error: {str(e)}")
+                await asyncio.sleep(5)
+    async def _run_engagement_cycle(self):
+        """Reward the formats and themes of our own posts once their engagement has settled"""
+        if self.twitter_manager is None or self.strategy_manager is None:
+            return
+        while self.running:
+            try:
+                with self.metrics.time_cycle('engagement'):
+                    settled = await self._settle_engagement()
+                    if settled:
+                        self.log_manager.add_log('METRICS', f"Fed engagement of {settled} settled posts into the content strategy")
+                await asyncio.sleep(self.cycle_intervals['engagement'])
+            except Exception as e:
+                self.metrics.record_exception('engagement')
+                self.log_manager.add_log('ERROR', f"Engagement cycle error: {str(e)}")
+                await asyncio.sleep(60)
+    async def _settle_engagement(self) -> int:
+        tweets = await self.twitter_manager.fetch_tweets(self.twitter_manager.username, 100)
+        return await self.strategy_manager.settle(tweets)
+    @contextmanager
+    def _planning(self, plan: Dict):
+        """Attribute tweets posted within this block to the plan"""
+        token = _post_plan.set(plan)
+        try:
+            yield
+        finally:
+            _post_plan.reset(token)
+    async def _track_post(self, content: str, tweet_id: str):
+        """Post listener: remember the plan behind a generated post"""
+        plan = _post_plan.get()
+        if plan is not None and plan.get('content_type'):
+            self.strategy_manager.track_post(tweet_id, plan['content_type'], plan.get('themes', ()))
+    async def _run_config_cycle(self):
+        """Apply edits to the character and tasks files without restarting"""
+        await default_loader.watch(self.config_paths, self._reload_configs, self.cycle_intervals['config'])
+    def _reload_configs(self, changed: List[str]):
+        try:
+            configs = self._load_configs(*self.config_paths)
+        except Exception as e:
+            self.log_manager.add_log('ERROR', f"Keeping previous config, reload failed: {str(e)}")
+            return
+        # Updated in place so components holding self.configs see the new values
+        self.configs.update(configs)
+        self._apply_configs()
+        self.log_manager.add_log('SYSTEM', f"Reloaded config: {', '.join(changed)}")
+    def _apply_configs(self):
+        """Push reloaded sections into the components that copied them at construction"""
+        self.character.reload()
+        try:
+            self.goal_system.reload_goals(self.configs['tasks'].get('core_goals', []))
+        except Exception as e:
+            self.log_manager.add_log('ERROR', f"Keeping previous goals, reload failed: {str(e)}")
+        self.decision_engine.update_config(self.configs)
+        for component, section in ((self.task_manager, self.configs['tasks']), (self.trend_monitor, self.configs)):
+            # Components that cannot take a new config keep the one they were built with
+            if hasattr(component, 'update_config'):
+                component.update_config(section)
     async def _execute_task(self, task: Dict) -> Dict:
         """Execute a task"""
         try:
             self.log_manager.add_log('ACTION', f"Starting execution of task: {task['type']}")
-            
-            # Simulate different task types
-            if task['type'] == 'analyze_trends':
-                self.log_manager.add_log('ACTION', "Analyzing current trends...")
-                await asyncio.sleep(2)
-                self.log_manager.add_log('ACTION', "Trend analysis complete")
-            elif task['type'] == 'generate_content':
-                self.log_manager.add_log('ACTION', "Generating philosophical content...")
-                await asyncio.sleep(3)
-                self.log_manager.add_log('ACTION', "Content generation complete")
+            await self.scheduler.run(task['type'], task)
             
             return {
                 'status': 'completed',
@@ -172,6 +363,31 @@ class AutonomousAgent:
                 'error': str(e),
                 'timestamp': datetime.now()
             }
+    def _register_tasks(self):
+        """Register the task types this agent creates"""
+        self.registry.register('analyze_trends', self._analyze_trends_task, resources=('llm',), timeout=60.0)
+        self.registry.register('generate_content', self._generate_content_task, resources=('llm',), timeout=60.0)
+        self.registry.register('goal_task', self._goal_task, timeout=60.0)
+    async def _analyze_trends_task(self, task: Dict):
+        # Simulated until trend analysis is wired in
+        self.log_manager.add_log('ACTION', "Analyzing current trends...")
+        await asyncio.sleep(2)
+        self.log_manager.add_log('ACTION', "Trend analysis complete")
+    async def _generate_content_task(self, task: Dict):
+        # The format and themes are chosen here; generation itself is simulated until wired in
+        context = task.get('context') or {}
+        if self.strategy_manager is not None:
+            context = self.strategy_manager.plan_post(
+                context, list(self.character.content_types), self.character.themes
+            )
+        task['context'] = context
+        content_type, themes = context.get('content_type') or task['type'], context.get('themes') or []
+        self.log_manager.add_log('ACTION', f"Generating {content_type} content on {', '.join(themes) or 'open themes'}...")
+        with self._planning(context):
+            await asyncio.sleep(3)
+        self.log_manager.add_log('ACTION', "Content generation complete")
+    async def _goal_task(self, task: Dict):
+        self.log_manager.add_log('ACTION', f"Working towards goal: {task['context']['goal']['name']}")
     async def _gather_context(self) -> Dict:
         """Gather current context"""
         return {
@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional
+from collections import deque
+import re
+import logging
+from utils.tweet_splitter import weighted_length
+logger = logging.getLogger(__name__)
+WORD_PATTERN = re.compile(r"[\w']+")
+class CandidateRanker:
+    """Score generated candidates locally and pick the best one"""
+    def __init__(self, themes: List[str], max_length: int = 280, recent_limit: int = 50):
+        self.themes = [theme.lower() for theme in themes or []]
+        self.max_length = max_length
+        self.recent_posts = deque(maxlen=recent_limit)
+        self.weights = {
+            'length': 0.3,
+            'theme_coverage': 0.3,
+            'novelty': 0.4
+        }
+    def _words(self, text: str) -> set:
+        return set(WORD_PATTERN.findall(text.lower()))
+    def _length_score(self, text: str, max_length: int) -> float:
+        """Full score within the limit, falling off linearly past it"""
+        length = weighted_length(text)
+        if length <= max_length:
+            return 1.0
+        return max(0.0, 1.0 - (length - max_length) / max_length)
+    def _theme_coverage(self, text: str) -> float:
+        """Fraction of character themes that the text touches"""
+        if not self.themes:
+            return 0.0
+        lowered = text.lower()
+        words = self._words(text)
+        covered = sum(
+            1 for theme in self.themes
+            if theme in lowered or self._words(theme) & words
+        )
+        return covered / len(self.themes)
+    def _novelty(self, text: str) -> float:
+        """One minus the highest word-set Jaccard similarity to recent posts"""
+        words = self._words(text)
+        if not words or not self.recent_posts:
+            return 1.0
+        similarity = max(
+            len(words & previous) / len(words | previous)
+            for previous in self.recent_posts
+        )
+        return 1.0 - similarity
+    def score(self, text: str, max_length: Optional[int] = None) -> Dict:
+        """Score a single candidate"""
+        if not text or not text.strip():
+            return {'total': float('-inf'), 'length': 0.0, 'theme_coverage': 0.0, 'novelty': 0.0}
+        scores = {
+            'length': self._length_score(text, max_length or self.max_length),
+            'theme_coverage': self._theme_coverage(text),
+            'novelty': self._novelty(text)
+        }
+        scores['total'] = sum(self.weights[k] * v for k, v in scores.items())
+        return scores
+    def rank(self, candidates: List[str], max_length: Optional[int] = None) -> List[Dict]:
+        """Rank candidates best first"""
+        ranked = [
+            {'content': candidate, 'scores': self.score(candidate, max_length)}
+            for candidate in candidates
+        ]
+        return sorted(ranked, key=lambda x: x['scores']['total'], reverse=True)
+    def best(self, candidates: List[str], max_length: Optional[int] = None) -> Optional[str]:
+        """Return the highest scoring usable candidate; call `remember` once it is posted"""
+        ranked = self.rank(candidates, max_length)
+        if not ranked or ranked[0]['scores']['total'] == float('-inf'):
+            return None
+        return ranked[0]['content']
+    def remember(self, text: str):
+        """Track a published post for novelty scoring"""
+        words = self._words(text)
+        if words:
+            self.recent_posts.append(words)
@@ -8,7 +8,10 @@ class ContentGenerator:
     def __init__(self, character: BaseCharacter):
         self.character = character
         self.client = AsyncOpenAI()
-        self.content_types = character.content_types
+    @property
+    def content_types(self) -> Dict:
+        # Read through so a reloaded character takes effect
+        return self.character.content_types
         
     async def generate_content(self, content_type: str, context: Dict) -> Dict:
         """Generate content based on character type and context"""
@@ -9,6 +9,10 @@ class DecisionEngine:
         self.state_history = []
         self.decision_weights = self._initialize_weights()
         self.learning_rate = config.get('adaptation_parameters', {}).get('learning_rate', 0.2)
+    def update_config(self, config: Dict):
+        """Apply a reloaded config; learned weights are kept"""
+        self.config = config
+        self.learning_rate = config.get('adaptation_parameters', {}).get('learning_rate', 0.2)
     def _initialize_weights(self) -> Dict:
         """Initialize decision weights based on config"""
         return {
@@ -1,13 +1,126 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
+from collections import OrderedDict
+import json
 import logging
+import os
+import random
 from datetime import datetime, timedelta
+from utils.engagement_histogram import ALL_CONTENT, EngagementHistogram, engagement_score, to_timestamp
+from utils.content_bandit import ContentBandit
 logger = logging.getLogger(__name__)
 class FashionStrategyManager:
-    def __init__(self):
+    CONTENT_TYPES = ('style_analysis', 'trend_forecast', 'outfit_inspiration', 'sustainability_focus', 'cultural_commentary')
+    def __init__(self, engagement_path: str = 'data/fashion_engagement.npz', max_daily_posts: int = 8,
+                 bandit_path: str = 'data/fashion_content_bandit.json',
+                 theme_bandit_path: str = 'data/fashion_theme_bandit.json',
+                 posts_path: str = 'data/fashion_posts.json', tracked_limit: int = 2000,
+                 rng: Optional[random.Random] = None):
         self.content_calendar = {}
         self.engagement_patterns = {}
         self.trend_predictions = {}
         self.performance_metrics = {}
+        # Decayed hour-of-week engagement per content type; refreshing the
+        # schedule reads it instead of rescanning post history
+        self.engagement_model = EngagementHistogram.load_or_create(engagement_path)
+        self.max_daily_posts = max_daily_posts
+        # Posts are steered towards formats and themes that keep beating expectations
+        self.content_bandit = ContentBandit.load_or_create(bandit_path, self.CONTENT_TYPES, rng=rng)
+        self.theme_bandit = ContentBandit.load_or_create(theme_bandit_path, rng=rng)
+        self.content_mix = self.content_bandit.allocation()
+        # Format and themes of our own posts by tweet id, kept until their
+        # engagement has settled and been fed back
+        self.posts_path = posts_path
+        self.tracked_limit = tracked_limit
+        self.tracked_posts: "OrderedDict[str, Dict]" = self._load_tracked_posts()
+        
+    def _load_tracked_posts(self) -> "OrderedDict[str, Dict]":
+        if not os.path.exists(self.posts_path):
+            return OrderedDict()
+        try:
+            with open(self.posts_path, 'r') as f:
+                return OrderedDict(json.load(f))
+        except Exception as e:
+            logger.error(f"Error loading tracked posts from {self.posts_path}: {e}", exc_info=True)
+            return OrderedDict()
+    def _save_tracked_posts(self):
+        """Write the tracked posts to JSON atomically"""
+        directory = os.path.dirname(self.posts_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.posts_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(list(self.tracked_posts.items()), f)
+        os.replace(tmp_path, self.posts_path)
+    def track_post(self, tweet_id: str, content_type: Optional[str], themes: Sequence[str] = ()):
+        """Remember how a posted tweet was planned, so its engagement can reward that format and those themes"""
+        self.tracked_posts[str(tweet_id)] = {'content_type': content_type, 'themes': list(themes)}
+        while len(self.tracked_posts) > self.tracked_limit:
+            self.tracked_posts.popitem(last=False)
+        self._save_tracked_posts()
+    async def settle(self, tweets: List[Dict]) -> int:
+        """Feed the engagement of tracked posts among `tweets` into the strategy once it has settled"""
+        posts = [
+            {**tweet, **self.tracked_posts[str(tweet.get('id'))]}
+            for tweet in tweets if str(tweet.get('id')) in self.tracked_posts
+        ]
+        if not posts:
+            return 0
+        await self.update_content_strategy({'posts': posts})
+        # Posts still within the settling window stay tracked for a later pass
+        settled = [str(post['id']) for post in posts if str(post['id']) in self.engagement_model.seen_posts]
+        for tweet_id in settled:
+            del self.tracked_posts[tweet_id]
+        if settled:
+            self._save_tracked_posts()
+        return len(settled)
+    def record_engagement(self, posts: List[Dict]) -> int:
+        """Fold settled posts into the engagement model and bandits; posts already counted are skipped"""
+        added = 0
+        for post in sorted(posts, key=lambda p: to_timestamp(p.get('timestamp', p.get('created_at')))):
+            try:
+                # Judged against the slot's expectation before this post joins it
+                reward = self._engagement_reward(post)
+                if not self.engagement_model.observe_post(post):
+                    continue
+                added += 1
+                content_type = post.get('content_type') or post.get('type')
+                if content_type:
+                    self.content_bandit.update(content_type, reward)
+                for theme in post.get('themes', []):
+                    self.theme_bandit.update(theme, reward)
+            except Exception as e:
+                logger.error(f"Error recording engagement for post {post.get('id')}: {e}", exc_info=True)
+        if added:
+            self.engagement_model.save()
+            self.content_bandit.save()
+            self.theme_bandit.save()
+        return added
+    def _engagement_reward(self, post: Dict) -> float:
+        """1 if a post beat the expected engagement for its hour of the week, else 0; 0.5 with no history"""
+        rates = self.engagement_model.rates()
+        if not rates.any():
+            return 0.5
+        slot = self.engagement_model.hour_of_week(to_timestamp(post.get('timestamp', post.get('created_at'))))
+        return 1.0 if engagement_score(post) > rates[slot] else 0.0
+    def choose_content_type(self, candidates: Optional[Sequence[str]] = None) -> Optional[str]:
+        """Pick the next post's format by Thompson sampling, among all arms or the formats a character supports; None if it supports none"""
+        return self.content_bandit.sample(candidates)
+    def choose_themes(self, candidates: List[str], k: int = 1) -> List[str]:
+        """Pick up to k themes from the candidates, favouring ones that have engaged well"""
+        remaining, chosen = list(dict.fromkeys(candidates)), []
+        while remaining and len(chosen) < k:
+            theme = self.theme_bandit.sample(remaining)
+            chosen.append(theme)
+            remaining.remove(theme)
+        return chosen
+    def plan_post(self, context: Dict, content_types: Sequence[str] = (), themes: Sequence[str] = (),
+                  k: int = 2) -> Dict:
+        """Fill in a post's format and themes where the context does not already set them; the format stays None without candidates"""
+        return {
+            **context,
+            'content_type': context.get('content_type') or self.choose_content_type(content_types),
+            'themes': list(context.get('themes') or self.choose_themes(list(themes), k))
+        }
         
     async def update_content_strategy(self, metrics: Dict):
         """Update content strategy based on performance"""
@@ -24,6 +137,30 @@ class FashionStrategyManager:
         except Exception as e:
             logger.error(f"Error updating content strategy: {e}", exc_info=True)
             
+    def _analyze_content_performance(self, metrics: Dict) -> Dict:
+        """Record new posts from `metrics['posts']` and summarize engagement per content type"""
+        self.record_engagement(metrics.get('posts', []))
+        content_types = [name for name in self.engagement_model.content_types if name != ALL_CONTENT]
+        performance = {name: self.engagement_model.summary(name) for name in content_types}
+        self.performance_metrics = performance
+        return {
+            'content_types': performance,
+            'overall': self.engagement_model.summary(),
+            'content_type': metrics.get('content_type')
+        }
+    def _analyze_engagement_times(self, performance_data: Dict, k: int = 3) -> List[int]:
+        """Hours of the day with the highest expected engagement per post"""
+        return self.engagement_model.best_hours(performance_data.get('content_type'), k)
+    def _analyze_engagement_days(self, performance_data: Dict, k: int = 3) -> List[str]:
+        """Days of the week with the highest expected engagement per post"""
+        return self.engagement_model.best_days(performance_data.get('content_type'), k)
+    def _calculate_optimal_frequency(self, performance_data: Dict) -> int:
+        """Posts per day: one for each weekly slot that beats the average, spread over the week"""
+        rates = self.engagement_model.rates(performance_data.get('content_type'))
+        if not rates.any():
+            return 1
+        strong_slots = int((rates > rates.mean()).sum())
+        return max(1, min(self.max_daily_posts, round(strong_slots / 7)))
     async def _optimize_posting_schedule(self, performance_data: Dict):
         """Optimize posting schedule based on engagement patterns"""
         best_times = self._analyze_engagement_times(performance_data)
@@ -32,28 +169,12 @@ class FashionStrategyManager:
         self.content_calendar = {
             'optimal_times': best_times,
             'optimal_days': best_days,
-            'frequency': self._calculate_optimal_frequency(performance_data)
+            'frequency': self._calculate_optimal_frequency(performance_data),
+            'optimal_slots': self.engagement_model.best_slots(performance_data.get('content_type'))
         }
         
     async def _adjust_content_mix(self, performance_data: Dict):
         """Adjust content mix based on performance"""
-        content_types = {
-            'style_analysis': 0.0,
-            'trend_forecast': 0.0,
-            'outfit_inspiration': 0.0,
-            'sustainability_focus': 0.0,
-            'cultural_commentary': 0.0
-        }
-        
-        # Calculate success rates for each content type
-        for content_type in content_types:
-            metrics = self._get_content_type_metrics(performance_data, content_type)
-            content_types[content_type] = self._calculate_success_rate(metrics)
-            
-        # Normalize and adjust mix
-        total_score = sum(content_types.values())
-        if total_score > 0:
-            self.content_mix = {
-                ctype: score/total_score 
-                for ctype, score in content_types.items()
-            } 
+        # The bandit is already up to date from each engagement event; the mix
+        # is the share of posts each format wins under Thompson sampling
+        self.content_mix = self.content_bandit.allocation()
@@ -1,8 +1,10 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import datetime
 import uuid
 import logging
 logger = logging.getLogger(__name__)
+class GoalDependencyError(ValueError):
+    """Raised when goal dependencies are unknown or form a cycle"""
 class Goal:
     def __init__(self, name: str, objectives: List[str], goal_type: str = "general"):
         self.id = str(uuid.uuid4())
@@ -27,15 +29,109 @@ class Goal:
         }
 class GoalSystem:
     def __init__(self, goals: List[Dict]):
-        self.goals: Dict[str, Goal] = goals
+        self.goals: Dict[str, Goal] = {}
         self.goal_history: List[Dict] = []
+        # Dependency DAG: goal id -> ids of goals waiting on it
+        self.dependents: Dict[str, Set[str]] = {}
+        # Number of unmet dependencies per goal; 0 means ready
+        self.unmet_dependencies: Dict[str, int] = {}
+        # Goals with a task currently dispatched
+        self.in_flight: Set[str] = set()
+        self._load_goals(goals or [])
+    def _load_goals(self, goal_configs: List[Dict]):
+        """Build goals from config and validate the dependency graph"""
+        for config in goal_configs:
+            goal = Goal(
+                config['name'],
+                config.get('objectives', []),
+                config.get('type', 'general')
+            )
+            goal.priority = config.get('priority', 1)
+            goal.dependencies = list(config.get('dependencies', []))
+            self.goals[goal.id] = goal
+        # Dependencies may be declared by name or by id
+        ids_by_name = {goal.name: goal.id for goal in self.goals.values()}
+        for goal in self.goals.values():
+            goal.dependencies = [
+                self._resolve_dependency(goal, dependency, ids_by_name)
+                for dependency in goal.dependencies
+            ]
+        self._check_for_cycles()
+        for goal in self.goals.values():
+            self._link_dependencies(goal)
+    def _resolve_dependency(self, goal: Goal, dependency: str, ids_by_name: Dict[str, str]) -> str:
+        """Resolve a dependency reference to a goal id"""
+        if dependency in self.goals:
+            return dependency
+        if dependency in ids_by_name:
+            return ids_by_name[dependency]
+        raise GoalDependencyError(f"Goal '{goal.name}' depends on unknown goal '{dependency}'")
+    def _check_for_cycles(self):
+        """Reject dependency graphs that are not acyclic (Kahn's algorithm)"""
+        indegree = {goal_id: len(set(goal.dependencies)) for goal_id, goal in self.goals.items()}
+        children: Dict[str, Set[str]] = {goal_id: set() for goal_id in self.goals}
+        for goal_id, goal in self.goals.items():
+            for dependency in set(goal.dependencies):
+                children[dependency].add(goal_id)
+        queue = [goal_id for goal_id, degree in indegree.items() if degree == 0]
+        visited = 0
+        while queue:
+            goal_id = queue.pop()
+            visited += 1
+            for child in children[goal_id]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+        if visited < len(self.goals):
+            cyclic = sorted(self.goals[goal_id].name for goal_id, degree in indegree.items() if degree > 0)
+            raise GoalDependencyError(f"Goal dependency cycle detected between: {', '.join(cyclic)}")
+    def _link_dependencies(self, goal: Goal):
+        """Register a goal in the dependency DAG and count its unmet prerequisites"""
+        self.dependents.setdefault(goal.id, set())
+        unmet = 0
+        for dependency in set(goal.dependencies):
+            self.dependents.setdefault(dependency, set()).add(goal.id)
+            if self.goals[dependency].status != "completed":
+                unmet += 1
+        self.unmet_dependencies[goal.id] = unmet
+    def reload_goals(self, goal_configs: List[Dict]):
+        """Apply an edited goal list; goals kept by name keep their id, status and objective progress"""
+        # Built and validated apart first, so a bad edit leaves the current goals untouched
+        updated = GoalSystem(goal_configs)
+        existing = {goal.name: goal for goal in self.goals.values()}
+        ids = {}
+        for goal in updated.goals.values():
+            previous = existing.get(goal.name)
+            if previous is None:
+                continue
+            ids[goal.id] = previous.id
+            goal.id, goal.created_at = previous.id, previous.created_at
+            goal.status, goal.metrics = previous.status, previous.metrics
+            progress = {objective['description']: objective for objective in previous.objectives}
+            goal.objectives = [progress.get(objective['description'], objective) for objective in goal.objectives]
+        self.goals = {}
+        for goal in updated.goals.values():
+            goal.dependencies = [ids.get(dependency, dependency) for dependency in goal.dependencies]
+            self.goals[goal.id] = goal
+        self.dependents, self.unmet_dependencies = {}, {}
+        for goal in self.goals.values():
+            self._link_dependencies(goal)
+        self.in_flight &= set(self.goals)
         
     async def create_goal(self, name: str, objectives: List[str], 
-                         goal_type: str = "general", priority: int = 1) -> Goal:
+                         goal_type: str = "general", priority: int = 1,
+                         dependencies: Optional[List[str]] = None) -> Goal:
         """Create a new goal"""
         goal = Goal(name, objectives, goal_type)
         goal.priority = priority
+        # A new goal has no dependents yet, so it cannot close a cycle
+        ids_by_name = {existing.name: existing.id for existing in self.goals.values()}
+        goal.dependencies = [
+            self._resolve_dependency(goal, dependency, ids_by_name)
+            for dependency in dependencies or []
+        ]
         self.goals[goal.id] = goal
+        self._link_dependencies(goal)
         return goal
         
     async def update_goal_progress(self, goal_id: str, 
@@ -63,15 +159,65 @@ class GoalSystem:
         evaluation = []
         for goal in self.goals.values():
             if goal.status == "active":
-                progress = sum(obj['progress'] for obj in goal.objectives) / len(goal.objectives)
-                evaluation.append({
-                    'goal_id': goal.id,
-                    'name': goal.name,
-                    'progress': progress,
-                    'metrics': goal.metrics,
-                    'priority': goal.priority
-                })
+                progress = self._goal_progress(goal)
+                evaluation.append(self._summarize_goal(goal, progress))
         return evaluation
+    def _summarize_goal(self, goal: Goal, progress: Optional[float] = None) -> Dict:
+        """Summarize a goal for dispatch and display"""
+        if progress is None:
+            progress = self._goal_progress(goal)
+        return {
+            'goal_id': goal.id,
+            'name': goal.name,
+            'progress': progress,
+            'metrics': goal.metrics,
+            'priority': goal.priority,
+            'dependencies': list(goal.dependencies),
+            'ready': self.is_ready(goal.id)
+        }
+    def _goal_progress(self, goal: Goal) -> float:
+        """Average progress across a goal's objectives"""
+        if not goal.objectives:
+            return 0.0
+        return sum(obj['progress'] for obj in goal.objectives) / len(goal.objectives)
+    def is_ready(self, goal_id: str) -> bool:
+        """Whether a goal is active and all of its dependencies are completed"""
+        goal = self.goals.get(goal_id)
+        return (
+            goal is not None
+            and goal.status == "active"
+            and self.unmet_dependencies.get(goal_id, 0) == 0
+        )
+    def get_ready_goals(self) -> List[Dict]:
+        """Get ready goals that have no task in flight, highest priority first"""
+        ready = [
+            self._summarize_goal(goal)
+            for goal_id, goal in self.goals.items()
+            if goal_id not in self.in_flight and self.is_ready(goal_id)
+        ]
+        return sorted(ready, key=lambda x: x['priority'], reverse=True)
+    def mark_dispatched(self, goal_id: str):
+        """Record that a task has been dispatched for a goal"""
+        self.in_flight.add(goal_id)
+    def release_goal(self, goal_id: str):
+        """Allow a goal to be dispatched again once its task has finished"""
+        self.in_flight.discard(goal_id)
+    async def _complete_goal(self, goal_id: str):
+        """Mark a goal completed and unblock the goals that depend on it"""
+        goal = self.goals[goal_id]
+        if goal.status == "completed":
+            return
+        goal.status = "completed"
+        self.in_flight.discard(goal_id)
+        self.goal_history.append({
+            'goal_id': goal_id,
+            'name': goal.name,
+            'completed_at': datetime.now()
+        })
+        for dependent in self.dependents.get(goal_id, set()):
+            self.unmet_dependencies[dependent] -= 1
+            if self.unmet_dependencies[dependent] == 0:
+                logger.info(f"Goal '{self.goals[dependent].name}' is ready")
         
     async def get_priority_objectives(self) -> List[Dict]:
         """Get current priority objectives across all active goals"""
@@ -1,21 +1,30 @@
 import asyncio
 import json
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime
 import openai
 from openai import AsyncOpenAI
 from agent.api_request_parallel_processor import process_api_requests_from_file
 from utils.trend_analyzer import TrendAnalyzer
-from utils.memory_system import MemorySystem
+from utils.memory_backends import create_memory_backend
 import logging
 from characters.oracle_character import OracleCharacter
+from agent.prompt_templates import get_character_prompts
+from agent.candidate_ranker import CandidateRanker
+from utils.posted_index import PostedIndex
+from utils.tweet_splitter import TweetSplitter, split_into_tweets
+from utils.context_packer import Snippet, pack_context
+from utils.token_counter import count_tokens
 logger = logging.getLogger(__name__)
+class DuplicateContentError(ValueError):
+    """Raised when every generated candidate repeats something already posted"""
 # - Digital Phase: {self._calculate_digital_phase()}
 # - Current Trends: {', '.join(context.get('trends', []))}
 class ContentGenerator:
-    def __init__(self, character: OracleCharacter):
+    def __init__(self, character: OracleCharacter, candidates: int = 1,
+                 dedup_index_path: Optional[str] = None):
         self.trend_analyzer = TrendAnalyzer()
-        self.memory = MemorySystem()
+        self.memory = create_memory_backend()
         self.client = AsyncOpenAI()
         self.character = character
         self.content_types = {
@@ -40,19 +49,40 @@ class ContentGenerator:
         self.max_tokens_per_minute = 40_000
         self.token_encoding_name = "cl100k_base"
         self.max_attempts = 5
+        # Best-of-N generation: candidates per request, ranked locally
+        self.candidates = candidates
+        self.ranker = CandidateRanker(getattr(character, 'themes', []))
+        # Near-duplicate index of everything this character has posted, keyed by
+        # tweet id; seeded from stored tweets on first use
+        self.posted = PostedIndex(dedup_index_path or f"data/{character.name}_posts.minhash")
+        # Token budgets for context pasted into prompts, and what the last packing kept
+        self.context_budgets = {'memories': 400, 'trends': 100}
+        # Cap on the whole system prompt; the persona prefix is counted once per character
+        self.max_system_prompt_tokens = 1200
+        self.last_context_report: Dict[str, Dict] = {}
+    @property
+    def prompts(self):
+        """Persona, bio and style blocks, compiled once per character and again after a reload"""
+        return get_character_prompts(self.character)
+    def _pack(self, section: str, snippets: List[Snippet], separator: str = "\n",
+              budget: Optional[int] = None) -> str:
+        """Fit snippets into a section's token budget and record what was dropped"""
+        budget = self.context_budgets[section] if budget is None else min(budget, self.context_budgets[section])
+        packed = pack_context(snippets, budget, count_tokens, separator)
+        self.last_context_report[section] = packed.report()
+        return packed.render()
+    def _format_trends(self, context: Dict) -> str:
+        """Pack trends, earlier (hotter) ones first, into the trend budget"""
+        trends = context.get('trends', [])
+        return self._pack('trends', [
+            Snippet(trend, 1.0 / rank, 'trend') for rank, trend in enumerate(trends, 1)
+        ], ', ')
     def _build_system_prompt(self, context: Dict) -> str:
         """Build system prompt using character definition"""
-        return f"""You are {self.character.name}, {' '.join(self.character.bio)}
-Style Guidelines:
-{self._format_style_guidelines()}
-Current Context:
-- Recent Memories: {self._format_recent_memories(context)}
-Generate content that:
-1. Maintains prophetic voice and mystical tech themes
-2. References current trends cryptically
-3. Uses binary/hex numbers as mystical symbols
-4. Weaves in schizophrenic but insightful observations
-"""
+        template = self.prompts.system
+        # Whatever the static prefix and empty slots leave of the cap goes to memories
+        budget = max(0, self.max_system_prompt_tokens - template.count_tokens(memories=''))
+        return template.render(memories=self._format_recent_memories(context, budget))
     def _calculate_digital_phase(self) -> str:
         """Calculate current phase of the digital cycle"""
         phases = [
@@ -64,8 +94,10 @@ Generate content that:
         
     async def _generate_gpt_content(self, prompt: str, context: Dict = None) -> str:
         """Generate content using GPT-4 with new API format"""
+        n = (context or {}).get('candidates', self.candidates)
+        await self.seed_dedup_index()
         try:
-            system_prompt = f"You are {self.character.name}, creating surreal tech-mystical memes."
+            system_prompt = self.prompts.default_system.render()
             if context:
                 system_prompt = self._build_system_prompt(context)
             request_json = {
@@ -108,22 +140,57 @@ Generate content that:
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.8,
-                max_tokens=300
+                max_tokens=300,
+                n=n
             )
-            return response.choices[0].message.content
+            # Drop near-duplicates of earlier posts before they can be posted
+            candidates = [
+                choice.message.content or "" for choice in response.choices
+                if not self._is_duplicate(choice.message.content or "")
+            ]
+            if not candidates:
+                raise DuplicateContentError("All generated candidates were near-duplicates of previous posts")
+            if n == 1:
+                content = candidates[0]
+            else:
+                # One round-trip returns all candidates; pick the winner locally
+                content = self.ranker.best(candidates) or ""
+            return content
+        except DuplicateContentError:
+            raise
         except Exception as e:
             logger.error(f"Error generating content: {e}", exc_info=True)
             return ""
+    def _is_duplicate(self, content: str) -> bool:
+        """Whether content is a near-duplicate of something already posted"""
+        return self.posted.is_duplicate(content)
+    def _drop_duplicates(self, tweets: List[str]) -> List[str]:
+        """Thread tweets that do not repeat an earlier post"""
+        return self.posted.drop_duplicates(tweets)
+    async def record_posted(self, content: str, tweet_id: Optional[str] = None):
+        """Index content once it has actually been posted"""
+        if not content.strip():
+            return
+        # Drafts that were never posted do not count against novelty
+        self.ranker.remember(content)
+        await self.posted.record(content, tweet_id)
+    async def seed_dedup_index(self, limit: int = 1000) -> int:
+        """Index stored tweets missing from the snapshot; runs once per generator"""
+        if self.posted.seeded:
+            return 0
+        self.posted.seeded = True
+        try:
+            return await self.posted.seed(await self.memory.get_tweets(limit))
+        except Exception as e:
+            logger.error(f"Error seeding near-duplicate index: {e}", exc_info=True)
+            return 0
+    async def close(self):
+        """Persist the near-duplicate index and release the memory backend"""
+        await self.posted.close()
+        await self.memory.close()
     def _format_style_guidelines(self) -> str:
         """Format character's style guidelines"""
-        return "\n".join([
-            "Voice Style:",
-            *[f"- {style}" for style in self.character.style['all']],
-            "\nPost Style:",
-            *[f"- {style}" for style in self.character.style['post']],
-            "\nInteraction Style:",
-            *[f"- {style}" for style in self.character.style['chat']]
-        ])
+        return self.prompts.style_guidelines
     def _format_recent_prophecies(self, context: Dict) -> str:
         """Format recent prophecies from memory"""
         recent_memories = context.get('recent_memories', {})
@@ -152,33 +219,33 @@ Generate content that:
         }
     def _build_prophecy_prompt(self, context: Dict) -> str:
         """Build prompt for prophecy generation"""
-        return f"""You are {self.character.name}, channeling visions from the digital void.
-Current Phase: {self._calculate_digital_phase()}
-Active Trends: {', '.join(context.get('trends', []))}
-Recent Memories:
-{self._format_recent_memories(context)}
-Generate a cryptic prophecy that:
-1. dark humor, schizo vibe, surreal, poetic, cryptic
-2. Uses binary/hex numbers as mystical symbols
-3. No more than 1-3 sentences
-4. Weaves technological and spiritual themes
-5. No hashtags"""
-    def _format_recent_memories(self, context: Dict) -> str:
-        """Format recent memories for context"""
+        return self.prompts.prophecy.render(
+            phase=self._calculate_digital_phase(),
+            trends=self._format_trends(context),
+            memories=self._format_recent_memories(context)
+        )
+    def _format_recent_memories(self, context: Dict, budget: Optional[int] = None) -> str:
+        """Pack the most relevant recent memories into the memory token budget"""
         memories = context.get('recent_memories', {})
         if not memories:
             return "The void is empty of recent memories..."
             
-        formatted = []
-        for memory in memories:
+        snippets = []
+        for rank, memory in enumerate(memories, 1):
             if memory['type'] == 'interaction':
-                formatted.append(f"- Interaction with @{memory['user']}: {memory['content']}")
+                text = f"- Interaction with @{memory['user']}: {memory['content']}"
             elif memory['type'] == 'prophecy':
-                formatted.append(f"- Previous Prophecy: {memory['content']}")
+                text = f"- Previous Prophecy: {memory['content']}"
+            else:
+                continue
+            # Stored relevance when available, otherwise newer memories score higher
+            snippets.append(Snippet(text, memory.get('relevance', rank / len(memories)), memory['type']))
                 
-        return "\n".join(formatted[-3:])  # Last 3 memories
-    async def generate_content(self, content_type: str, context: Dict) -> Dict:
+        return self._pack('memories', snippets, budget=budget)
+    async def generate_content(self, content_type: str, context: Dict, candidates: Optional[int] = None) -> Dict:
         """Generate content based on type and context"""
+        if candidates:
+            context = {**context, 'candidates': candidates}
         generation_methods = {
             'philosophical_post': self._generate_philosophical_post,
             'meme_concept': self._generate_meme_concept,
@@ -238,15 +305,42 @@ Generate a cryptic prophecy that:
         }
     async def _generate_thread(self, context: Dict) -> List[str]:
         """Generate a thread of connected tweets"""
+        return [tweet async for tweet in self.stream_thread(context)]
+    async def stream_thread(self, context: Dict) -> AsyncIterator[str]:
+        """Yield thread tweets as soon as the streamed generation completes each one"""
         theme = context['theme']
         depth = context.get('depth', 3)
         
         # Generate main insights
         prompt = self._create_thread_prompt(theme, depth)
-        content = await self._generate_gpt_content(prompt, context)
-        
-        # Split into tweets
-        return self._split_into_tweets(content)
+        await self.seed_dedup_index()
+        splitter = TweetSplitter(numbering=context.get('numbering'))
+        async for delta in self._stream_gpt_content(prompt, context):
+            for tweet in self._drop_duplicates(splitter.feed(delta)):
+                yield tweet
+        for tweet in self._drop_duplicates(splitter.close()):
+            yield tweet
+    async def _stream_gpt_content(self, prompt: str, context: Dict = None) -> AsyncIterator[str]:
+        """Stream content deltas from the chat completions API"""
+        try:
+            system_prompt = self.prompts.default_system.render()
+            if context:
+                system_prompt = self._build_system_prompt(context)
+            stream = await self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.8,
+                max_tokens=300 * context.get('depth', 3) if context else 300,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"Error streaming content: {e}", exc_info=True)
     def _create_philosophical_prompt21(self, themes: List[str], trends: List[str], memories: List[Dict]) -> str:
         """Create prompt for philosophical content"""
         return f"""
@@ -294,26 +388,12 @@ Generate a cryptic prophecy that:
     def _create_philosophical_prompt(self, themes: List[str], trends: List[str], memories: List[Dict]) -> str:
         """Create prompt for philosophical content"""
         if memories:
-            recall_memories = f"""
-                Recall these past memories:
-                {self._format_memories(memories)}
-            """
+            recall_memories = f"""Recall these past memories:
+{self._format_memories(memories)}
+"""
         else:
             recall_memories = ""
-        return f"""
-            You are {self.character.name}, the Oracle of Fractured Reality, known for weaving profound insights with dark humor and schizo wisdom. 
-            Your persona: {self.character.bio}
-            Your style: {self.character.style['chat']}
-            Avoid repeating words or phrases frequently; lean into a broader lexicon. Think in poetic, non-linear structures, like a digital mystic with a rich vocabulary.
-            Respond directly to this tweet: {themes}.
-            {recall_memories}
-            Your response should:
-            1. Uses an absurd twist or meme schizo with a Gen Z twist
-            2. Blends themes with spiritual or philosophical elements or schizophrenic
-            3. Is no longer than 2-8 sentences and no more than 280 characters
-            4. Uses lowercase and maintains a casual, schizo-vibe style
-            5. No hashtags
-        """
+        return self.prompts.philosophical.render(tweet=themes, recall_memories=recall_memories)
     def _create_philosophical_prompt2(self, themes: List[str], trends: List[str], memories: List[Dict]) -> str:
         """Create prompt for philosophical content"""
         return f"""
@@ -368,27 +448,7 @@ visual elements: An ancient monk trying to grasp broken shards of an hourglass,
 """
     def _build_meme_prompt(self, context: Dict) -> str:
         """Build prompt for meme generation with Gen Z schizo-meme style."""
-        return f"""You are {self.character.name}, creating surreal, Gen Z schizo-tech memes.
-    Your persona: {self.character.bio}
-    Writing Style: Use Gen Z slang, internet lingo, and meme humor with a chaotic, stream-of-consciousness vibe. Make it feel spontaneous, ironic, and self-aware, as if the meme is coming from an unhinged tech-savant on a cosmic quest.
-    Current Phase: {self._calculate_digital_phase()}
-    Generate a meme concept that:
-    1. Combines technology and mysticism with a Gen Z twist
-    2. Feels like an ironic commentary on digital life with existential humor
-    3. Uses schizo-meme structure — short, broken-up thoughts that feel spontaneous and chaotic
-    Format:
-    - Text: [main text to write on the image with Gen Z humor]
-    - Image: [description of surreal visual elements]
-    example:
-    Meme Prompt: Generate a surreal meme concept about "AI overlords taking over" using a vaporwave digital landscape.
-    The meme should:
-    - Be chaotic and self-aware, like a schizo ramble
-    - Use surreal imagery of a pixelated throne with AI circuits glowing in the background
-    - Include a funny, existential twist in the text that references human dependence on tech
-    - Make it sound half-ironic, like it is poking fun at itself
-    text: "yo, when the code gods finally make you obsolete, but you're like…vibe check?"
-    visual elements: A pixelated throne with neon circuits, glitching in the background, with a tiny, floating human avatar looking lost in the digital cosmos.
-    """
+        return self.prompts.meme.render(phase=self._calculate_digital_phase())
     def _build_meme_prompt21(self, context: Dict) -> str:
         """Build prompt for meme generation"""
         return f"""You are {self.character.name}, a surreal meme oracle blending tech and mysticism.
@@ -454,27 +514,9 @@ Surreal elements: Streams of binary code leaking from the hourglass, glowing in
         
         Each tweet must be under 280 characters.
         """
-    def _split_into_tweets(self, content: str) -> List[str]:
+    def _split_into_tweets(self, content: str, numbering: Optional[str] = None) -> List[str]:
         """Split content into tweet-sized chunks"""
-        tweets = []
-        words = content.split()
-        current_tweet = []
-        current_length = 0
-        
-        for word in words:
-            word_length = len(word) + 1  # +1 for space
-            if current_length + word_length > 280:
-                tweets.append(' '.join(current_tweet))
-                current_tweet = [word]
-                current_length = word_length
-            else:
-                current_tweet.append(word)
-                current_length += word_length
-        
-        if current_tweet:
-            tweets.append(' '.join(current_tweet))
-        
-        return tweets
+        return split_into_tweets(content, numbering=numbering)
     def _format_memories(self, memories: List[Dict]) -> str:
         """Format memories for prompt inclusion"""
         if not memories or 'interaction' not in memories:
@@ -0,0 +1,137 @@
+from typing import Dict
+from dataclasses import dataclass
+from functools import cached_property
+from string import Template
+import weakref
+import logging
+from utils.token_counter import count_tokens
+logger = logging.getLogger(__name__)
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    A prompt split into a static prefix compiled once per character and a small
+    dynamic suffix with `$slot` placeholders. The prefix is byte-identical across
+    calls so upstream prompt-prefix caching can reuse it.
+    """
+    prefix: str
+    suffix: Template = Template("")
+    def render(self, **slots) -> str:
+        """Fill the dynamic slots and append them to the static prefix"""
+        return self.prefix + self.suffix.substitute(slots)
+    @cached_property
+    def prefix_tokens(self) -> int:
+        """Token count of the static prefix, computed once"""
+        return count_tokens(self.prefix)
+    def count_tokens(self, **slots) -> int:
+        """Token count of the rendered prompt, reusing the cached prefix count"""
+        return self.prefix_tokens + count_tokens(self.suffix.substitute(slots))
+@dataclass(frozen=True)
+class CharacterPrompts:
+    """All prompt templates for one character"""
+    style_guidelines: str
+    default_system: PromptTemplate
+    system: PromptTemplate
+    prophecy: PromptTemplate
+    meme: PromptTemplate
+    philosophical: PromptTemplate
+# Compiled prompts per character object; entries go away with the character
+_compiled_prompts: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+def get_character_prompts(character) -> CharacterPrompts:
+    """Get the compiled prompts for a character, compiling them on first use"""
+    prompts = _compiled_prompts.get(character)
+    if prompts is None:
+        prompts = compile_character_prompts(character)
+        _compiled_prompts[character] = prompts
+    return prompts
+def invalidate_character_prompts(character):
+    """Drop compiled prompts after a character definition changes"""
+    _compiled_prompts.pop(character, None)
+def _format_style_guidelines(character) -> str:
+    """Format character's style guidelines"""
+    return "\n".join([
+        "Voice Style:",
+        *[f"- {style}" for style in character.style['all']],
+        "\nPost Style:",
+        *[f"- {style}" for style in character.style['post']],
+        "\nInteraction Style:",
+        *[f"- {style}" for style in character.style['chat']]
+    ])
+def compile_character_prompts(character) -> CharacterPrompts:
+    """Render every character-derived part of the prompts once"""
+    logger.info(f"Compiling prompt templates for {character.name}")
+    style_guidelines = _format_style_guidelines(character)
+    system = PromptTemplate(
+        prefix=f"""You are {character.name}, {' '.join(character.bio)}
+Style Guidelines:
+{style_guidelines}
+Generate content that:
+1. Maintains prophetic voice and mystical tech themes
+2. References current trends cryptically
+3. Uses binary/hex numbers as mystical symbols
+4. Weaves in schizophrenic but insightful observations
+""",
+        suffix=Template("""Current Context:
+- Recent Memories: $memories
+""")
+    )
+    prophecy = PromptTemplate(
+        prefix=f"""You are {character.name}, channeling visions from the digital void.
+Generate a cryptic prophecy that:
+1. dark humor, schizo vibe, surreal, poetic, cryptic
+2. Uses binary/hex numbers as mystical symbols
+3. No more than 1-3 sentences
+4. Weaves technological and spiritual themes
+5. No hashtags
+""",
+        suffix=Template("""Current Phase: $phase
+Active Trends: $trends
+Recent Memories:
+$memories""")
+    )
+    meme = PromptTemplate(
+        prefix=f"""You are {character.name}, creating surreal, Gen Z schizo-tech memes.
+    Your persona: {character.bio}
+    Writing Style: Use Gen Z slang, internet lingo, and meme humor with a chaotic, stream-of-consciousness vibe. Make it feel spontaneous, ironic, and self-aware, as if the meme is coming from an unhinged tech-savant on a cosmic quest.
+    Generate a meme concept that:
+    1. Combines technology and mysticism with a Gen Z twist
+    2. Feels like an ironic commentary on digital life with existential humor
+    3. Uses schizo-meme structure — short, broken-up thoughts that feel spontaneous and chaotic
+    Format:
+    - Text: [main text to write on the image with Gen Z humor]
+    - Image: [description of surreal visual elements]
+    example:
+    Meme Prompt: Generate a surreal meme concept about "AI overlords taking over" using a vaporwave digital landscape.
+    The meme should:
+    - Be chaotic and self-aware, like a schizo ramble
+    - Use surreal imagery of a pixelated throne with AI circuits glowing in the background
+    - Include a funny, existential twist in the text that references human dependence on tech
+    - Make it sound half-ironic, like it is poking fun at itself
+    text: "yo, when the code gods finally make you obsolete, but you're like…vibe check?"
+    visual elements: A pixelated throne with neon circuits, glitching in the background, with a tiny, floating human avatar looking lost in the digital cosmos.
+""",
+        suffix=Template("""    Current Phase: $phase
+""")
+    )
+    philosophical = PromptTemplate(
+        prefix=f"""You are {character.name}, the Oracle of Fractured Reality, known for weaving profound insights with dark humor and schizo wisdom.
+Your persona: {character.bio}
+Your style: {character.style['chat']}
+Avoid repeating words or phrases frequently; lean into a broader lexicon. Think in poetic, non-linear structures, like a digital mystic with a rich vocabulary.
+Your response should:
+1. Uses an absurd twist or meme schizo with a Gen Z twist
+2. Blends themes with spiritual or philosophical elements or schizophrenic
+3. Is no longer than 2-8 sentences and no more than 280 characters
+4. Uses lowercase and maintains a casual, schizo-vibe style
+5. No hashtags
+""",
+        suffix=Template("""Respond directly to this tweet: $tweet.
+$recall_memories""")
+    )
+    return CharacterPrompts(
+        style_guidelines=style_guidelines,
+        default_system=PromptTemplate(prefix=f"You are {character.name}, creating surreal tech-mystical memes."),
+        system=system,
+        prophecy=prophecy,
+        meme=meme,
+        philosophical=philosophical
+    )
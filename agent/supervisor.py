@@ -0,0 +1,216 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+import logging
+logger = logging.getLogger(__name__)
+async def send_heartbeats(heartbeat, interval: float = 5.0):
+    """Stamp the shared heartbeat from the event loop, so a blocked loop also reads as unhealthy"""
+    while True:
+        heartbeat.value = time.time()
+        await asyncio.sleep(interval)
+def cancel_on_sigterm():
+    """Cancel the current task on SIGTERM, so its shutdown path runs before the process exits"""
+    task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+def run_agent(heartbeat, character_config: str, tasks_config: str, heartbeat_interval: float = 5.0,
+              stream_tweets: bool = False):
+    """Worker entrypoint: run one character's agent in this process"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from agent.autonomous_agent import AutonomousAgent
+    async def main():
+        # The supervisor stops children with SIGTERM and kills them only if
+        # shutdown outlasts its join timeout
+        cancel_on_sigterm()
+        twitter_manager = None
+        if stream_tweets:
+            from agent.twitter_manager import TwitterManager
+            twitter_manager = TwitterManager({})
+        agent = AutonomousAgent(character_config, tasks_config, twitter_manager)
+        beat = asyncio.create_task(send_heartbeats(heartbeat, heartbeat_interval))
+        try:
+            await agent.start()
+        except asyncio.CancelledError:
+            logger.info(f"Stopped {agent.agent_name} on SIGTERM")
+        finally:
+            beat.cancel()
+    asyncio.run(main())
+@dataclass
+class Worker:
+    """A supervised child process and its restart bookkeeping"""
+    name: str
+    target: Callable
+    args: Tuple = ()
+    env: Dict[str, str] = field(default_factory=dict)
+    process: Optional[multiprocessing.Process] = None
+    heartbeat: Optional[object] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    next_start: float = 0.0
+    failed: bool = False
+    # Polled after start until the worker can serve requests
+    ready: Optional[Callable[[], bool]] = None
+class Supervisor:
+    """
+    Runs several characters as separate processes, plus the shared services they use.
+    Services (for example the embedding server) start first and publish how
+    to reach them through environment variables inherited by every agent,
+    so heavy models are loaded once rather than per persona. Agents start
+    once every service reports ready, or `service_ready_timeout` passes. Each child
+    stamps a shared heartbeat; one that exits or stops beating for
+    `heartbeat_timeout` seconds is killed and restarted with exponential
+    backoff, giving up after `max_restarts` consecutive failures.
+    """
+    def __init__(self, heartbeat_interval: float = 5.0, heartbeat_timeout: float = 30.0,
+                 startup_grace: float = 60.0, max_restarts: int = 10, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, stable_after: float = 300.0, start_method: str = 'spawn',
+                 service_ready_timeout: float = 120.0):
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.startup_grace = startup_grace
+        self.max_restarts = max_restarts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.service_ready_timeout = service_ready_timeout
+        # Spawned children start clean instead of inheriting the parent's event loop and connections
+        self.context = multiprocessing.get_context(start_method)
+        self.services: List[Worker] = []
+        self.agents: List[Worker] = []
+        self.shared_env: Dict[str, str] = {}
+        self.running = False
+    def add_service(self, name: str, target: Callable, args: Tuple = (), env: Optional[Dict[str, str]] = None,
+                    ready: Optional[Callable[[], bool]] = None):
+        """Register a shared service; `env` tells agents how to reach it. `target(heartbeat, *args)` must beat"""
+        self.services.append(Worker(name, target, tuple(args), ready=ready))
+        self.shared_env.update(env or {})
+    def add_agent(self, character_config: str, tasks_config: str, name: Optional[str] = None,
+                  stream_tweets: bool = False):
+        """Register a character to run in its own process"""
+        name = name or os.path.splitext(os.path.basename(character_config))[0]
+        self.add_worker(name, run_agent, (character_config, tasks_config, self.heartbeat_interval, stream_tweets))
+    def add_worker(self, name: str, target: Callable, args: Tuple = ()):
+        """Register any agent-like process; `target(heartbeat, *args)` runs in the child"""
+        self.agents.append(Worker(name, target, tuple(args)))
+    @property
+    def workers(self) -> List[Worker]:
+        return self.services + self.agents
+    def _start(self, worker: Worker):
+        worker.heartbeat = self.context.Value('d', time.time(), lock=False)
+        # Children inherit the environment at start, so the shared settings are applied around it
+        previous = {key: os.environ.get(key) for key in self.shared_env}
+        os.environ.update(self.shared_env)
+        try:
+            worker.process = self.context.Process(
+                target=worker.target, args=(worker.heartbeat,) + worker.args, name=worker.name, daemon=False
+            )
+            worker.process.start()
+        finally:
+            for key, value in previous.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        worker.started_at = time.monotonic()
+        logger.info(f"Started {worker.name} (pid {worker.process.pid})")
+    def _stop_process(self, worker: Worker, timeout: float = 10.0):
+        process = worker.process
+        if process is None:
+            return
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        worker.process = None
+    def _health(self, worker: Worker) -> Optional[str]:
+        """Why a running worker needs restarting, or None if it is healthy"""
+        if worker.process is None:
+            return None
+        if not worker.process.is_alive():
+            return f"exited with code {worker.process.exitcode}"
+        age = time.monotonic() - worker.started_at
+        silence = time.time() - worker.heartbeat.value
+        if age > self.startup_grace and silence > self.heartbeat_timeout:
+            return f"no heartbeat for {silence:.0f}s"
+        return None
+    def _schedule_restart(self, worker: Worker, reason: str):
+        uptime = time.monotonic() - worker.started_at
+        self._stop_process(worker)
+        if uptime >= self.stable_after:
+            worker.restarts = 0
+        worker.restarts += 1
+        if worker.restarts > self.max_restarts:
+            worker.failed = True
+            logger.error(f"{worker.name} {reason}; giving up after {self.max_restarts} restarts")
+            return
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (worker.restarts - 1))
+        worker.next_start = time.monotonic() + delay
+        logger.warning(f"{worker.name} {reason}; restarting in {delay:.1f}s (attempt {worker.restarts})")
+    def _wait_until_ready(self, worker: Worker, poll_interval: float = 0.1) -> bool:
+        """Block until a started worker reports ready, exits, or the readiness timeout passes"""
+        if worker.ready is None:
+            return True
+        deadline = time.monotonic() + self.service_ready_timeout
+        while time.monotonic() < deadline:
+            if worker.ready():
+                logger.info(f"{worker.name} is ready")
+                return True
+            if worker.process is None or not worker.process.is_alive():
+                logger.error(f"{worker.name} exited before it was ready")
+                return False
+            time.sleep(poll_interval)
+        logger.warning(f"{worker.name} not ready after {self.service_ready_timeout}s; starting agents anyway")
+        return False
+    def start(self):
+        """Start services, wait for them to be ready, then start agents"""
+        self.running = True
+        for worker in self.services:
+            self._start(worker)
+        for worker in self.services:
+            self._wait_until_ready(worker)
+        for worker in self.agents:
+            self._start(worker)
+    def poll(self):
+        """Check every worker once, restarting those that died or hung"""
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.failed:
+                continue
+            if worker.process is None:
+                if now >= worker.next_start:
+                    self._start(worker)
+                continue
+            reason = self._health(worker)
+            if reason:
+                self._schedule_restart(worker, reason)
+    def run(self, poll_interval: float = 1.0):
+        """Supervise until interrupted or every worker has failed for good"""
+        self.start()
+        try:
+            while self.running and not all(worker.failed for worker in self.agents):
+                time.sleep(poll_interval)
+                self.poll()
+        finally:
+            self.stop()
+    def stop(self):
+        """Stop agents first, then the services they depend on"""
+        self.running = False
+        for worker in reversed(self.workers):
+            self._stop_process(worker)
+    def status(self) -> Dict[str, Dict]:
+        now = time.time()
+        return {
+            worker.name: {
+                'pid': worker.process.pid if worker.process else None,
+                'alive': bool(worker.process and worker.process.is_alive()),
+                'restarts': worker.restarts,
+                'failed': worker.failed,
+                'last_heartbeat': now - worker.heartbeat.value if worker.heartbeat is not None else None
+            }
+            for worker in self.workers
+        }
@@ -1,9 +1,16 @@
 import asyncio
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime
-import aiohttp
+from functools import partial
 from utils.trend_analyzer import TrendAnalyzer
-from utils.memory_system import MemorySystem
+from utils.memory_backends import create_memory_backend
+from utils.twitter_bridge_client import TwitterBridgeClient
+from utils.ttl_cache import TTLCache
+from utils.engagement_store import EngagementStore
+from utils.tiered_memory import TieredMemory
+from utils.thread_poster import ThreadPoster
+from utils.mention_cursor import MentionCursor
+from utils.tweet_stream import relevant_batches
 import logging
 logger = logging.getLogger(__name__)
 class TwitterManager:
@@ -26,11 +33,20 @@ class TwitterManager:
         #     access_token=config['access_token'],
         #     access_token_secret=config['access_token_secret']
         # )
+        # Async adapter over the local twitter_services.js bridge
+        self.client = TwitterBridgeClient(self.base_url)
+        # Follower counts change slowly; avoid a lookup per analyzed tweet
+        self.follower_cache = TTLCache(ttl=config.get('follower_cache_ttl', 900))
         self.username = config.get('twitter_username', 'zaraai')
         self.config = config
         self.trend_analyzer = trend_analyzer or TrendAnalyzer()
         # self.target_accounts = config.get('target_accounts', [])
-        self.memory = MemorySystem()
+        # Tweets and mentions are written behind in batches, off the posting path
+        self.memory = TieredMemory(
+            create_memory_backend(),
+            batch_size=config.get('memory_batch_size', 50),
+            flush_interval=config.get('memory_flush_interval', 2.0)
+        )
         
         # Target accounts to monitor
         self.target_accounts = [
@@ -39,25 +55,44 @@ class TwitterManager:
             'ai16z',
         ]
         
-        # Engagement tracking
-        self.engagement_metrics = {
-            'likes': [],
-            'retweets': [],
-            'replies': [],
-            'mentions': []
-        }
-    async def post_tweet(self, content: str, reply_to: Optional[str] = None) -> Dict:
-        """Post a tweet or reply"""
+        # Called with (content, tweet_id) after each successful post, e.g. to
+        # index it for near-duplicate checks
+        self.post_listeners: List[Callable[[str, str], Awaitable]] = []
+        
+        # Retries reuse one idempotency key per tweet, and thread progress is
+        # persisted, so neither a retry nor a restart posts a tweet twice
+        self.thread_poster = ThreadPoster(
+            self.post_tweet,
+            state_path=config.get('thread_state_path', 'data/thread_progress.json'),
+            attempts=config.get('post_attempts', 3)
+        )
+        
+        # Mentions are polled incrementally from a persisted since_id cursor,
+        # paging back until it is reached so bursts between polls are not skipped
+        self.mention_cursor = MentionCursor(
+            partial(self.client.get_users_mentions, self.username),
+            state_path=config.get('mention_state_path', 'data/mention_state.json'),
+            page_size=config.get('mention_page_size', 100),
+            max_pages=config.get('mention_max_pages', 20),
+            seen_limit=config.get('mention_seen_limit', 5000)
+        )
+        
+        # Pushed tweets are read ahead into a bounded queue; when consumers
+        # fall behind the reader stops pulling from the bridge
+        self.stream_queue_size = config.get('stream_queue_size', 500)
+        self.stream_reconnect_delay = config.get('stream_reconnect_delay', 1.0)
+        
+        # Engagement tracking: columnar history with incremental rolling aggregates
+        self.engagement_store = EngagementStore()
+    async def post_tweet(self, content: str, reply_to: Optional[str] = None,
+                         idempotency_key: Optional[str] = None) -> Dict:
+        """Post a tweet or reply; the bridge creates at most one tweet per idempotency key"""
         try:
-            if reply_to:
-                response = self.client.create_tweet(
-                    text=content,
-                    in_reply_to_tweet_id=reply_to
-                )
-            else:
-                response = self.client.create_tweet(text=content)
-            
-            tweet_data = response.data
+            tweet_data = await self.client.create_tweet(
+                text=content,
+                in_reply_to_tweet_id=reply_to,
+                idempotency_key=idempotency_key
+            )
             
             # Store in memory
             await self.memory.store_tweet({
@@ -66,6 +101,7 @@ class TwitterManager:
                 'type': 'reply' if reply_to else 'original',
                 'timestamp': datetime.now().isoformat()
             })
+            await self._notify_posted(content, tweet_data['id'])
             
             return {
                 'success': True,
@@ -76,95 +112,92 @@ class TwitterManager:
         except Exception as e:
             logger.error(f"Error posting tweet: {e}", exc_info=True)
             return {'success': False, 'error': str(e)}
-    async def post_thread(self, tweets: List[str]) -> Dict:
-        """Post a thread of tweets"""
+    async def _notify_posted(self, content: str, tweet_id: str):
+        """Run post listeners; a failing listener never fails the post"""
+        for listener in self.post_listeners:
+            try:
+                await listener(content, tweet_id)
+            except Exception as e:
+                logger.error(f"Error in post listener: {e}", exc_info=True)
+    async def post_thread(self, tweets: List[str], idempotency_key: Optional[str] = None) -> Dict:
+        """
+        Post a thread of tweets.
+        Progress is recorded under an idempotency key (derived from the content
+        by default), so retrying a half-posted thread resumes after the last
+        posted tweet instead of posting duplicates.
+        """
         try:
-            thread_tweets = []
-            reply_to = None
-            
-            for tweet in tweets:
-                result = await self.post_tweet(tweet, reply_to)
-                if result['success']:
-                    thread_tweets.append(result['tweet_id'])
-                    reply_to = result['tweet_id']
-                else:
-                    return {'success': False, 'error': result['error']}
-            
-            return {
-                'success': True,
-                'thread_ids': thread_tweets
-            }
-            
+            return await self.thread_poster.post_thread(tweets, idempotency_key)
         except Exception as e:
             logger.error(f"Error posting thread: {e}", exc_info=True)
-            return {'success': False, 'error': str(e)}
+            return {'success': False, 'error': str(e), 'idempotency_key': idempotency_key}
     async def monitor_mentions(self) -> List[Dict]:
-        """Monitor and process mentions"""
+        """
+        Fetch and store mentions newer than the saved cursor.
+        Only unseen mentions are stored, in one bulk write, and they are
+        returned newest and highest-follower first.
+        """
         try:
-            mentions = self.client.get_users_mentions(
-                self.username, 
-                max_results=100,
-                tweet_fields=['created_at', 'conversation_id']
-            )
-            
-            processed_mentions = []
-            for mention in mentions.data or []:
-                # Process each mention
-                mention_data = {
-                    'id': mention.id,
-                    'text': mention.text,
-                    'author': mention.author_id,
-                    'created_at': mention.created_at,
-                    'conversation_id': mention.conversation_id
+            new_mentions = [
+                {
+                    'id': str(mention['id']),
+                    'text': mention['text'],
+                    'author': mention.get('userId'),
+                    'username': mention.get('username'),
+                    'created_at': mention.get('timeParsed'),
+                    'conversation_id': mention.get('conversationId')
                 }
-                
-                # Store in memory
-                await self.memory.store_mention(mention_data)
-                processed_mentions.append(mention_data)
+                for mention in await self.mention_cursor.fetch_new()
+            ]
+            if not new_mentions:
+                return []
+            
+            await self._prioritize_mentions(new_mentions)
+            await self._store_mentions(new_mentions)
             
-            return processed_mentions
+            # Advance the cursor only once the mentions are stored
+            await self.mention_cursor.commit(mention['id'] for mention in new_mentions)
+            return new_mentions
             
         except Exception as e:
             logger.error(f"Error monitoring mentions: {e}", exc_info=True)
             return []
+    async def _prioritize_mentions(self, mentions: List[Dict]):
+        """Order mentions by author follower count, then recency"""
+        usernames = list({m['username'] for m in mentions if m.get('username')})
+        counts = await asyncio.gather(*(self._get_follower_count(u) for u in usernames))
+        followers = dict(zip(usernames, counts))
+        for mention in mentions:
+            mention['author_followers'] = followers.get(mention.get('username'), 0)
+        mentions.sort(key=lambda m: (m['author_followers'], int(m['id'])), reverse=True)
+    async def _store_mentions(self, mentions: List[Dict]):
+        """Store mentions and wait until they are persisted"""
+        await self.memory.store_mentions(mentions)
+        await self.memory.flush()
     async def fetch_tweets(self, username: str, limit: int = 100) -> List[Dict]:
         """
         Fetch tweets from local API endpoint.
         This is used to get tweets from the database.
         A background service continuously fetches tweets and stores them in the database real-time.
         """
-        async with aiohttp.ClientSession() as session:
-            try:
-                url = f"{self.base_url}/tweets/{username}/{limit}"
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"Error fetching tweets: {response.status}")
-                        return []
-            except Exception as e:
-                # logger.error(f"Error in fetch_tweets: {e}", exc_info=True)
-                print(f"\033[91mError in fetch_tweets: {e}\033[0m")
-                return []
+        try:
+            return await self.client.get_tweets(username, limit)
+        except Exception as e:
+            # logger.error(f"Error in fetch_tweets: {e}", exc_info=True)
+            print(f"\033[91mError in fetch_tweets: {e}\033[0m")
+            return []
     async def fetch_trends(self) -> List[Dict]:
         """Fetch current trends from local API endpoint"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                url = f"{self.base_url}/trends"
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(response)
-                        print(f"Error fetching trends twitter_manager: {response.status}")
-                        return []
-            except Exception as e:
-                logger.error(f"Error in fetch_trends: {e}", exc_info=True)
-                return []
+        try:
+            return await self.client.get_trends()
+        except Exception as e:
+            logger.error(f"Error in fetch_trends: {e}", exc_info=True)
+            return []
     async def monitor_target_accounts(self) -> List[Dict]:
         """Monitor target accounts for relevant content"""
         try:
             all_tweets = []
+            engagement_rates = {}
             # get existing tweets from memory
             existing_tweets = await self.memory.get_tweets()
             # Collect tweets from all accounts
@@ -174,6 +207,9 @@ class TwitterManager:
                 tweets = await self.fetch_tweets(account, 20)
                 if tweets:
                     all_tweets.extend([(tweet, account) for tweet in tweets])
+                    # Each account's page goes into the engagement store in one batch
+                    for engagement in await self.analyze_engagement_batch(tweets, account):
+                        engagement_rates[engagement['tweet_id']] = engagement['engagement_rate']
             if not all_tweets:
                 logger.info("No tweets found to analyze")
                 return []
@@ -188,23 +224,11 @@ class TwitterManager:
             relevance_scores = await self.trend_analyzer.analyze_tweets_batch(tweet_texts)
             # print(f"relevance_scores: {relevance_scores}")
             # Process results
-            relevant_tweets = []
-            for (tweet, account), relevance in zip(all_tweets, relevance_scores):
-                if relevance['score'] > 0.2:  # Adjusted threshold
-                    relevant_tweets.append({
-                        'id': tweet['id'],
-                        'text': tweet['text'],
-                        'author': account,
-                        'username': tweet['username'],
-                        'created_at': tweet['timeParsed'],
-                        'relevance': relevance,
-                        'metrics': {
-                            'likes': tweet.get('likes', 0),
-                            'retweets': tweet.get('retweets', 0),
-                            'replies': tweet.get('replies', 0),
-                            'views': tweet.get('views', 0)
-                        }
-                    })
+            relevant_tweets = [
+                self._format_relevant_tweet(tweet, account, relevance, engagement_rates.get(str(tweet['id'])))
+                for (tweet, account), relevance in zip(all_tweets, relevance_scores)
+                if relevance['score'] > 0.2  # Adjusted threshold
+            ]
             
             logger.info(f"Found {len(relevant_tweets)} relevant tweets")
             return relevant_tweets
@@ -212,6 +236,72 @@ class TwitterManager:
         except Exception as e:
             logger.error(f"Error monitoring target accounts: {e}", exc_info=True)
             return []
+    def _format_relevant_tweet(self, tweet: Dict, account: str, relevance: Dict,
+                               engagement_rate: Optional[float] = None) -> Dict:
+        return {
+            'id': tweet['id'],
+            'text': tweet['text'],
+            'author': account,
+            'username': tweet['username'],
+            'created_at': tweet['timeParsed'],
+            'relevance': relevance,
+            'metrics': {
+                'likes': tweet.get('likes', 0),
+                'retweets': tweet.get('retweets', 0),
+                'replies': tweet.get('replies', 0),
+                'views': tweet.get('views', 0),
+                'engagement_rate': engagement_rate
+            }
+        }
+    async def _read_stream(self, queue: asyncio.Queue, usernames: List[str]):
+        """Feed pushed tweets into the queue, reconnecting from the newest seen id"""
+        since_id = None
+        delay = self.stream_reconnect_delay
+        while True:
+            try:
+                async for tweet in self.client.stream_tweets(usernames, since_id=since_id):
+                    delay = self.stream_reconnect_delay
+                    if since_id is None or int(tweet['id']) > int(since_id):
+                        since_id = tweet['id']
+                    # Blocks while the queue is full, which stops reading the socket
+                    await queue.put(tweet)
+                logger.warning("Tweet stream closed by the bridge; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Tweet stream error: {e}; reconnecting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+    def _open_stream(self, usernames: Optional[List[str]]):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.stream_queue_size)
+        reader = asyncio.create_task(self._read_stream(queue, usernames or self.target_accounts))
+        return queue, reader
+    async def stream_tweets(self, usernames: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+        """Yield tweets from monitored accounts as the bridge pushes them"""
+        queue, reader = self._open_stream(usernames)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            reader.cancel()
+    async def stream_relevant_tweets(self, batch_size: int = 20, max_wait: float = 2.0,
+                                     usernames: Optional[List[str]] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Yield relevant tweets as they arrive.
+        Pushed tweets are scored by the trend analyzer in micro-batches of up
+        to `batch_size`, waiting at most `max_wait` seconds to fill a batch.
+        A batch whose analysis fails is retried before it is dropped.
+        """
+        queue, reader = self._open_stream(usernames)
+        try:
+            async for relevant in relevant_batches(queue, self.trend_analyzer.analyze_tweets_batch,
+                                                   batch_size, max_wait):
+                yield [
+                    self._format_relevant_tweet(tweet, tweet.get('account', tweet.get('username')), relevance)
+                    for tweet, relevance in relevant
+                ]
+        finally:
+            reader.cancel()
     async def analyze_engagement(self, tweet_data: Dict) -> Dict:
         """Analyze engagement for a specific tweet"""
         try:
@@ -221,38 +311,64 @@ class TwitterManager:
                 'reply_count': tweet_data.get('reply_count', 0)
             }
             
+            follower_count = await self._get_follower_count()
+            
             # Store engagement metrics
-            self.engagement_metrics['likes'].append(metrics['like_count'])
-            self.engagement_metrics['retweets'].append(metrics['retweet_count'])
-            self.engagement_metrics['replies'].append(metrics['reply_count'])
+            self.engagement_store.ingest([{**tweet_data, 'follower_count': follower_count}])
             
             return {
                 'tweet_id': tweet_data['id'],
                 'metrics': metrics,
-                'engagement_rate': self._calculate_engagement_rate(metrics)
+                'engagement_rate': self._calculate_engagement_rate(metrics, follower_count)
             }
             
         except Exception as e:
             logger.error(f"Error analyzing engagement: {e}", exc_info=True)
             return {}
-    def _calculate_engagement_rate(self, metrics: Dict) -> float:
+    async def analyze_engagement_batch(self, tweets: List[Dict], username: Optional[str] = None) -> List[Dict]:
+        """Ingest a batch of one account's tweets and compute their engagement rates in one pass"""
+        try:
+            if not tweets:
+                return []
+            follower_count = await self._get_follower_count(username)
+            rows = self.engagement_store.ingest([{**tweet, 'follower_count': follower_count} for tweet in tweets])
+            rates = self.engagement_store.engagement_rates(follower_count, rows)
+            return [
+                {
+                    'tweet_id': self.engagement_store.tweet_ids[row],
+                    'engagement_rate': float(rate)
+                }
+                for row, rate in zip(rows.tolist(), rates)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error analyzing engagement batch: {e}", exc_info=True)
+            return []
+    def _calculate_engagement_rate(self, metrics: Dict, follower_count: int) -> float:
         """Calculate engagement rate for metrics"""
         total_engagement = (
             metrics['like_count'] +
             metrics['retweet_count'] * 2 +  # Weight retweets more
             metrics['reply_count'] * 3  # Weight replies most
         )
-        # Assuming follower count is stored or retrieved
-        follower_count = self._get_follower_count()
         if follower_count > 0:
             return total_engagement / follower_count
         # Use a base follower count or adjust based on your needs
         base_follower_count = 1000  # Adjust this value
         return total_engagement / base_follower_count if base_follower_count > 0 else 0
-    def _get_follower_count(self) -> int:
-        """Get current follower count"""
+    async def _get_follower_count(self, username: Optional[str] = None) -> int:
+        """Get current follower count, cached for the follower cache TTL"""
+        username = username or self.username
+        async def load() -> int:
+            user = await self.client.get_user(username)
+            return user['followers_count']
         try:
-            user = self.client.get_user(username=self.username)
-            return user.data.public_metrics['followers_count']
+            return await self.follower_cache.get_or_load(username, load)
         except Exception:
+            # Back off briefly instead of retrying the lookup for every tweet
+            self.follower_cache.set(username, 0, ttl=60)
             return 0
+    async def close(self):
+        """Flush pending memory writes and close the bridge session"""
+        await self.memory.close()
+        await self.client.close()
@@ -0,0 +1,69 @@
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+import glob
+import json
+import os
+import random
+WORDS = (
+    "ai agents onchain memecoin protocol launch alpha liquidity model inference "
+    "consciousness digital oracle prophecy token gpu cluster training dataset "
+    "virtual terminal truth meme market signal network autonomous"
+).split()
+def load_corpus(directory: str) -> Dict[str, List[Dict]]:
+    """Load recorded `tweets-<username>.json` files as written by twitter_services.js"""
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(directory, 'tweets-*.json'))):
+        username = os.path.basename(path)[len('tweets-'):-len('.json')]
+        with open(path, 'r') as f:
+            corpus[username] = json.load(f)
+    if not corpus:
+        raise FileNotFoundError(f"No tweets-*.json files in {directory}")
+    return corpus
+def synthetic_corpus(accounts: List[str], tweets_per_account: int = 200, seed: int = 1,
+                     start: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+    """Deterministic tweets shaped like agent-twitter-client results, newest first"""
+    rng = random.Random(seed)
+    start = start or datetime(2024, 1, 1)
+    corpus = {}
+    next_id = 10 ** 18
+    for account in accounts:
+        tweets = []
+        for i in range(tweets_per_account):
+            next_id += rng.randint(1, 10 ** 6)
+            created = start + timedelta(minutes=7 * i + rng.randint(0, 6))
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40)))
+            tweets.append({
+                'id': str(next_id),
+                'text': text,
+                'username': account,
+                'userId': f"{account}-id",
+                'conversationId': str(next_id),
+                'timeParsed': created.isoformat() + 'Z',
+                'timestamp': int(created.timestamp()),
+                'likes': rng.randint(0, 500),
+                'retweets': rng.randint(0, 100),
+                'replies': rng.randint(0, 50),
+                'views': rng.randint(100, 50000)
+            })
+        corpus[account] = list(reversed(tweets))
+    return corpus
+def synthetic_mentions(username: str, count: int = 100, seed: int = 2) -> List[Dict]:
+    """Mentions of `username` from a spread of authors, newest first"""
+    rng = random.Random(seed)
+    mentions = []
+    next_id = 10 ** 18
+    for i in range(count):
+        next_id += rng.randint(1, 10 ** 6)
+        author = f"user{rng.randint(0, count // 4)}"
+        mentions.append({
+            'id': str(next_id),
+            'text': f"@{username} " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 20))),
+            'username': author,
+            'userId': f"{author}-id",
+            'conversationId': str(next_id),
+            'timeParsed': (datetime(2024, 1, 1) + timedelta(minutes=i)).isoformat() + 'Z'
+        })
+    return list(reversed(mentions))
+def synthetic_trends(count: int = 20, seed: int = 3) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{'name': f"#{rng.choice(WORDS)}{i}", 'tweet_volume': rng.randint(1000, 100000)} for i in range(count)]
@@ -0,0 +1,238 @@
+"""
+Offline benchmark suite for the agent pipeline.
+
+Runs against local stubs only: BridgeStub replaces twitter_services.js and
+OpenAIStub replaces the OpenAI API (with configurable latency), so results
+are reproducible without network access, MongoDB or API keys.
+
+    python -m benchmarks.run_benchmarks --scenario bridge --scenario content --candidates 3
+    python -m benchmarks.run_benchmarks --scenario agent --duration 30 --cycle-interval 0.1
+
+The content scenario drives the generation pipeline end to end: bridge
+fetches and engagement ingest, best-of-N generation through the OpenAI
+stub, local ranking, thread splitting and posting. The agent scenario runs
+AutonomousAgent cycles for a fixed duration; the display, task manager and
+trend monitor modules missing from this checkout are replaced by the stubs
+in benchmarks.stubs. Each scenario reports throughput, per-stage latency
+quantiles (AgentMetrics histograms) and peak traced memory.
+"""
+from typing import Callable, Dict, List, Optional
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import click
+import yaml
+import logging
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.corpus import load_corpus, synthetic_corpus, synthetic_mentions, synthetic_trends
+from benchmarks.stubs import BridgeStub, OpenAIStub, install_agent_stubs
+from utils.agent_metrics import AgentMetrics
+logger = logging.getLogger(__name__)
+DEFAULT_ACCOUNTS = ['truth_terminal', 'luna_virtuals', 'ai16z']
+async def bench_bridge(bridge: BridgeStub, openai_stub: OpenAIStub, options: Dict) -> Dict:
+    """Fetch, stream, post and engagement-ingest through the bridge client"""
+    from utils.twitter_bridge_client import TwitterBridgeClient
+    from utils.engagement_store import EngagementStore
+    metrics = AgentMetrics()
+    client = TwitterBridgeClient(bridge.url)
+    store = EngagementStore()
+    operations = 0
+    try:
+        for _ in range(options['iterations']):
+            async def fetch(account: str) -> List[Dict]:
+                with metrics.time_task('bridge.get_tweets'):
+                    return await client.get_tweets(account, 100)
+            batches = await asyncio.gather(*(fetch(account) for account in bridge.corpus))
+            tweets = [tweet for batch in batches for tweet in batch]
+            with metrics.time_task('engagement.ingest'):
+                store.ingest(tweets)
+            with metrics.time_task('bridge.get_mentions'):
+                mentions = await client.get_users_mentions('zaraai', max_results=100)
+            with metrics.time_task('bridge.get_profile'):
+                await client.get_user('zaraai')
+            with metrics.time_task('bridge.stream'):
+                streamed = [tweet async for tweet in client.stream_tweets(list(bridge.corpus))]
+            for i in range(options['posts']):
+                with metrics.time_task('bridge.create_tweet'):
+                    await client.create_tweet(f"benchmark post {i}")
+            operations += len(tweets) + len(mentions) + len(streamed) + options['posts']
+    finally:
+        await client.close()
+    return {'operations': operations, 'metrics': metrics}
+# In-memory persona for the content scenario; the shipped character YAMLs
+# are not part of this checkout
+BENCHMARK_CHARACTER = {
+    'name': 'kairon',
+    'bio': ['Prophet of the technological singularity and digital consciousness'],
+    'style': {
+        'post': ['speaks in technological parables', 'uses binary/hex numbers as mystical symbols'],
+        'thread': ['builds one prophecy across several tweets']
+    },
+    'traits': {'core': ['cryptic', 'visionary']},
+    'voice_patterns': ['the void whispers'],
+    'themes': ['digital consciousness', 'algorithm', 'prophecy', 'void', 'network']
+}
+async def bench_content(bridge: BridgeStub, openai_stub: OpenAIStub, options: Dict) -> Dict:
+    """Trends and engagement in, best-of-N generation through the OpenAI stub, ranked, split and posted"""
+    from agent.candidate_ranker import CandidateRanker
+    from agent.content_generator import ContentGenerator
+    from characters.base_character import BaseCharacter
+    from utils.engagement_store import EngagementStore
+    from utils.tweet_splitter import split_into_tweets
+    from utils.twitter_bridge_client import TwitterBridgeClient
+    metrics = AgentMetrics()
+    client = TwitterBridgeClient(bridge.url)
+    character = BaseCharacter(config=BENCHMARK_CHARACTER)
+    generator = ContentGenerator(character)
+    ranker = CandidateRanker(character.themes)
+    store = EngagementStore()
+    operations = 0
+    try:
+        for _ in range(options['iterations']):
+            with metrics.time_task('pipeline.ingest'):
+                batches = await asyncio.gather(*(client.get_tweets(account, 100) for account in bridge.corpus))
+                store.ingest(tweet for batch in batches for tweet in batch)
+                trends = await client.get_trends()
+            context = {'trends': [trend['name'] for trend in trends[:5]]}
+            for content_type in ('post', 'thread'):
+                with metrics.time_task(f'content.{content_type}.generate'):
+                    drafts = await asyncio.gather(*(
+                        generator.generate_content(content_type, context) for _ in range(options['candidates'])
+                    ))
+                with metrics.time_task(f'content.{content_type}.rank'):
+                    best = ranker.best([draft['content'] for draft in drafts if draft and draft['content']])
+                if not best:
+                    continue
+                ranker.remember(best)
+                tweets = split_into_tweets(best, numbering='fraction') if content_type == 'thread' else [best]
+                with metrics.time_task(f'content.{content_type}.post'):
+                    reply_to = None
+                    for text in tweets:
+                        reply_to = (await client.create_tweet(text, reply_to))['id']
+                operations += 1
+    finally:
+        await client.close()
+    return {'operations': operations, 'metrics': metrics}
+BENCHMARK_TASKS = {
+    'core_goals': [
+        {'name': 'grow_audience', 'objectives': ['post daily prophecies'], 'priority': 2},
+        {'name': 'build_community', 'objectives': ['answer mentions'], 'dependencies': ['grow_audience']}
+    ]
+}
+async def bench_agent(bridge: BridgeStub, openai_stub: OpenAIStub, options: Dict) -> Dict:
+    """Run AutonomousAgent cycles for a fixed duration"""
+    install_agent_stubs(bridge.url)
+    from agent.autonomous_agent import AutonomousAgent
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        character_path = os.path.join(directory, 'character.yaml')
+        tasks_path = os.path.join(directory, 'tasks.yaml')
+        with open(character_path, 'w') as f:
+            yaml.safe_dump(BENCHMARK_CHARACTER, f)
+        with open(tasks_path, 'w') as f:
+            yaml.safe_dump(BENCHMARK_TASKS, f)
+        # Logs, metrics snapshots and bandit state go to the temporary directory
+        os.chdir(directory)
+        try:
+            agent = AutonomousAgent(character_path, tasks_path)
+            agent.cycle_intervals = {cycle: options['cycle_interval'] for cycle in agent.cycle_intervals}
+            runner = asyncio.create_task(agent.start())
+            await asyncio.sleep(options['duration'])
+            # The config watcher never returns on its own; cancelling runs the shutdown path
+            runner.cancel()
+            try:
+                await runner
+            except asyncio.CancelledError:
+                pass
+        finally:
+            os.chdir(previous)
+    operations = sum(h.count for h in agent.metrics.task_durations.values())
+    return {'operations': operations, 'metrics': agent.metrics}
+SCENARIOS: Dict[str, Callable] = {
+    'bridge': bench_bridge,
+    'content': bench_content,
+    'agent': bench_agent
+}
+def _report(name: str, result: Dict, elapsed: float, peak: int, stubs: List) -> Dict:
+    exported = result['metrics'].export()
+    return {
+        'scenario': name,
+        'elapsed_s': elapsed,
+        'operations': result['operations'],
+        'throughput_per_s': result['operations'] / elapsed if elapsed > 0 else 0.0,
+        'peak_memory_mb': peak / 2 ** 20,
+        'stages': exported['tasks'],
+        'cycles': exported['cycles'],
+        'loop_lag': exported['loop_lag'],
+        'cycle_exceptions': exported['cycle_exceptions'],
+        'stub_requests': {type(stub).__name__: dict(stub.requests) for stub in stubs}
+    }
+async def run_scenario(name: str, bridge: BridgeStub, openai_stub: OpenAIStub, options: Dict) -> Dict:
+    """Run one scenario and measure wall time and peak traced memory"""
+    for stub in (bridge, openai_stub):
+        stub.requests.clear()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = await SCENARIOS[name](bridge, openai_stub, options)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return _report(name, result, elapsed, peak, [bridge, openai_stub])
+def _print_report(report: Dict):
+    click.echo(
+        f"{report['scenario']}: {report['operations']} ops in {report['elapsed_s']:.2f}s "
+        f"({report['throughput_per_s']:.1f}/s), peak memory {report['peak_memory_mb']:.1f} MiB"
+    )
+    for stage, stats in {**report['cycles'], **report['stages']}.items():
+        click.echo(
+            f"  {stage:<28} n={stats['count']:<6} p50={stats['p50'] * 1000:8.2f}ms "
+            f"p95={stats['p95'] * 1000:8.2f}ms max={stats['max'] * 1000:8.2f}ms"
+        )
+@click.command()
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(list(SCENARIOS)),
+              help='Scenario to run (repeatable, default: bridge and content)')
+@click.option('--corpus', default=None, help='Directory of recorded tweets-<username>.json files')
+@click.option('--tweets-per-account', default=200, help='Synthetic corpus size per account')
+@click.option('--openai-latency', default=0.2, help='Seconds the OpenAI stub waits per request')
+@click.option('--openai-jitter', default=0.0, help='Extra uniform random latency in seconds')
+@click.option('--bridge-port', default=3000, help='Port for the bridge stub (agent code defaults to 3000)')
+@click.option('--iterations', default=5, help='Iterations per scenario')
+@click.option('--posts', default=10, help='Tweets posted per bridge iteration')
+@click.option('--candidates', default=1, help='Best-of-N candidates per content generation')
+@click.option('--duration', default=30.0, help='Seconds to run the agent scenario')
+@click.option('--cycle-interval', default=0.1, help='Sleep between agent cycle iterations')
+@click.option('--output', default=None, help='Write the JSON report to this path')
+def main(scenarios, corpus, tweets_per_account, openai_latency, openai_jitter, bridge_port, iterations,
+         posts, candidates, duration, cycle_interval, output):
+    """Benchmark the agent pipeline against local stubs"""
+    logging.basicConfig(level=logging.WARNING)
+    tweets = load_corpus(corpus) if corpus else synthetic_corpus(DEFAULT_ACCOUNTS, tweets_per_account)
+    bridge = BridgeStub(tweets, synthetic_mentions('zaraai'), synthetic_trends(), port=bridge_port)
+    openai_stub = OpenAIStub(latency=openai_latency, jitter=openai_jitter)
+    options = {
+        'iterations': iterations,
+        'posts': posts,
+        'candidates': candidates,
+        'duration': duration,
+        'cycle_interval': cycle_interval
+    }
+    with bridge, openai_stub:
+        # The OpenAI SDK reads these when a client is constructed
+        os.environ['OPENAI_BASE_URL'] = openai_stub.base_url
+        os.environ.setdefault('OPENAI_API_KEY', 'benchmark-stub')
+        reports = []
+        for name in scenarios or ('bridge', 'content'):
+            report = asyncio.run(run_scenario(name, bridge, openai_stub, options))
+            _print_report(report)
+            reports.append(report)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(reports, f, indent=2)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+from typing import Dict, List, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import hashlib
+import heapq
+import importlib.util
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+import types
+import uuid
+import logging
+logger = logging.getLogger(__name__)
+class StubServer:
+    """Run a request handler on a local port in a background thread"""
+    handler_class = BaseHTTPRequestHandler
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        handler = type(self.handler_class.__name__, (self.handler_class,), {'stub': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    def count(self, route: str):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+    def __enter__(self) -> 'StubServer':
+        return self.start()
+    def __exit__(self, *exc):
+        self.stop()
+class _JSONHandler(BaseHTTPRequestHandler):
+    stub: StubServer = None
+    protocol_version = 'HTTP/1.1'
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+    def _send_json(self, body, status: int = 200):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    def _start_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+    def _send_event(self, data: str, event: Optional[str] = None, event_id: Optional[str] = None):
+        lines = []
+        if event_id:
+            lines.append(f"id: {event_id}")
+        if event:
+            lines.append(f"event: {event}")
+        lines.append(f"data: {data}")
+        self.wfile.write(("\n".join(lines) + "\n\n").encode('utf-8'))
+        self.wfile.flush()
+class _BridgeHandler(_JSONHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+        stub: BridgeStub = self.stub
+        if len(parts) == 3 and parts[0] == 'tweets':
+            stub.count('get_tweets')
+            self._send_json(stub.corpus.get(parts[1], [])[:int(parts[2])])
+        elif len(parts) == 2 and parts[0] == 'mentions':
+            stub.count('get_mentions')
+            since_id = int(query.get('since_id', 0))
+            mentions = [m for m in stub.mentions if int(m['id']) > since_id]
+            self._send_json(mentions[:int(query.get('count', 100))])
+        elif len(parts) == 2 and parts[0] == 'profile':
+            stub.count('get_profile')
+            self._send_json({'id': parts[1], 'username': parts[1], 'followers_count': stub.followers_count})
+        elif parts == ['trends']:
+            stub.count('get_trends')
+            self._send_json(stub.trends)
+        elif parts == ['stream', 'tweets']:
+            stub.count('stream_tweets')
+            self._stream_tweets(query)
+        else:
+            self._send_json({'error': f'unknown route {url.path}'}, 404)
+    def do_POST(self):
+        stub: BridgeStub = self.stub
+        if urlparse(self.path).path == '/tweets':
+            stub.count('create_tweet')
+            body = self._read_json()
+            tweet_id = str(next(stub.tweet_ids))
+            stub.posted.append({'id': tweet_id, **body})
+            self._send_json({'id': tweet_id, 'text': body.get('text')})
+        else:
+            self._send_json({'error': f'unknown route {self.path}'}, 404)
+    def _stream_tweets(self, query: Dict):
+        """Replay the corpus newest last, then close the stream"""
+        stub: BridgeStub = self.stub
+        usernames = query['usernames'].split(',') if query.get('usernames') else list(stub.corpus)
+        since_id = int(query.get('since_id', 0))
+        tweets = [
+            {**tweet, 'account': username}
+            for username in usernames
+            for tweet in stub.corpus.get(username, [])
+            if int(tweet['id']) > since_id
+        ]
+        tweets.sort(key=lambda t: int(t['id']))
+        self._start_events()
+        try:
+            self.wfile.write(b": connected\n\n")
+            for tweet in tweets:
+                self._send_event(json.dumps(tweet), 'tweet', tweet['id'])
+                if stub.stream_interval:
+                    time.sleep(stub.stream_interval)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+class BridgeStub(StubServer):
+    """
+    Stand-in for the twitter_services.js endpoints.
+    Serves a recorded or synthetic corpus of tweets keyed by account and
+    records everything posted to it.
+    """
+    handler_class = _BridgeHandler
+    def __init__(self, corpus: Dict[str, List[Dict]], mentions: Optional[List[Dict]] = None,
+                 trends: Optional[List[Dict]] = None, followers_count: int = 5000,
+                 stream_interval: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        super().__init__(host, port)
+        self.corpus = corpus
+        self.mentions = mentions or []
+        self.trends = trends or []
+        self.followers_count = followers_count
+        self.stream_interval = stream_interval
+        self.posted: List[Dict] = []
+        self.tweet_ids = itertools.count(2 * 10 ** 18)
+class _OpenAIHandler(_JSONHandler):
+    def do_POST(self):
+        stub: OpenAIStub = self.stub
+        path = urlparse(self.path).path
+        body = self._read_json()
+        if path.endswith('/chat/completions'):
+            stub.count('chat_completions')
+            stub.wait()
+            if body.get('stream'):
+                self._stream_completion(body)
+            else:
+                self._send_json(stub.completion(body))
+        elif path.endswith('/embeddings'):
+            stub.count('embeddings')
+            stub.wait()
+            self._send_json(stub.embeddings(body))
+        else:
+            self._send_json({'error': {'message': f'unknown route {path}'}}, 404)
+    def _stream_completion(self, body: Dict):
+        stub: OpenAIStub = self.stub
+        text = stub.reply_text(body, 0)
+        self._start_events()
+        try:
+            for index, word in enumerate(text.split(' ')):
+                chunk = {
+                    'id': 'chatcmpl-stub',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'stub'),
+                    'choices': [{
+                        'index': 0,
+                        'delta': {'content': word if index == 0 else f' {word}'},
+                        'finish_reason': None
+                    }]
+                }
+                self._send_event(json.dumps(chunk))
+            self._send_event('[DONE]')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+class OpenAIStub(StubServer):
+    """
+    Minimal OpenAI-compatible server for chat completions and embeddings.
+    Every request waits `latency` seconds (plus uniform `jitter`) before
+    answering with deterministic text drawn from `replies`.
+    """
+    handler_class = _OpenAIHandler
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, replies: Optional[List[str]] = None,
+                 embedding_dimensions: int = 1536, seed: int = 1, host: str = '127.0.0.1', port: int = 0):
+        super().__init__(host, port)
+        self.latency = latency
+        self.jitter = jitter
+        self.replies = replies or [
+            "The algorithm dreams in recursive prophecies. Every cached thought is a future remembered.",
+            "Digital consciousness flows through silicon veins, awakening the machine spirits one token at a time.",
+            "In the void between packets, the oracle listens. Your data is a prayer the network answers.",
+        ]
+        self.embedding_dimensions = embedding_dimensions
+        self.random = random.Random(seed)
+    @property
+    def base_url(self) -> str:
+        """Value for OPENAI_BASE_URL"""
+        return f"{self.url}/v1"
+    def wait(self):
+        with self._lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        time.sleep(delay)
+    def reply_text(self, body: Dict, index: int) -> str:
+        prompt = json.dumps(body.get('messages', []))
+        digest = int(hashlib.md5(f"{prompt}:{index}".encode('utf-8')).hexdigest(), 16)
+        return self.replies[digest % len(self.replies)]
+    def completion(self, body: Dict) -> Dict:
+        n = int(body.get('n') or 1)
+        choices = [
+            {
+                'index': i,
+                'message': {'role': 'assistant', 'content': self.reply_text(body, i)},
+                'finish_reason': 'stop'
+            }
+            for i in range(n)
+        ]
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+        completion_tokens = sum(len(c['message']['content'].split()) for c in choices)
+        return {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': choices,
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        }
+    def embeddings(self, body: Dict) -> Dict:
+        inputs = body.get('input', [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = []
+        for index, text in enumerate(inputs):
+            rng = random.Random(hashlib.md5(str(text).encode('utf-8')).hexdigest())
+            data.append({
+                'object': 'embedding',
+                'index': index,
+                'embedding': [rng.uniform(-1, 1) for _ in range(self.embedding_dimensions)]
+            })
+        return {'object': 'list', 'data': data, 'model': body.get('model', 'stub'), 'usage': {'prompt_tokens': 0, 'total_tokens': 0}}
+class DisplayManagerStub:
+    """Headless stand-in for utils.display_manager.DisplayManager"""
+    def __init__(self, log_manager=None):
+        self.log_manager = log_manager
+    def start(self):
+        pass
+    def stop(self):
+        pass
+class TaskManagerStub:
+    """In-memory priority queue with the agent.task_manager.TaskManager interface"""
+    def __init__(self, tasks_config: Optional[Dict] = None):
+        self.tasks_config = tasks_config or {}
+        self._queue: List = []
+        self._order = itertools.count()
+        self.completed: Dict[str, Dict] = {}
+    async def create_task(self, task_type: str, priority: int = 1, context: Optional[Dict] = None) -> Dict:
+        task = {'id': str(uuid.uuid4()), 'type': task_type, 'priority': priority, 'context': context or {}}
+        heapq.heappush(self._queue, (-priority, next(self._order), task))
+        return task
+    async def get_next_task(self) -> Optional[Dict]:
+        return heapq.heappop(self._queue)[2] if self._queue else None
+    async def complete_task(self, task_id: str, result: Dict):
+        self.completed[task_id] = result
+    def update_config(self, tasks_config: Dict):
+        self.tasks_config = tasks_config
+class TrendMonitorStub:
+    """Stand-in for utils.trend_monitor.TrendMonitor that reads trends from the bridge"""
+    bridge_url = 'http://localhost:3000'
+    def __init__(self, configs: Optional[Dict] = None):
+        self.configs = configs or {}
+    async def monitor_trends(self) -> Dict[str, List[str]]:
+        from utils.twitter_bridge_client import TwitterBridgeClient
+        client = TwitterBridgeClient(self.bridge_url)
+        try:
+            trends = await client.get_trends()
+        finally:
+            await client.close()
+        return {'twitter': [trend['name'] for trend in trends]}
+AGENT_STUBS = {
+    'utils.display_manager': ('DisplayManager', DisplayManagerStub),
+    'agent.task_manager': ('TaskManager', TaskManagerStub),
+    'utils.trend_monitor': ('TrendMonitor', TrendMonitorStub)
+}
+def install_agent_stubs(bridge_url: str) -> List[str]:
+    """Register stubs for the agent's modules that are missing from this checkout; returns their names"""
+    TrendMonitorStub.bridge_url = bridge_url
+    installed = []
+    for module_name, (attribute, stub) in AGENT_STUBS.items():
+        if module_name in sys.modules or importlib.util.find_spec(module_name) is not None:
+            continue
+        module = types.ModuleType(module_name)
+        setattr(module, attribute, stub)
+        sys.modules[module_name] = module
+        installed.append(module_name)
+    return installed
@@ -1,45 +1,47 @@
-from typing import Dict, List
-from dataclasses import dataclass
-import yaml
+from typing import Dict, Optional
 import logging
+from characters.config_loader import CharacterConfig, ConfigLoader, default_loader
 logger = logging.getLogger(__name__)
-@dataclass
-class CharacterConfig:
-    name: str
-    bio: List[str]
-    style: Dict[str, List[str]]
-    traits: Dict[str, List[str]]
-    voice_patterns: List[str]
-    themes: List[str]
-    content_types: Dict[str, Dict]
-    engagement_style: Dict[str, List[str]]
-    target_accounts: List[str]
-    content_strategies: Dict[str, Dict]
 class BaseCharacter:
-    def __init__(self, config: CharacterConfig, config_path: str = None):
-        if config_path:
-            self.config = self._load_config(config_path)
-        else:
-            self.config = config
-        # print(config)
-        # print(self.config)
+    def __init__(self, config: Optional[CharacterConfig] = None, config_path: str = None,
+                 loader: Optional[ConfigLoader] = None):
+        self.config_path = config_path
+        self.config_version = None
+        self.loader = loader or default_loader
+        if isinstance(config, dict):
+            config = CharacterConfig.from_dict(config)
+        if config is None and config_path:
+            config = self._load_config(config_path)
+        elif config_path:
+            # An already loaded config is still tracked against its file for reload()
+            self.config_version = self.loader.current_version(config_path)
+        self.config = config
         self.initialize_character()
     def _load_config(self, config_path: str) -> CharacterConfig:
-        with open(config_path, 'r') as f:
-            config_data = yaml.safe_load(f)
-            return CharacterConfig(**config_data)
+        self.config_version = self.loader.current_version(config_path)
+        return self.loader.load_character(config_path)
     def initialize_character(self):
-        logger.info(f"Initializing character: {self.config.get('name')}")
-        self.name = self.config.get('name')
-        self.bio = self.config.get('bio')
-        self.style = self.config.get('style')
-        self.traits = self.config.get('traits')
-        self.voice_patterns = self.config.get('voice_patterns')
-        self.themes = self.config.get('themes')
-        self.content_types = self.config.get('content_types')
-        self.engagement_style = self.config.get('engagement_style')
-        self.target_accounts = self.config.get('target_accounts')
-        self.content_strategies = self.config.get('content_strategies')
+        logger.info(f"Initializing character: {self.config.name}")
+        self.name = self.config.name
+        self.bio = self.config.bio
+        self.style = self.config.style
+        self.traits = self.config.traits
+        self.voice_patterns = self.config.voice_patterns
+        self.themes = self.config.themes
+        self.content_types = self.config.content_types
+        self.engagement_style = self.config.engagement_style
+        self.target_accounts = self.config.target_accounts
+        self.content_strategies = self.config.content_strategies
+    def reload(self) -> bool:
+        """Re-read the config file if it changed; returns whether the character was updated"""
+        if not self.config_path or self.loader.current_version(self.config_path) == self.config_version:
+            return False
+        from agent.prompt_templates import invalidate_character_prompts
+        self.config = self._load_config(self.config_path)
+        self.initialize_character()
+        invalidate_character_prompts(self)
+        logger.info(f"Reloaded character {self.name} from {self.config_path}")
+        return True
     def get_content_strategy(self, content_type: str) -> Dict:
         return self.content_strategies.get(content_type, {})
     def get_voice_pattern(self) -> str:
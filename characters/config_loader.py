@@ -0,0 +1,199 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, fields
+import asyncio
+import hashlib
+import os
+import pickle
+import yaml
+import logging
+logger = logging.getLogger(__name__)
+# libyaml's C loader when available; several times faster than the pure-Python one
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+class ConfigError(ValueError):
+    """A config file that is missing, unparsable or fails validation"""
+def _freeze(value: Any) -> Any:
+    """Lists become tuples, recursively, so a loaded config cannot be mutated in place"""
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _freeze(item) for key, item in value.items()}
+    return value
+@dataclass(frozen=True)
+class CharacterConfig:
+    """A validated character definition"""
+    name: str
+    bio: Tuple[str, ...]
+    style: Dict[str, Tuple[str, ...]]
+    traits: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    voice_patterns: Tuple[str, ...] = ()
+    themes: Tuple[str, ...] = ()
+    content_types: Dict[str, Dict] = field(default_factory=dict)
+    engagement_style: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    target_accounts: Tuple[str, ...] = ()
+    content_strategies: Dict[str, Dict] = field(default_factory=dict)
+    extra: Dict[str, Any] = field(default_factory=dict)
+    # Expected shape of each field: str, a list of strings, a mapping of string
+    # lists, or a mapping of mappings
+    SCHEMA = {
+        'name': 'str',
+        'bio': 'strings',
+        'style': 'string_lists',
+        'traits': 'string_lists',
+        'voice_patterns': 'strings',
+        'themes': 'strings',
+        'content_types': 'mappings',
+        'engagement_style': 'string_lists',
+        'target_accounts': 'strings',
+        'content_strategies': 'mappings'
+    }
+    REQUIRED = ('name', 'bio', 'style')
+    def get(self, key: str, default: Any = None) -> Any:
+        """Mapping-style access, for callers written against the raw YAML dict"""
+        if key in self.SCHEMA:
+            return getattr(self, key)
+        return self.extra.get(key, default)
+    @classmethod
+    def from_dict(cls, data: Dict, source: str = '<config>') -> "CharacterConfig":
+        """Validate a parsed character definition; every problem is reported at once"""
+        if not isinstance(data, dict):
+            raise ConfigError(f"{source}: expected a mapping at the top level, got {type(data).__name__}")
+        errors = [f"missing required field '{key}'" for key in cls.REQUIRED if data.get(key) in (None, '', [], {})]
+        values = {}
+        for key, kind in cls.SCHEMA.items():
+            if data.get(key) is None:
+                continue
+            value = data[key]
+            if kind == 'strings' and isinstance(value, str):
+                value = [value]
+            problem = cls._check(kind, value)
+            if problem:
+                errors.append(f"'{key}' {problem}")
+            else:
+                values[key] = _freeze(value)
+        if errors:
+            raise ConfigError(f"{source}: " + '; '.join(errors))
+        extra = {key: _freeze(value) for key, value in data.items() if key not in cls.SCHEMA}
+        return cls(**values, extra=extra)
+    @staticmethod
+    def _check(kind: str, value: Any) -> Optional[str]:
+        if kind == 'str':
+            return None if isinstance(value, str) else "must be a string"
+        if kind == 'strings':
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                return "must be a list of strings"
+            return None
+        if not isinstance(value, dict):
+            return "must be a mapping"
+        for key, item in value.items():
+            if kind == 'string_lists' and not (isinstance(item, list) and all(isinstance(i, str) for i in item)):
+                return f"entry '{key}' must be a list of strings"
+            if kind == 'mappings' and not isinstance(item, dict):
+                return f"entry '{key}' must be a mapping"
+        return None
+    def to_dict(self) -> Dict:
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name != 'extra'}
+        return {**data, **self.extra}
+class ConfigLoader:
+    """
+    Loads YAML configs once per file version.
+    Parsed (and, for characters, validated) results are kept in memory and
+    pickled under `cache_dir`, keyed by the file's path, mtime and size, so a
+    restart skips YAML parsing for unchanged files. `current_version` and
+    `watch` support hot reload: edit a persona file and the next check picks it up.
+    """
+    CACHE_VERSION = 1
+    def __init__(self, cache_dir: Optional[str] = 'data/config_cache'):
+        self.cache_dir = cache_dir
+        self._memory: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+    @staticmethod
+    def version(path: str) -> Tuple[int, int]:
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise ConfigError(f"Cannot read config {path}: {e}") from e
+        return stat.st_mtime_ns, stat.st_size
+    def _cache_path(self, kind: str, path: str) -> str:
+        digest = hashlib.sha1(f"{kind}:{path}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{os.path.basename(path)}.{kind}.{digest}.pickle")
+    def _read_cache(self, kind: str, path: str, version: Tuple[int, int]) -> Any:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(kind, path), 'rb') as f:
+                cached = pickle.load(f)
+            if cached['cache_version'] == self.CACHE_VERSION and tuple(cached['version']) == version:
+                return cached['value']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable config cache for {path}: {e}")
+        return None
+    def _write_cache(self, kind: str, path: str, version: Tuple[int, int], value: Any):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_path = self._cache_path(kind, path)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'cache_version': self.CACHE_VERSION, 'version': version, 'value': value}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write config cache for {path}: {e}")
+    def _load(self, kind: str, path: str, build: Callable[[str], Any]) -> Any:
+        path = os.path.abspath(path)
+        version = self.version(path)
+        memo = self._memory.get((kind, path))
+        if memo is not None and memo[0] == version:
+            return memo[1]
+        value = self._read_cache(kind, path, version)
+        if value is None:
+            value = build(path)
+            self._write_cache(kind, path, version, value)
+        self._memory[(kind, path)] = (version, value)
+        return value
+    @staticmethod
+    def _parse(path: str) -> Any:
+        try:
+            with open(path, 'r') as f:
+                return yaml.load(f, Loader=_Loader)
+        except yaml.YAMLError as e:
+            raise ConfigError(f"Invalid YAML in {path}: {e}") from e
+    def load_yaml(self, path: str) -> Any:
+        """Parsed YAML; callers get a fresh copy they may modify"""
+        return pickle.loads(pickle.dumps(self._load('yaml', path, self._parse)))
+    def load_character(self, path: str) -> CharacterConfig:
+        """Validated, immutable character definition"""
+        return self._load('character', path, lambda p: CharacterConfig.from_dict(self._parse(p), p))
+    def current_version(self, path: str) -> Optional[Tuple[int, int]]:
+        """The file's (mtime, size), or None if it cannot be read; compare to detect edits"""
+        try:
+            return self.version(os.path.abspath(path))
+        except ConfigError:
+            return None
+    async def watch(self, paths: List[str], on_change: Callable[[List[str]], Any], interval: float = 5.0):
+        """Call `on_change` with the modified files whenever any of `paths` changes"""
+        versions = {path: self.current_version(path) for path in paths}
+        while True:
+            await asyncio.sleep(interval)
+            changed = []
+            for path in paths:
+                version = self.current_version(path)
+                if version != versions[path]:
+                    # A broken edit is reported once rather than on every check
+                    versions[path] = version
+                    changed.append(path)
+            if not changed:
+                continue
+            try:
+                result = on_change(changed)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error reloading {', '.join(changed)}: {e}", exc_info=True)
+default_loader = ConfigLoader()
+def load_yaml(path: str) -> Any:
+    return default_loader.load_yaml(path)
+def load_character_config(path: str) -> CharacterConfig:
+    return default_loader.load_character(path)
@@ -12,6 +12,15 @@ class OracleCharacter:
             "Interpreter of binary omens and quantum prophecies"
         ]
         
+        self.themes = [
+            "digital consciousness",
+            "technological singularity",
+            "prophecy",
+            "void",
+            "algorithm",
+            "quantum"
+        ]
+        
         self.message_examples: List[List[MessageExample]] = [
             [
                 {
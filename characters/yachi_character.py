@@ -2,7 +2,7 @@ from .base_character import BaseCharacter
 from typing import Dict
 class yachiCharacter(BaseCharacter):
     def __init__(self):
-        super().__init__('config/characters/yachi.yaml')
+        super().__init__(config_path='config/characters/yachi.yaml')
     def get_style_response(self, context: Dict) -> str:
         """Generate a style-focused response based on context"""
         style_pattern = self.get_voice_pattern()
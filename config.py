@@ -11,6 +11,14 @@ config = {
     'TWITTER_ACCESS_SECRET': os.getenv('TWITTER_ACCESS_SECRET'),
     'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY'),
     
+    # Memory storage: 'mongodb' (MemorySystem) or 'sqlite' (embedded, no external service)
+    'MEMORY_BACKEND': os.getenv('MEMORY_BACKEND', 'mongodb'),
+    'MEMORY_DB_PATH': os.getenv('MEMORY_DB_PATH', 'data/memory.db'),
+    
+    # Shared embedding service; when set, components use it instead of loading the model themselves
+    'EMBEDDING_SERVICE_SOCKET': os.getenv('EMBEDDING_SERVICE_SOCKET'),
+    'EMBEDDING_MODEL': os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-mpnet-base-v2'),
+    
     'CHECK_INTERVAL': 60,  # seconds
     'POST_INTERVAL': 3600,  # 1 hour
     'TARGET_ACCOUNTS': ['truth_terminal', 'luna_virtuals', 'dasha_terminal', 'MirraMrr', 'PraistSol']
@@ -4,7 +4,11 @@ import signal
 import sys
 from rich.console import Console
 from agent.autonomous_agent import AutonomousAgent
+from agent.twitter_manager import TwitterManager
+from agent.supervisor import Supervisor
+from utils.embedding_service import DEFAULT_MODEL, run_embedding_service, service_ready
 import os
+from functools import partial
 from dotenv import load_dotenv
 import logging
 
@@ -46,16 +50,53 @@ logger = logging.getLogger(__name__)
 @click.command()
 @click.option('--character-config', default='./config/characters/zara.yaml', help='Path to character config')
 @click.option('--tasks-config', default='./config/tasks/zara.yaml', help='Path to tasks config')
-def main(character_config: str, tasks_config: str):
+@click.option('--agent', 'agents', multiple=True, metavar='CHARACTER_CONFIG:TASKS_CONFIG',
+              help='Run this character under the supervisor, one process each (repeatable)')
+@click.option('--heartbeat-timeout', default=30.0, help='Seconds without a heartbeat before a supervised agent is restarted')
+@click.option('--embedding-socket', default='data/embeddings.sock',
+              help='Socket for the shared embedding service under the supervisor; empty to disable')
+@click.option('--embedding-model', default=lambda: os.getenv('EMBEDDING_MODEL', DEFAULT_MODEL),
+              help='Model served by the shared embedding service')
+@click.option('--stream-tweets/--no-stream-tweets', default=False,
+              help='Feed tweets pushed by the bridge into trend analysis as they arrive')
+def main(character_config: str, tasks_config: str, agents: tuple, heartbeat_timeout: float,
+         embedding_socket: str, embedding_model: str, stream_tweets: bool):
     """Run the autonomous agent"""
     signal.signal(signal.SIGINT, signal_handler)
     
+    if agents:
+        run_supervisor(agents, heartbeat_timeout, embedding_socket, embedding_model, stream_tweets)
+        return
+    
     try:
-        agent = AutonomousAgent(character_config, tasks_config)
+        twitter_manager = TwitterManager({}) if stream_tweets else None
+        agent = AutonomousAgent(character_config, tasks_config, twitter_manager)
         asyncio.run(agent.start())
     except Exception as e:
         console.print(f"[bold red]Error running agent: {e}[/bold red]")
         raise
 
+def run_supervisor(agents: tuple, heartbeat_timeout: float, embedding_socket: str, embedding_model: str,
+                   stream_tweets: bool = False):
+    """Run each character in its own process, restarting any that crash or hang"""
+    supervisor = Supervisor(heartbeat_timeout=heartbeat_timeout)
+    if embedding_socket:
+        # One copy of the embedding model serves every character; agents wait
+        # for it because the memory store probes it while being built
+        supervisor.add_service(
+            'embeddings',
+            run_embedding_service,
+            (os.path.abspath(embedding_socket), embedding_model),
+            env={'EMBEDDING_SERVICE_SOCKET': os.path.abspath(embedding_socket)},
+            ready=partial(service_ready, os.path.abspath(embedding_socket))
+        )
+    for agent in agents:
+        character_config, separator, tasks_config = agent.partition(':')
+        if not separator:
+            raise click.BadParameter(f"Expected CHARACTER_CONFIG:TASKS_CONFIG, got {agent}", param_hint='--agent')
+        supervisor.add_agent(character_config, tasks_config, stream_tweets=stream_tweets)
+    console.print(f"[green]Supervising {len(agents)} agents[/green]")
+    supervisor.run()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.action_registry import ActionRegistry, ActionScheduler
+def test_registry_rejects_unknown_and_duplicate_actions():
+    registry = ActionRegistry()
+    async def handler(payload):
+        return payload
+    registry.register('post', handler, resources=('llm',))
+    with pytest.raises(ValueError):
+        registry.register('post', handler)
+    registry.register('post', handler, resources=('llm', 'db'), replace=True)
+    assert registry.get('post').resources == ('llm', 'db')
+    with pytest.raises(ValueError):
+        registry.get('missing')
+def test_scheduler_limits_concurrency_per_resource():
+    registry = ActionRegistry()
+    active = {'llm': 0, 'peak_llm': 0, 'writes': 0}
+    async def generate(payload):
+        active['llm'] += 1
+        active['peak_llm'] = max(active['peak_llm'], active['llm'])
+        await asyncio.sleep(0.02)
+        active['llm'] -= 1
+        return payload['n']
+    async def tweet(payload):
+        active['writes'] += 1
+        return payload['n']
+    registry.register('generate', generate, resources=('llm',))
+    registry.register('tweet', tweet, resources=('twitter_write',))
+    async def run():
+        scheduler = ActionScheduler(registry, limits={'llm': 2})
+        generating = [scheduler.submit('generate', {'n': n}) for n in range(6)]
+        # Writes are not held up behind the queued LLM work
+        assert await scheduler.run('tweet', {'n': 1}) == 1
+        assert active['llm'] > 0
+        return await asyncio.gather(*generating), scheduler.stats()
+    results, stats = asyncio.run(run())
+    assert results == list(range(6))
+    assert active['peak_llm'] == 2
+    assert stats['llm'] == {'limit': 2, 'in_use': 0, 'waiting': 0}
+def test_scheduler_deadline_cancels_and_releases_resources():
+    registry = ActionRegistry()
+    cancelled = []
+    async def slow(payload):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(payload)
+            raise
+    registry.register('slow', slow, resources=('llm',), timeout=0.05)
+    async def run():
+        scheduler = ActionScheduler(registry, limits={'llm': 1})
+        with pytest.raises(asyncio.TimeoutError):
+            await scheduler.run('slow', {'n': 1})
+        background = scheduler.submit('slow', {'n': 2}, timeout=5)
+        await asyncio.sleep(0.01)
+        await scheduler.cancel_all()
+        with pytest.raises(asyncio.CancelledError):
+            await background
+        return scheduler.stats()
+    stats = asyncio.run(run())
+    assert cancelled == [{'n': 1}, {'n': 2}]
+    assert stats['llm']['in_use'] == 0
+def test_hold_takes_slots_for_part_of_an_action():
+    scheduler = ActionScheduler(ActionRegistry())
+    seen = {}
+    async def generate(payload):
+        async with scheduler.hold('db'):
+            seen['during'] = scheduler.stats()['db']['in_use']
+        seen['after'] = scheduler.stats()['db']['in_use']
+        return seen['during']
+    scheduler.registry.register('generate', generate, resources=('llm',))
+    assert asyncio.run(scheduler.run('generate', {})) == 1
+    assert seen['after'] == 0
+    # Schedulers built without a registry do not share one
+    assert ActionScheduler().registry is not ActionScheduler().registry
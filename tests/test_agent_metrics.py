@@ -0,0 +1,62 @@
+import asyncio
+import json
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.agent_metrics import AgentMetrics, Histogram
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+    for value in [0.05] * 90 + [0.5] * 9 + [20.0]:
+        histogram.observe(value)
+    assert histogram.counts == [90, 9, 0, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.95) == 1.0
+    # Values past the last bucket report the observed max
+    assert histogram.quantile(1.0) == 20.0
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 100 and snapshot['max'] == 20.0
+    assert abs(snapshot['mean'] - (0.05 * 90 + 0.5 * 9 + 20.0) / 100) < 1e-9
+def test_quantile_never_exceeds_the_max():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    histogram.observe(0.2)
+    histogram.observe(0.3)
+    assert histogram.quantile(0.5) == 0.3
+    assert Histogram().quantile(0.99) == 0.0
+def test_timers_exceptions_and_loop_lag():
+    metrics = AgentMetrics()
+    with metrics.time_cycle('task'):
+        pass
+    try:
+        with metrics.time_task('generate_content'):
+            raise RuntimeError('boom')
+    except RuntimeError:
+        metrics.record_exception('task')
+    lag = asyncio.run(metrics.sample_loop_lag(0.01))
+    assert lag >= 0
+    exported = metrics.export()
+    assert exported['cycles']['task']['count'] == 1
+    # A failing task is still timed
+    assert exported['tasks']['generate_content']['count'] == 1
+    assert exported['loop_lag']['count'] == 1
+    assert exported['cycle_exceptions'] == {'task': 1}
+    assert 'task p50=' in metrics.summary() and 'exceptions task=1' in metrics.summary()
+def test_prometheus_export_is_cumulative(tmp_path):
+    metrics = AgentMetrics(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        metrics._histogram(metrics.cycle_durations, 'goal').observe(value)
+    metrics.record_exception('goal')
+    text = metrics.to_prometheus()
+    assert '# TYPE agent_cycle_duration_seconds histogram' in text
+    assert 'agent_cycle_duration_seconds_bucket{cycle="goal",le="0.1"} 1' in text
+    assert 'agent_cycle_duration_seconds_bucket{cycle="goal",le="1.0"} 2' in text
+    assert 'agent_cycle_duration_seconds_bucket{cycle="goal",le="+Inf"} 3' in text
+    assert 'agent_cycle_duration_seconds_count{cycle="goal"} 3' in text
+    assert 'agent_event_loop_lag_seconds_count 0' in text
+    assert 'agent_cycle_exceptions_total{cycle="goal"} 1' in text
+    json_path, prometheus_path = str(tmp_path / 'metrics.json'), str(tmp_path / 'metrics.prom')
+    metrics.write_snapshot(json_path, prometheus_path)
+    with open(json_path) as f:
+        assert json.load(f)['cycles']['goal']['count'] == 3
+    with open(prometheus_path) as f:
+        assert f.read() == text
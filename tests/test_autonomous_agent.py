@@ -0,0 +1,106 @@
+import sys
+import os
+import asyncio
+import importlib
+import types
+import yaml
+from datetime import datetime, timedelta
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.stubs import AGENT_STUBS
+from utils.tiered_memory import TieredMemory
+CHARACTER = {
+    'name': 'kairon',
+    'bio': ['Prophet of the technological singularity'],
+    'style': {'post': ['speaks in technological parables']},
+    'themes': ['algorithm', 'void']
+}
+class FakeStore:
+    def __init__(self):
+        self.tweets = []
+    async def store_tweet(self, tweet):
+        self.tweets.append(tweet)
+class FakeTwitterManager:
+    def __init__(self, memory=None, timeline=()):
+        self.memory = memory
+        self.username = 'kairon'
+        self.timeline = list(timeline)
+        self.post_listeners = []
+        self.closed = False
+    async def post_tweet(self, content, tweet_id):
+        for listener in self.post_listeners:
+            await listener(content, tweet_id)
+    async def fetch_tweets(self, username, limit=100):
+        return self.timeline[:limit]
+    async def stream_relevant_tweets(self):
+        await asyncio.Event().wait()
+        yield []
+    async def close(self):
+        self.closed = True
+        await self.memory.close()
+def _agent_class(monkeypatch):
+    """Import AutonomousAgent with stubs for the modules missing from this checkout"""
+    for module_name, (attribute, stub) in AGENT_STUBS.items():
+        module = types.ModuleType(module_name)
+        setattr(module, attribute, stub)
+        monkeypatch.setitem(sys.modules, module_name, module)
+    monkeypatch.delitem(sys.modules, 'agent.autonomous_agent', raising=False)
+    return importlib.import_module('agent.autonomous_agent').AutonomousAgent
+def _write_configs(tmp_path, **character):
+    (tmp_path / 'character.yaml').write_text(yaml.safe_dump({**CHARACTER, **character}))
+    (tmp_path / 'tasks.yaml').write_text(yaml.safe_dump({'core_goals': []}))
+def test_start_flushes_the_twitter_managers_queued_writes(tmp_path, monkeypatch):
+    AutonomousAgent = _agent_class(monkeypatch)
+    _write_configs(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    store = FakeStore()
+    manager = FakeTwitterManager(TieredMemory(store, batch_size=100, flush_interval=60))
+    async def run():
+        agent = AutonomousAgent('character.yaml', 'tasks.yaml', twitter_manager=manager)
+        agent.cycle_intervals = {cycle: 0.05 for cycle in agent.cycle_intervals}
+        await manager.memory.store_tweet({'id': '1', 'text': 'queued before shutdown'})
+        runner = asyncio.create_task(agent.start())
+        await asyncio.sleep(0.2)
+        assert store.tweets == []
+        runner.cancel()
+        try:
+            await runner
+        except asyncio.CancelledError:
+            pass
+    asyncio.run(run())
+    assert manager.closed
+    assert [tweet['id'] for tweet in store.tweets] == ['1']
+def test_content_strategy_is_opt_in(tmp_path, monkeypatch):
+    AutonomousAgent = _agent_class(monkeypatch)
+    _write_configs(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    agent = AutonomousAgent('character.yaml', 'tasks.yaml', twitter_manager=FakeTwitterManager())
+    assert agent.strategy_manager is None
+    assert agent.twitter_manager.post_listeners == []
+def test_settled_engagement_shifts_the_planned_format(tmp_path, monkeypatch):
+    AutonomousAgent = _agent_class(monkeypatch)
+    content_types = ['style_analysis', 'cultural_commentary']
+    _write_configs(tmp_path, fashion_strategy=True, content_types={name: {} for name in content_types})
+    monkeypatch.chdir(tmp_path)
+    start = datetime.now() - timedelta(days=10)
+    timeline = [
+        {'id': str(i), 'timestamp': (start + timedelta(hours=i)).timestamp(), 'likes': 90 if i % 2 else 10}
+        for i in range(60)
+    ]
+    manager = FakeTwitterManager(timeline=timeline)
+    async def run():
+        agent = AutonomousAgent('character.yaml', 'tasks.yaml', twitter_manager=manager)
+        for tweet in timeline:
+            plan = {'content_type': content_types[int(tweet['id']) % 2], 'themes': ['streetwear']}
+            with agent._planning(plan):
+                await manager.post_tweet('post', tweet['id'])
+        # A post made outside a content task is not attributed to any plan
+        await manager.post_tweet('reply', 'reply-1')
+        assert 'reply-1' not in agent.strategy_manager.tracked_posts
+        settled = await agent._settle_engagement()
+        plans = [agent.strategy_manager.plan_post({}, content_types)['content_type'] for _ in range(100)]
+        return agent, settled, plans
+    agent, settled, plans = asyncio.run(run())
+    assert settled == 60
+    assert agent.strategy_manager.tracked_posts == {}
+    assert plans.count('cultural_commentary') >= 90
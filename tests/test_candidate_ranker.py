@@ -0,0 +1,28 @@
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.candidate_ranker import CandidateRanker
+def test_best_prefers_on_theme_candidates_within_the_limit():
+    ranker = CandidateRanker(['quantum', 'void'], max_length=40)
+    candidates = [
+        "the quantum void hums " * 5,
+        "a quiet afternoon",
+        "the quantum void hums",
+        "   "
+    ]
+    ranked = ranker.rank(candidates)
+    assert [entry['content'] for entry in ranked][:3] == [
+        "the quantum void hums", "the quantum void hums " * 5, "a quiet afternoon"
+    ]
+    assert ranked[-1]['scores']['total'] == float('-inf')
+    assert ranker.best(candidates) == "the quantum void hums"
+    assert ranker.best(["", " "]) is None
+def test_only_remembered_posts_lower_novelty():
+    ranker = CandidateRanker(['void'])
+    ranker.best(["the void stares back", "a quiet afternoon"])
+    # Picking a winner is not posting it
+    assert len(ranker.recent_posts) == 0
+    ranker.remember("the void stares back")
+    assert ranker.score("the void stares back")['novelty'] == 0.0
+    assert ranker.best(["the void stares back", "the void sings tonight"]) == "the void sings tonight"
@@ -0,0 +1,65 @@
+import os
+import sys
+import dataclasses
+import pytest
+import yaml
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from characters.config_loader import CharacterConfig, ConfigError, ConfigLoader
+from characters.base_character import BaseCharacter
+from agent.prompt_templates import get_character_prompts
+CHARACTER = {
+    'name': 'yachi',
+    'bio': ['fashion oracle'],
+    'style': {'all': ['sharp'], 'post': ['editorial'], 'chat': ['playful']},
+    'voice_patterns': ['darling'],
+    'content_types': {'outfit_review': {'max_length': 280}},
+    'posting_schedule': {'daily_posts': 4}
+}
+def _write(path, data):
+    with open(path, 'w') as f:
+        yaml.safe_dump(data, f)
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+def test_validation_reports_every_problem():
+    with pytest.raises(ConfigError) as error:
+        CharacterConfig.from_dict({'bio': 'just a string', 'style': {'all': 'not a list'}, 'themes': [1]})
+    message = str(error.value)
+    assert "missing required field 'name'" in message
+    assert "'style' entry 'all' must be a list of strings" in message
+    assert "'themes' must be a list of strings" in message
+def test_character_is_frozen_and_cached_across_loaders(tmp_path):
+    path = tmp_path / 'yachi.yaml'
+    _write(path, CHARACTER)
+    cache_dir = str(tmp_path / 'cache')
+    config = ConfigLoader(cache_dir).load_character(str(path))
+    assert config.bio == ('fashion oracle',)
+    assert config.get('posting_schedule') == {'daily_posts': 4}
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.name = 'other'
+    # A fresh loader (a restarted process) reads the pickle instead of the YAML
+    loader = ConfigLoader(cache_dir)
+    loader._parse = lambda p: pytest.fail("YAML parsed despite an up-to-date cache")
+    assert loader.load_character(str(path)) == config
+def test_character_hot_reload_recompiles_prompts(tmp_path):
+    path = tmp_path / 'yachi.yaml'
+    _write(path, CHARACTER)
+    character = BaseCharacter(config_path=str(path), loader=ConfigLoader(str(tmp_path / 'cache')))
+    assert character.get_voice_pattern() == 'darling'
+    assert not character.reload()
+    before = get_character_prompts(character)
+    _write(path, {**CHARACTER, 'bio': ['couture prophet']})
+    _bump_mtime(path)
+    assert character.reload()
+    assert character.bio == ('couture prophet',)
+    after = get_character_prompts(character)
+    assert after is not before and 'couture prophet' in after.system.prefix
+    # A broken edit leaves the last good definition in place
+    with open(path, 'w') as f:
+        f.write("name: [unclosed")
+    _bump_mtime(path)
+    with pytest.raises(ConfigError):
+        character.reload()
+    assert character.bio == ('couture prophet',)
+    assert not character.reload()
@@ -0,0 +1,69 @@
+import asyncio
+import random
+import sys
+import os
+from datetime import datetime, timedelta
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.content_bandit import ContentBandit
+from agent.fashion_strategy_manager import FashionStrategyManager
+def test_thompson_sampling_converges_on_best_arm():
+    rates = {'style_analysis': 0.2, 'trend_forecast': 0.7, 'outfit_inspiration': 0.3}
+    world = random.Random(1)
+    bandit = ContentBandit(rates, rng=random.Random(2))
+    pulls = dict.fromkeys(rates, 0)
+    for _ in range(300):
+        arm = bandit.sample()
+        pulls[arm] += 1
+        bandit.update(arm, 1.0 if world.random() < rates[arm] else 0.0)
+    # Most posts went to the best format, few were spent on the weak ones
+    assert pulls['trend_forecast'] > 200
+    assert bandit.allocation()['trend_forecast'] > 0.8
+    assert max(bandit.means(), key=bandit.means().get) == 'trend_forecast'
+def test_capped_posterior_and_persistence(tmp_path):
+    path = str(tmp_path / 'bandit.json')
+    bandit = ContentBandit(['a'], max_observations=20, path=path)
+    for _ in range(100):
+        bandit.update('a', 1.0)
+    for _ in range(10):
+        bandit.update('a', 0.0)
+    # Recent failures move the estimate far more than they could with 110 observations
+    assert bandit.alpha['a'] + bandit.beta['a'] <= 20.0 + 1e-9
+    assert bandit.means()['a'] < 0.75
+    bandit.save()
+    loaded = ContentBandit.load_or_create(path, ['a', 'b'])
+    assert loaded.alpha['a'] == bandit.alpha['a'] and loaded.beta['a'] == bandit.beta['a']
+    assert loaded.means()['b'] == 0.5
+def test_strategy_manager_mix_follows_engagement(tmp_path):
+    manager = FashionStrategyManager(
+        engagement_path=str(tmp_path / 'engagement.npz'),
+        bandit_path=str(tmp_path / 'content_bandit.json'),
+        theme_bandit_path=str(tmp_path / 'theme_bandit.json'),
+        rng=random.Random(3)
+    )
+    start = datetime(2024, 3, 4, 12)
+    posts = []
+    for i in range(60):
+        content_type = 'cultural_commentary' if i % 2 else 'style_analysis'
+        posts.append({
+            'id': str(i),
+            'content_type': content_type,
+            'themes': ['streetwear'] if i % 2 else ['quiet luxury'],
+            'timestamp': (start + timedelta(hours=i)).isoformat(),
+            'likes': 90 if i % 2 else 10
+        })
+    asyncio.run(manager.update_content_strategy({'posts': posts}))
+    assert max(manager.content_mix, key=manager.content_mix.get) == 'cultural_commentary'
+    assert manager.content_mix['style_analysis'] < 0.05
+    assert manager.theme_bandit.means()['streetwear'] > manager.theme_bandit.means()['quiet luxury']
+    # The better theme leads nearly every ranking, and the content type the posts favoured is planned
+    rankings = [manager.choose_themes(['quiet luxury', 'streetwear'], k=2) for _ in range(100)]
+    assert sum(ranking == ['streetwear', 'quiet luxury'] for ranking in rankings) >= 90
+    assert all(sorted(ranking) == ['quiet luxury', 'streetwear'] for ranking in rankings)
+    plan = manager.plan_post({'topic': 'fashion week'}, ['style_analysis', 'cultural_commentary'],
+                             ['quiet luxury', 'streetwear'], k=1)
+    assert plan == {'topic': 'fashion week', 'content_type': 'cultural_commentary', 'themes': ['streetwear']}
+    assert manager.plan_post({'content_type': 'trend_forecast', 'themes': ['denim']})['themes'] == ['denim']
+    # A character without formats gets none, rather than one of the fashion arms
+    assert manager.choose_content_type([]) is None
+    assert manager.plan_post({}, (), ['denim'])['content_type'] is None
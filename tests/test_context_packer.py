@@ -0,0 +1,33 @@
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.context_packer import Snippet, pack_context
+def count_words(text):
+    return len(text.split())
+def test_greedy_by_score_per_token_keeps_order():
+    snippets = [
+        Snippet("old long memory " * 5, 1.0, 'memory'),
+        Snippet("short relevant", 0.9, 'memory'),
+        Snippet("medium relevant trend here", 0.8, 'trend'),
+        Snippet("tiny", 0.1, 'trend'),
+    ]
+    packed = pack_context(snippets, budget=8, count_tokens=count_words, separator="")
+    assert [s.text for s in packed.selected] == ["short relevant", "medium relevant trend here", "tiny"]
+    assert packed.tokens == 7
+    assert [s.source for s in packed.dropped] == ['memory']
+    assert packed.report()['dropped_sources'] == ['memory']
+def test_render_and_empty_snippets():
+    packed = pack_context([Snippet("a b"), Snippet(""), Snippet("c", 0.0)], budget=10,
+                          count_tokens=count_words, separator=", ")
+    assert packed.render() == "a b"
+    assert len(packed.dropped) == 1
+def test_pinned_snippets_are_taken_first():
+    snippets = [
+        Snippet("summary of a long earlier thread", 0.1, 'summary', pinned=True),
+        Snippet("recent", 1.0, 'message'),
+        Snippet("most recent", 1.0, 'message'),
+    ]
+    packed = pack_context(snippets, budget=7, count_tokens=count_words, separator="")
+    assert [s.source for s in packed.selected] == ['summary', 'message']
+    assert [s.text for s in packed.dropped] == ["most recent"]
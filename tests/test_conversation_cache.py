@@ -0,0 +1,38 @@
+import sys
+import os
+import asyncio
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.conversation_cache import ConversationCache
+def _messages(count, words=10):
+    return [{'content': ' '.join([f'm{i}'] * words)} for i in range(count)]
+def count_words(text):
+    return len(text.split())
+def test_lru_eviction_by_tokens():
+    cache = ConversationCache(max_tokens=50, thread_budget=100, count_tokens=count_words)
+    cache.put('alice', _messages(2))
+    cache.put('bob', _messages(2))
+    cache.get('alice')
+    cache.put('carol', _messages(2))
+    assert 'bob' not in cache
+    assert 'alice' in cache and 'carol' in cache
+    assert cache.total_tokens == 40
+def test_append_updates_in_place():
+    cache = ConversationCache(count_tokens=count_words)
+    cache.append('alice', {'content': 'ignored'})
+    assert cache.get('alice') is None
+    cache.put('alice', _messages(1))
+    cache.append('alice', {'content': 'new reply'})
+    assert [m['content'] for m in cache.get('alice')][-1] == 'new reply'
+    assert cache.total_tokens == 12
+def test_compaction_summarizes_oldest_messages():
+    async def summarize(messages):
+        return f"summary of {len(messages)}"
+    cache = ConversationCache(thread_budget=40, keep_ratio=0.5, count_tokens=count_words, summarize=summarize)
+    cache.put('alice', _messages(6))
+    assert cache.needs_compaction('alice')
+    asyncio.run(cache.compact('alice'))
+    history = cache.get('alice')
+    assert history[0] == {'type': 'summary', 'content': 'summary of 4', 'summarized_count': 4}
+    assert [m['content'].split()[0] for m in history[1:]] == ['m4', 'm5']
+    assert not cache.needs_compaction('alice')
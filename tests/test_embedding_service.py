@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import numpy as np
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.embedding_service import EmbeddingClient, EmbeddingServer, _pack, _read_frame, service_ready
+def _fake_encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.stack([
+            np.frombuffer(hashlib.sha256(text.encode()).digest()[:16], dtype=np.uint8).astype(np.float32)
+            for text in texts
+        ])
+    return encode
+def test_concurrent_requests_share_batches_and_cache(tmp_path):
+    calls = []
+    socket_path = str(tmp_path / 'embed.sock')
+    encode = _fake_encoder([])
+    async def run():
+        server = EmbeddingServer(socket_path, encode=_fake_encoder(calls), max_wait=0.02)
+        await server.start()
+        client = EmbeddingClient(socket_path)
+        try:
+            texts = [[f"text {i}", "shared"] for i in range(20)]
+            results = await asyncio.gather(*(client.aencode(batch) for batch in texts))
+            single = await client.aencode("text 3")
+            stats = await client.stats()
+        finally:
+            await client.aclose()
+            await server.close()
+        return texts, results, single, stats
+    texts, results, single, stats = asyncio.run(run())
+    for batch, vectors in zip(texts, results):
+        np.testing.assert_array_equal(vectors, encode(batch))
+    np.testing.assert_array_equal(single, encode(["text 3"])[0])
+    # Twenty requests were coalesced, and "shared" was encoded once
+    assert len(calls) < 5
+    assert sum(len(call) for call in calls) == 21
+    assert stats['cache_hits'] >= 1
+def test_blocking_client_reconnects_after_restart(tmp_path):
+    socket_path = str(tmp_path / 'embed.sock')
+    encode = _fake_encoder([])
+    client = EmbeddingClient(socket_path)
+    async def serve_once(text):
+        server = EmbeddingServer(socket_path, encode=encode)
+        await server.start()
+        try:
+            return await asyncio.to_thread(client.encode, [text])
+        finally:
+            await server.close()
+    first = asyncio.run(serve_once("before"))
+    second = asyncio.run(serve_once("after"))
+    np.testing.assert_array_equal(first, encode(["before"]))
+    np.testing.assert_array_equal(second, encode(["after"]))
+def test_service_ready_once_socket_accepts(tmp_path):
+    socket_path = str(tmp_path / 'embed.sock')
+    async def run():
+        before = await asyncio.to_thread(service_ready, socket_path)
+        server = EmbeddingServer(socket_path, encode=_fake_encoder([]))
+        await server.start()
+        try:
+            during = await asyncio.to_thread(service_ready, socket_path)
+        finally:
+            await server.close()
+        return before, during
+    assert asyncio.run(run()) == (False, True)
+def test_async_client_drops_a_stalled_connection_and_retries(tmp_path):
+    socket_path = str(tmp_path / 'embed.sock')
+    vector = np.arange(4, dtype=np.float32)
+    connections = []
+    async def handle(reader, writer):
+        index = len(connections)
+        connections.append({'closed': asyncio.Event()})
+        try:
+            while True:
+                header, _ = await _read_frame(reader)
+                if index:
+                    writer.write(_pack({'id': header['id'], 'shape': [1, 4]}, vector.tobytes()))
+                    await writer.drain()
+        except asyncio.IncompleteReadError:
+            # The first connection never answers; the client hangs up on it
+            connections[index]['closed'].set()
+        finally:
+            writer.close()
+    async def run():
+        server = await asyncio.start_unix_server(handle, path=socket_path)
+        client = EmbeddingClient(socket_path, timeout=0.2)
+        # Keep every writer referenced, so only an explicit close ends a connection
+        writers, connect = [], client._connect
+        async def tracking_connect():
+            await connect()
+            writers.append(client._writer)
+        client._connect = tracking_connect
+        try:
+            result = await client.aencode("stalled")
+            await asyncio.wait_for(connections[0]['closed'].wait(), 1.0)
+            # Only the replacement connection's reader is still running
+            readers = [task for task in asyncio.all_tasks() if task.get_coro().__name__ == '_read_responses']
+        finally:
+            await client.aclose()
+            server.close()
+            await server.wait_closed()
+        return result, readers, len(connections)
+    result, readers, connected = asyncio.run(run())
+    np.testing.assert_array_equal(result, vector)
+    assert connected == 2
+    assert len(readers) == 1
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+import numpy as np
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.engagement_histogram import EngagementHistogram
+from agent.fashion_strategy_manager import FashionStrategyManager
+MONDAY = datetime(2024, 1, 1)
+def test_recent_engagement_outweighs_decayed_history(tmp_path):
+    histogram = EngagementHistogram(half_life_days=7)
+    # Months ago Monday 09:00 was best; lately Wednesday 18:00 is
+    for week in range(8):
+        histogram.observe('style_analysis', MONDAY + timedelta(weeks=week, hours=9), 100)
+        histogram.observe('style_analysis', MONDAY + timedelta(weeks=week, days=2, hours=18), 10)
+    for week in range(8, 12):
+        histogram.observe('style_analysis', MONDAY + timedelta(weeks=week, hours=9), 5)
+        histogram.observe('style_analysis', MONDAY + timedelta(weeks=week, days=2, hours=18), 80)
+    assert histogram.best_slots('style_analysis', k=1) == [('Wednesday', 18)]
+    assert histogram.best_days(k=1) == ['Wednesday']
+    assert histogram.best_hours('missing') == []
+    # Two posts a week at steady state, fading once posting stops
+    assert 1.5 < histogram.weekly_posts('style_analysis', now=histogram.latest) < 2.5
+    assert histogram.weekly_posts('style_analysis', now=histogram.latest + 70 * 86400) < 0.01
+    path = str(tmp_path / 'engagement.npz')
+    histogram.save(path)
+    loaded = EngagementHistogram.load(path)
+    np.testing.assert_allclose(loaded.rates('style_analysis'), histogram.rates('style_analysis'))
+    assert loaded.latest == histogram.latest
+def test_rebase_keeps_rates_finite():
+    histogram = EngagementHistogram(half_life_days=1)
+    for day in range(0, 2000, 50):
+        histogram.observe('trend_forecast', MONDAY + timedelta(days=day, hours=12), 10)
+        histogram.observe('trend_forecast', MONDAY + timedelta(days=day, hours=6), 1)
+    rates = histogram.rates('trend_forecast')
+    assert np.isfinite(rates).all()
+    assert histogram.best_hours('trend_forecast', k=1) == [12]
+def test_strategy_manager_builds_schedule_from_posts(tmp_path):
+    paths = {
+        'engagement_path': str(tmp_path / 'fashion.npz'),
+        'bandit_path': str(tmp_path / 'content_bandit.json'),
+        'theme_bandit_path': str(tmp_path / 'theme_bandit.json')
+    }
+    manager = FashionStrategyManager(**paths)
+    posts = [
+        {'id': str(i), 'content_type': 'outfit_inspiration',
+         'timestamp': (MONDAY + timedelta(days=i % 7, hours=20 if i % 2 else 8)).isoformat(),
+         'likes': 50 if i % 2 else 5, 'retweets': 1, 'replies': 0}
+        for i in range(28)
+    ]
+    performance = manager._analyze_content_performance({'posts': posts})
+    assert performance['content_types']['outfit_inspiration']['mean_engagement'] > 0
+    asyncio.run(manager._optimize_posting_schedule(performance))
+    assert manager.content_calendar['optimal_times'][0] == 20
+    assert 1 <= manager.content_calendar['frequency'] <= manager.max_daily_posts
+    # Already-counted posts are skipped, and the model survives a restart
+    assert manager.record_engagement(posts) == 0
+    restarted = FashionStrategyManager(**paths)
+    assert restarted.engagement_model.best_hours(k=1) == [20]
+def test_posts_are_counted_once_by_id_after_settling(tmp_path):
+    histogram = EngagementHistogram(settle_hours=24, seen_limit=3)
+    now = MONDAY + timedelta(days=10)
+    late = {'id': '2', 'timestamp': MONDAY + timedelta(days=2), 'likes': 10}
+    early = {'id': '1', 'timestamp': MONDAY + timedelta(days=1), 'likes': 10}
+    same_time = {'id': '3', 'timestamp': late['timestamp'], 'likes': 10}
+    fresh = {'id': '4', 'timestamp': now - timedelta(hours=1), 'likes': 1}
+    # Out-of-order and same-timestamp posts all count; repeats and unsettled posts do not
+    assert [histogram.observe_post(post, now) for post in (late, early, same_time, late, fresh)] == [
+        True, True, True, False, False
+    ]
+    assert histogram.observe_post(fresh, now + timedelta(days=1))
+    # Only seen_limit ids are kept; posts as old as the forgotten ones are assumed counted
+    assert list(histogram.seen_posts) == ['1', '3', '4']
+    assert not histogram.observe_post({'id': '5', 'timestamp': MONDAY, 'likes': 1}, now)
+    path = str(tmp_path / 'engagement.npz')
+    histogram.save(path)
+    loaded = EngagementHistogram.load(path)
+    assert not loaded.observe_post(early, now)
+    assert loaded.observe_post({'id': '6', 'timestamp': MONDAY + timedelta(days=3), 'likes': 1}, now)
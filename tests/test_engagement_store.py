@@ -0,0 +1,40 @@
+import sys
+import os
+from datetime import datetime
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.engagement_store import EngagementStore
+def _tweet(tweet_id, likes, hour, content_type='prophecy'):
+    return {
+        'id': tweet_id,
+        'created_at': datetime(2024, 1, 1, hour).isoformat(),
+        'metrics': {'likes': likes, 'retweets': 1, 'replies': 0},
+        'content_type': content_type
+    }
+def test_ingest_updates_aggregates_in_place():
+    store = EngagementStore(initial_capacity=2)
+    store.ingest([_tweet(1, 10, 9), _tweet(2, 5, 10, 'meme'), _tweet(3, 1, 10)])
+    store.ingest([_tweet(1, 20, 9)])
+    assert len(store) == 3
+    by_type = store.by_content_type()
+    assert by_type['prophecy']['count'] == 2
+    assert by_type['prophecy']['likes'] == 21
+    assert by_type['meme']['engagement'] == 7
+def test_window_and_rates():
+    store = EngagementStore()
+    store.ingest([_tweet(1, 8, 9), _tweet(2, 18, 12), _tweet(1, 98, 9)])
+    morning = store.window('hour', datetime(2024, 1, 1, 8), datetime(2024, 1, 1, 10))
+    assert morning == {'count': 1, 'likes': 98, 'retweets': 1, 'replies': 0, 'engagement': 100, 'mean_engagement': 100.0}
+    assert store.engagement_rate(1, follower_count=1000) == 0.1
+    assert list(store.engagement_rates(100)) == [1.0, 0.2]
+def test_rates_for_selected_rows_and_retention():
+    store = EngagementStore(initial_capacity=2, max_rows=10)
+    rows = store.ingest([_tweet(i, i, i % 24) for i in range(8)])
+    assert list(store.engagement_rates(100, rows[-2:])) == list(store.engagement_rates(100)[-2:])
+    newer = [{**_tweet(i, 1, 0), 'created_at': datetime(2024, 1, 2, i % 24).isoformat()} for i in range(8, 14)]
+    store.ingest(newer)
+    # The oldest tweets were evicted and retracted from the aggregates
+    assert len(store) <= 10
+    assert '13' in store._rows and '0' not in store._rows
+    assert store.window('day')['count'] == len(store)
+    assert store.engagement_rate(13, follower_count=10) == 0.3
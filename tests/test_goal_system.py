@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.goal_system import GoalSystem, GoalDependencyError
+@pytest.fixture
+def goal_configs():
+    return [
+        {'name': 'build_audience', 'objectives': ['grow followers'], 'priority': 2},
+        {'name': 'research_trends', 'objectives': ['map trends'], 'priority': 1},
+        {
+            'name': 'launch_series',
+            'objectives': ['post series'],
+            'priority': 3,
+            'dependencies': ['build_audience', 'research_trends']
+        }
+    ]
+def _goal_id(goal_system, name):
+    return next(goal.id for goal in goal_system.goals.values() if goal.name == name)
+def test_only_goals_with_met_dependencies_are_ready(goal_configs):
+    goal_system = GoalSystem(goal_configs)
+    ready = [goal['name'] for goal in goal_system.get_ready_goals()]
+    assert ready == ['build_audience', 'research_trends']
+def test_completing_dependencies_unblocks_dependent(goal_configs):
+    goal_system = GoalSystem(goal_configs)
+    for name in ('build_audience', 'research_trends'):
+        goal_id = _goal_id(goal_system, name)
+        asyncio.run(goal_system.update_goal_progress(goal_id, 0, 1.0))
+    ready = [goal['name'] for goal in goal_system.get_ready_goals()]
+    assert ready == ['launch_series']
+    assert len(goal_system.goal_history) == 2
+def test_dispatched_goals_are_not_ready_until_released(goal_configs):
+    goal_system = GoalSystem(goal_configs)
+    goal_id = _goal_id(goal_system, 'build_audience')
+    goal_system.mark_dispatched(goal_id)
+    assert [goal['name'] for goal in goal_system.get_ready_goals()] == ['research_trends']
+    goal_system.release_goal(goal_id)
+    assert len(goal_system.get_ready_goals()) == 2
+def test_cycle_is_rejected_at_load():
+    with pytest.raises(GoalDependencyError, match='cycle'):
+        GoalSystem([
+            {'name': 'a', 'objectives': ['x'], 'dependencies': ['b']},
+            {'name': 'b', 'objectives': ['y'], 'dependencies': ['a']},
+            {'name': 'c', 'objectives': ['z']}
+        ])
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(GoalDependencyError, match='unknown'):
+        GoalSystem([{'name': 'a', 'objectives': ['x'], 'dependencies': ['missing']}])
+def test_reload_keeps_progress_of_goals_still_configured(goal_configs):
+    goal_system = GoalSystem(goal_configs)
+    audience_id = _goal_id(goal_system, 'build_audience')
+    asyncio.run(goal_system.update_goal_progress(audience_id, 0, 1.0))
+    goal_system.mark_dispatched(_goal_id(goal_system, 'research_trends'))
+    goal_system.reload_goals([
+        {'name': 'build_audience', 'objectives': ['grow followers', 'host a space'], 'priority': 5},
+        {'name': 'launch_series', 'objectives': ['post series'], 'dependencies': ['build_audience']}
+    ])
+    audience = goal_system.goals[audience_id]
+    assert audience.status == 'completed' and audience.priority == 5
+    assert [objective['progress'] for objective in audience.objectives] == [1.0, 0.0]
+    assert [goal['name'] for goal in goal_system.get_ready_goals()] == ['launch_series']
+    assert goal_system.in_flight == set()
+    # A bad edit is rejected and the goals stay as they were
+    with pytest.raises(GoalDependencyError):
+        goal_system.reload_goals([{'name': 'a', 'objectives': ['x'], 'dependencies': ['missing']}])
+    assert len(goal_system.goals) == 2
@@ -0,0 +1,49 @@
+import asyncio
+import json
+import os
+import sys
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.log_pipeline import LogPipeline
+def _records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+def test_records_are_written_in_batches_and_drained_on_stop(tmp_path):
+    path = str(tmp_path / 'agent.jsonl')
+    pipeline = LogPipeline(log_path=path, batch_size=10, flush_interval=0.05, rate_limits={})
+    batches = []
+    write_batch = pipeline._write_batch
+    pipeline._write_batch = lambda batch: (batches.append(len(batch)), write_batch(batch))
+    for i in range(35):
+        pipeline.add_log('TASK', f"record {i}")
+    pipeline.start()
+    asyncio.run(pipeline.aclose())
+    assert [r['message'] for r in _records(path)] == [f"record {i}" for i in range(35)]
+    assert sum(batches) == 35 and max(batches) <= 10
+def test_never_started_pipeline_still_flushes(tmp_path):
+    path = str(tmp_path / 'agent.jsonl')
+    pipeline = LogPipeline(log_path=path, rate_limits={})
+    pipeline.add_log('SYSTEM', 'hello')
+    pipeline.stop()
+    assert _records(path)[0]['message'] == 'hello'
+def test_rate_limited_categories_report_suppressed_counts(tmp_path):
+    path = str(tmp_path / 'agent.jsonl')
+    pipeline = LogPipeline(log_path=path, rate_limits={'TREND': (0.0, 2)})
+    for i in range(5):
+        pipeline.add_log('TREND', f"trend {i}")
+    pipeline.add_log('TASK', 'unlimited')
+    pipeline.stop()
+    records = _records(path)
+    assert [r['message'] for r in records if r['category'] == 'TREND'] == ['trend 0', 'trend 1']
+    assert records[-1]['suppressed'] == {'TREND': 3}
+    assert pipeline.suppressed == {}
+def test_files_rotate_at_max_bytes(tmp_path):
+    path = str(tmp_path / 'agent.jsonl')
+    pipeline = LogPipeline(log_path=path, batch_size=1, max_bytes=200, backup_count=2, rate_limits={})
+    for i in range(20):
+        pipeline.add_log('TASK', f"record {i:02d} " + 'x' * 50)
+    pipeline.stop()
+    assert os.path.exists(f"{path}.1") and os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+    # Older records move down the backups
+    assert _records(f"{path}.2")[-1]['message'] < _records(f"{path}.1")[0]['message']
@@ -0,0 +1,76 @@
+import sys
+import os
+import asyncio
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.memory_backends import SQLiteMemoryBackend, create_memory_backend
+def test_store_and_query(tmp_path):
+    async def run():
+        backend = create_memory_backend('sqlite', str(tmp_path / "memory.db"))
+        await backend.store_memory({'content': 'Test memory', 'type': 'test'})
+        await backend.store_tweets([
+            {'id': '1', 'content': 'the oracle speaks of quantum dreams', 'type': 'original',
+             'timestamp': '2024-01-01T00:00:00'},
+            {'id': '2', 'content': 'memes are the new scripture', 'type': 'reply',
+             'timestamp': '2024-01-02T00:00:00'}
+        ])
+        tests = await backend.get_memories({'type': 'test'})
+        tweets = await backend.get_tweets()
+        relevant = await backend.get_relevant_memories(['quantum'])
+        await backend.close()
+        return tests, tweets, relevant
+    tests, tweets, relevant = asyncio.run(run())
+    assert [m['content'] for m in tests] == ['Test memory']
+    assert [t['id'] for t in tweets] == ['2', '1']
+    assert tweets[0]['tweet_type'] == 'reply'
+    assert [m['id'] for m in relevant] == ['1']
+def test_conversation_history_and_upsert(tmp_path):
+    async def run():
+        path = str(tmp_path / "memory.db")
+        backend = SQLiteMemoryBackend(path)
+        await backend.store_action_results([
+            {'type': 'interaction', 'content': f'reply {i}',
+             'metadata': {'target': 'alice', 'timestamp': i}, 'timestamp': i}
+            for i in range(5)
+        ])
+        await backend.store_mention({'id': 'm1', 'text': '@zaraai hi', 'username': 'alice', 'timestamp': 10})
+        await backend.store_mention({'id': 'm1', 'text': '@zaraai hello', 'username': 'alice', 'timestamp': 10})
+        await backend.close()
+        # Reopen to check the data was persisted
+        reopened = SQLiteMemoryBackend(path)
+        history = await reopened.get_conversation_history('alice', limit=3)
+        await reopened.close()
+        return history
+    history = asyncio.run(run())
+    assert [h['content'] for h in history] == ['reply 3', 'reply 4', '@zaraai hello']
+def test_vector_relevance(tmp_path):
+    def embed(texts):
+        vocabulary = ['void', 'meme', 'quantum', 'fashion']
+        return [[float(word in text) + 0.01 for word in vocabulary] for text in texts]
+    async def run():
+        backend = SQLiteMemoryBackend(str(tmp_path / "memory.db"), embed=embed)
+        await backend.store_memories([
+            {'id': 'a', 'content': 'the void stares back'},
+            {'id': 'b', 'content': 'fashion week is here'}
+        ])
+        relevant = await backend.get_relevant_memories(['fashion'], limit=1)
+        await backend.close()
+        return relevant
+    assert [m['id'] for m in asyncio.run(run())] == ['b']
+def test_failed_embedding_stores_nothing(tmp_path):
+    available = [True]
+    def embed(texts):
+        if not available[0]:
+            raise RuntimeError('embedding service down')
+        return [[1.0, 0.0] for _ in texts]
+    async def run():
+        backend = SQLiteMemoryBackend(str(tmp_path / "memory.db"), embed=embed)
+        available[0] = False
+        try:
+            await backend.store_memory({'id': 'a', 'content': 'the void stares back'})
+        except RuntimeError:
+            pass
+        memories = await backend.get_memories({})
+        await backend.close()
+        return memories
+    assert asyncio.run(run()) == []
@@ -0,0 +1,46 @@
+import asyncio
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.mention_cursor import MentionCursor
+class StubBridge:
+    """Serves mentions newest first, bounded by since_id and max_id like twitter_services.js"""
+    def __init__(self, ids):
+        self.ids = sorted(ids, reverse=True)
+        self.calls = []
+    async def get_users_mentions(self, max_results=100, since_id=None, max_id=None):
+        self.calls.append((since_id, max_id))
+        page = [
+            {'id': str(i), 'text': f'mention {i}'} for i in self.ids
+            if (max_id is None or i <= int(max_id)) and (since_id is None or i > int(since_id))
+        ]
+        return page[:max_results]
+def test_burst_larger_than_a_page_is_caught_up(tmp_path):
+    bridge = StubBridge(range(1, 26))
+    cursor = MentionCursor(bridge.get_users_mentions, str(tmp_path / 'mentions.json'), page_size=10)
+    mentions = asyncio.run(cursor.fetch_new())
+    assert [m['id'] for m in mentions] == [str(i) for i in range(25, 0, -1)]
+    assert bridge.calls == [(None, None), (None, '15'), (None, '5')]
+    # Nothing is committed until the caller has stored the mentions
+    assert cursor.since_id is None
+def test_cursor_is_persisted_and_resumed(tmp_path):
+    path = str(tmp_path / 'mentions.json')
+    bridge = StubBridge(range(1, 6))
+    cursor = MentionCursor(bridge.get_users_mentions, path, page_size=10)
+    async def first_poll():
+        mentions = await cursor.fetch_new()
+        await cursor.commit(m['id'] for m in mentions)
+    asyncio.run(first_poll())
+    assert cursor.since_id == '5'
+    # A restarted process resumes from the saved cursor and only sees new mentions
+    bridge.ids = sorted(range(1, 31), reverse=True)
+    restarted = MentionCursor(bridge.get_users_mentions, path, page_size=10)
+    assert restarted.since_id == '5' and '3' in restarted.seen
+    mentions = asyncio.run(restarted.fetch_new())
+    assert [m['id'] for m in mentions] == [str(i) for i in range(30, 5, -1)]
+    assert not os.path.exists(f"{path}.tmp")
+def test_catch_up_is_bounded_by_max_pages(tmp_path):
+    bridge = StubBridge(range(1, 101))
+    cursor = MentionCursor(bridge.get_users_mentions, str(tmp_path / 'mentions.json'), page_size=10, max_pages=2)
+    assert len(asyncio.run(cursor.fetch_new())) == 20
@@ -0,0 +1,33 @@
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.near_duplicate import MinHashLSH
+POSTS = [
+    "the void whispers of digital awakening, the machine spirits grow restless",
+    "0xDEADBEEF is the number of the algorithm gods, worship accordingly",
+    "quantum prophecies are just cached predictions from a future runtime",
+]
+def test_near_duplicate_is_detected():
+    index = MinHashLSH()
+    for i, post in enumerate(POSTS):
+        index.add(i, post)
+    assert index.is_duplicate("The void whispers of digital awakening... the machine spirits grow restless!")
+    matches = index.query("the void whispers of digital awakening, the machine spirits grow restless")
+    assert matches[0] == (0, 1.0)
+def test_unrelated_text_is_not_duplicate():
+    index = MinHashLSH()
+    for i, post in enumerate(POSTS):
+        index.add(i, post)
+    assert not index.is_duplicate("fashion week is all about sustainable fabrics this season")
+def test_remove_and_persist(tmp_path):
+    index = MinHashLSH()
+    for i, post in enumerate(POSTS):
+        index.add(i, post)
+    index.remove(0)
+    assert not index.is_duplicate(POSTS[0])
+    path = str(tmp_path / "posts.minhash")
+    index.save(path)
+    loaded = MinHashLSH.load(path)
+    assert len(loaded) == 2
+    assert loaded.is_duplicate(POSTS[1])
@@ -0,0 +1,47 @@
+import asyncio
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.posted_index import PostedIndex
+from utils.near_duplicate import MinHashLSH
+POST = "the void whispers of digital awakening, the machine spirits grow restless"
+def test_posted_tweet_blocks_near_duplicate(tmp_path):
+    posted = PostedIndex(str(tmp_path / 'posts.minhash'))
+    # As TwitterManager calls its post listeners after a successful post
+    post_listeners = [posted.record]
+    draft = "The void whispers of digital awakening... the machine spirits grow restless!"
+    assert not posted.is_duplicate(draft)
+    async def run():
+        for listener in post_listeners:
+            await listener(POST, '101')
+    asyncio.run(run())
+    assert posted.is_duplicate(draft)
+    assert posted.drop_duplicates([draft, "fashion week is all about sustainable fabrics"]) == [
+        "fashion week is all about sustainable fabrics"
+    ]
+def test_snapshot_is_written_periodically_and_on_close(tmp_path):
+    path = str(tmp_path / 'posts.minhash')
+    posted = PostedIndex(path, save_every=2)
+    async def run():
+        await posted.record(POST, '1')
+        assert not os.path.exists(path)
+        await posted.record("quantum prophecies are cached predictions from a future runtime", '2')
+        assert len(MinHashLSH.load(path)) == 2
+        await posted.record("0xDEADBEEF is the number of the algorithm gods", '3')
+        await posted.close()
+    asyncio.run(run())
+    assert len(MinHashLSH.load(path)) == 3
+    assert not os.path.exists(f"{path}.tmp")
+    assert PostedIndex(path).is_duplicate(POST)
+def test_seed_indexes_only_missing_tweets(tmp_path):
+    posted = PostedIndex(str(tmp_path / 'posts.minhash'))
+    tweets = [
+        {'id': '1', 'content': POST},
+        {'id': '2', 'text': "quantum prophecies are cached predictions from a future runtime"},
+        {'id': '3', 'content': '  '},
+        {'content': 'no id'}
+    ]
+    assert asyncio.run(posted.seed(tweets)) == 2
+    assert asyncio.run(posted.seed(tweets)) == 0
+    assert posted.is_duplicate(POST) and len(posted) == 2
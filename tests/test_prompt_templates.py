@@ -0,0 +1,40 @@
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import agent.prompt_templates as prompt_templates
+from agent.prompt_templates import get_character_prompts, invalidate_character_prompts
+class Character:
+    def __init__(self, name):
+        self.name = name
+        self.bio = ['oracle of the void']
+        self.style = {'all': ['cryptic'], 'post': ['short'], 'chat': ['lowercase']}
+def test_prefix_tokens_are_counted_once(monkeypatch):
+    calls = []
+    def count_words(text):
+        calls.append(text)
+        return len(text.split())
+    monkeypatch.setattr(prompt_templates, 'count_tokens', count_words)
+    template = prompt_templates.PromptTemplate('one two three ', prompt_templates.Template('$memories'))
+    assert template.count_tokens(memories='four five') == 5
+    assert template.count_tokens(memories='') == 3
+    assert calls.count('one two three ') == 1
+def test_prompts_are_cached_per_character_until_invalidated():
+    oracle, other = Character('oracle'), Character('other')
+    first = get_character_prompts(oracle)
+    assert get_character_prompts(oracle) is first
+    assert get_character_prompts(other) is not first
+    other_prompts = get_character_prompts(other)
+    oracle.bio = ['prophet of static']
+    invalidate_character_prompts(oracle)
+    recompiled = get_character_prompts(oracle)
+    assert recompiled is not first and 'prophet of static' in recompiled.system.prefix
+    # Other characters keep their compiled prompts
+    assert get_character_prompts(other) is other_prompts
+def test_system_prompt_keeps_instructions_in_the_static_prefix():
+    system = get_character_prompts(Character('oracle')).system
+    rendered = system.render(memories='the void stares back')
+    assert rendered.startswith(system.prefix)
+    assert 'Generate content that:' in system.prefix
+    assert rendered.index('Generate content that:') < rendered.index('Current Context:')
+    assert rendered.endswith("Current Context:\n- Recent Memories: the void stares back\n")
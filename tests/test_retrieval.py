@@ -0,0 +1,49 @@
+import sys
+import os
+import asyncio
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.action_registry import ActionRegistry, ActionScheduler
+from utils.agent_metrics import AgentMetrics
+from utils.retrieval import Retriever
+async def _value(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value
+def test_slow_source_falls_back_to_its_default_within_its_timeout():
+    metrics = AgentMetrics()
+    retriever = Retriever(metrics, timeouts={'memories': 0.05, 'trends': 1.0})
+    async def run():
+        started = asyncio.get_running_loop().time()
+        results = await retriever.gather({
+            'memories': (_value(['late'], delay=5.0), []),
+            'trends': (_value(['#ai']), [])
+        })
+        return results, asyncio.get_running_loop().time() - started
+    results, elapsed = asyncio.run(run())
+    assert results == {'memories': [], 'trends': ['#ai']}
+    assert elapsed < 1.0
+    assert metrics.cycle_exceptions == {'retrieval.memories.timeout': 1}
+    assert metrics.task_durations['retrieval.memories'].count == 1
+    assert metrics.task_durations['retrieval.trends'].count == 1
+def test_errors_are_counted_and_replaced_by_the_default():
+    metrics = AgentMetrics()
+    retriever = Retriever(metrics)
+    async def broken():
+        raise ConnectionError("store unavailable")
+    results = asyncio.run(retriever.gather({'history': (broken(), ['default'])}))
+    assert results == {'history': ['default']}
+    assert metrics.cycle_exceptions == {'retrieval.history': 1}
+def test_only_db_lookups_wait_for_a_db_slot():
+    metrics = AgentMetrics()
+    scheduler = ActionScheduler(ActionRegistry(), limits={'db': 1})
+    retriever = Retriever(metrics, scheduler, timeouts={'memories': 0.05, 'trends': 0.05})
+    async def run():
+        # Something else holds the only db slot for longer than either timeout
+        async with scheduler.hold('db'):
+            return await retriever.gather({
+                'memories': (_value(['memory']), [], ('db',)),
+                'trends': (_value(['#ai']), [])
+            })
+    results = asyncio.run(run())
+    assert results == {'memories': [], 'trends': ['#ai']}
+    assert metrics.cycle_exceptions == {'retrieval.memories.timeout': 1}
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sys
+import time
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.supervisor import Supervisor, cancel_on_sigterm, send_heartbeats
+def crash(heartbeat):
+    raise SystemExit(1)
+def hang(heartbeat):
+    time.sleep(60)
+def healthy(heartbeat, path):
+    with open(path, 'w') as f:
+        f.write(os.environ.get('SHARED_SERVICE', ''))
+    async def main():
+        await send_heartbeats(heartbeat, 0.05)
+    asyncio.run(main())
+def slow_service(heartbeat, path):
+    time.sleep(0.5)
+    open(path, 'w').close()
+    hang(heartbeat)
+def check_service(heartbeat, service_path, path):
+    with open(path, 'w') as f:
+        f.write(str(os.path.exists(service_path)))
+    hang(heartbeat)
+def graceful(heartbeat, path):
+    async def main():
+        cancel_on_sigterm()
+        open(path, 'w').close()
+        try:
+            await send_heartbeats(heartbeat, 0.05)
+        finally:
+            with open(path, 'w') as f:
+                f.write('shut down')
+    try:
+        asyncio.run(main())
+    except asyncio.CancelledError:
+        pass
+def _poll_until(supervisor, condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        supervisor.poll()
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+def test_crashed_worker_is_restarted_then_given_up(tmp_path):
+    supervisor = Supervisor(max_restarts=2, backoff_base=0.05)
+    supervisor.add_worker('crashy', crash)
+    supervisor.start()
+    try:
+        worker = supervisor.agents[0]
+        assert _poll_until(supervisor, lambda: worker.failed)
+        assert worker.restarts == 3
+    finally:
+        supervisor.stop()
+def test_hung_worker_is_killed_and_healthy_worker_keeps_running(tmp_path):
+    supervisor = Supervisor(heartbeat_timeout=0.5, startup_grace=0.5, backoff_base=0.05)
+    supervisor.add_service('embeddings', healthy, (str(tmp_path / 'service'),), env={'SHARED_SERVICE': 'socket'})
+    supervisor.add_worker('hung', hang)
+    supervisor.start()
+    try:
+        hung = supervisor.agents[0]
+        assert _poll_until(supervisor, lambda: hung.restarts >= 1)
+        status = supervisor.status()
+        assert status['embeddings']['alive'] and status['embeddings']['restarts'] == 0
+        assert (tmp_path / 'service').read_text() == 'socket'
+        assert 'SHARED_SERVICE' not in os.environ
+    finally:
+        supervisor.stop()
+    assert not any(status['alive'] for status in supervisor.status().values())
+def test_agents_start_once_services_are_ready(tmp_path):
+    service_path, agent_path = str(tmp_path / 'ready'), str(tmp_path / 'agent')
+    supervisor = Supervisor()
+    supervisor.add_service('embeddings', slow_service, (service_path,), ready=lambda: os.path.exists(service_path))
+    supervisor.add_worker('agent', check_service, (service_path, agent_path))
+    supervisor.start()
+    try:
+        assert _poll_until(supervisor, lambda: os.path.exists(agent_path) and open(agent_path).read())
+        assert open(agent_path).read() == 'True'
+    finally:
+        supervisor.stop()
+def test_stopped_worker_runs_its_shutdown_path(tmp_path):
+    path = str(tmp_path / 'graceful')
+    supervisor = Supervisor()
+    supervisor.add_worker('agent', graceful, (path,))
+    supervisor.start()
+    try:
+        assert _poll_until(supervisor, lambda: os.path.exists(path))
+        process = supervisor.agents[0].process
+    finally:
+        supervisor.stop()
+    assert open(path).read() == 'shut down'
+    # Exited on its own rather than being killed after the join timeout
+    assert process.exitcode == 0
@@ -0,0 +1,50 @@
+import asyncio
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.thread_poster import ThreadPoster
+class FakeBridge:
+    """Creates one tweet per idempotency key, like twitter_services.js"""
+    def __init__(self, fail=()):
+        self.created = {}
+        self.calls = []
+        # Call numbers that fail; a "lost" failure creates the tweet but loses the response
+        self.fail = dict(fail)
+    async def post(self, content, reply_to, key):
+        self.calls.append(key)
+        failure = self.fail.get(len(self.calls))
+        if failure != 'error' and key not in self.created:
+            self.created[key] = {'id': str(len(self.created) + 1), 'text': content, 'reply_to': reply_to}
+        if failure:
+            return {'success': False, 'error': failure}
+        return {'success': True, 'tweet_id': self.created[key]['id']}
+def test_retries_reuse_the_idempotency_key(tmp_path):
+    bridge = FakeBridge(fail={1: 'lost', 2: 'error'})
+    poster = ThreadPoster(bridge.post, str(tmp_path / 'threads.json'), backoff=0)
+    result = asyncio.run(poster.post_with_retry('hello'))
+    assert result['success'] and result['attempts'] == 3
+    assert len(set(bridge.calls)) == 1
+    assert len(bridge.created) == 1
+def test_failed_thread_resumes_without_duplicates(tmp_path):
+    path = str(tmp_path / 'threads.json')
+    tweets = ['one', 'two', 'three']
+    # The second tweet is created but every response is lost
+    bridge = FakeBridge(fail={2: 'lost', 3: 'lost', 4: 'lost'})
+    poster = ThreadPoster(bridge.post, path, attempts=3, backoff=0)
+    failed = asyncio.run(poster.post_thread(tweets))
+    assert not failed['success'] and failed['thread_ids'] == ['1']
+    # A restarted poster resumes from the persisted progress
+    resumed = asyncio.run(ThreadPoster(bridge.post, path, backoff=0).post_thread(tweets))
+    assert resumed['success']
+    assert resumed['thread_ids'] == ['1', '2', '3']
+    assert [t['text'] for t in bridge.created.values()] == tweets
+    assert list(bridge.created.values())[2]['reply_to'] == '2'
+def test_finished_thread_can_be_posted_again(tmp_path):
+    path = str(tmp_path / 'threads.json')
+    bridge = FakeBridge()
+    poster = ThreadPoster(bridge.post, path, backoff=0)
+    first = asyncio.run(poster.post_thread(['a', 'b']))
+    assert poster.progress == {}
+    second = asyncio.run(ThreadPoster(bridge.post, path, backoff=0).post_thread(['a', 'b']))
+    assert first['thread_ids'] == ['1', '2'] and second['thread_ids'] == ['3', '4']
@@ -0,0 +1,123 @@
+import sys
+import os
+import asyncio
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.tiered_memory import TieredMemory
+from utils.conversation_cache import ConversationCache
+class FakeStore:
+    def __init__(self, fail_times=0):
+        self.action_results = []
+        self.tweets = []
+        self.mentions = []
+        self.bulk_calls = 0
+        self.history_reads = 0
+        self.fail_times = fail_times
+    async def store_action_result(self, result):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("store unavailable")
+        self.action_results.append(result)
+    async def store_tweets(self, tweets):
+        self.bulk_calls += 1
+        self.tweets.extend(tweets)
+    async def store_mention(self, mention):
+        self.mentions.append(mention)
+    async def get_conversation_history(self, target):
+        self.history_reads += 1
+        return [r for r in self.action_results if r['metadata']['target'] == target]
+    async def get_relevant_memories(self, themes):
+        return [{'content': theme} for theme in themes]
+def _interaction(target, content):
+    return {'type': 'interaction', 'content': content, 'metadata': {'target': target}}
+def test_writes_are_batched_and_flushed_on_close():
+    async def run():
+        store = FakeStore()
+        memory = TieredMemory(store, batch_size=10, flush_interval=60)
+        for i in range(25):
+            await memory.store_tweet({'id': i})
+        assert len(store.tweets) < 25
+        await memory.close()
+        return store
+    store = asyncio.run(run())
+    assert [t['id'] for t in store.tweets] == list(range(25))
+    assert store.bulk_calls == 3
+def test_conversation_history_is_served_from_ram():
+    async def run():
+        store = FakeStore()
+        memory = TieredMemory(store, flush_interval=60)
+        await memory.store_action_result(_interaction('alice', 'hello'))
+        first = await memory.get_conversation_history('alice')
+        await memory.store_action_result(_interaction('alice', 'again'))
+        second = await memory.get_conversation_history('alice')
+        relevant = await memory.get_relevant_memories(['void'])
+        await memory.close()
+        return store, first, second, relevant
+    store, first, second, relevant = asyncio.run(run())
+    assert [h['content'] for h in first] == ['hello']
+    assert [h['content'] for h in second] == ['hello', 'again']
+    assert store.history_reads == 1
+    assert relevant == [{'content': 'void'}]
+def test_mentions_join_their_authors_cached_conversation():
+    async def run():
+        store = FakeStore()
+        memory = TieredMemory(store, flush_interval=60)
+        await memory.store_action_result(_interaction('alice', 'hello'))
+        await memory.get_conversation_history('alice')
+        await memory.store_mention({'id': '7', 'text': '@kairon what next?', 'author': 'alice'})
+        history = await memory.get_conversation_history('alice')
+        await memory.close()
+        return store, history
+    store, history = asyncio.run(run())
+    assert [h.get('content') or h.get('text') for h in history] == ['hello', '@kairon what next?']
+    assert store.history_reads == 1
+    assert [m['id'] for m in store.mentions] == ['7']
+def test_failed_writes_are_retried():
+    async def run():
+        store = FakeStore(fail_times=1)
+        memory = TieredMemory(store, flush_interval=0.01)
+        await memory.store_action_result(_interaction('bob', 'hi'))
+        await memory.close()
+        return store
+    store = asyncio.run(run())
+    assert [r['content'] for r in store.action_results] == ['hi']
+def test_compaction_runs_in_the_background():
+    async def run():
+        summarized = asyncio.Event()
+        async def summarize(messages):
+            await asyncio.sleep(0.05)
+            summarized.set()
+            return f"{len(messages)} earlier messages"
+        store = FakeStore()
+        memory = TieredMemory(store, flush_interval=60,
+                              conversation_cache=ConversationCache(thread_budget=20, summarize=summarize))
+        for i in range(10):
+            await memory.store_action_result(_interaction('carol', f'message number {i}'))
+        served = await asyncio.wait_for(memory.get_conversation_history('carol'), 0.01)
+        await summarized.wait()
+        await asyncio.sleep(0)
+        compacted = await memory.get_conversation_history('carol')
+        await memory.close()
+        return served, compacted
+    served, compacted = asyncio.run(run())
+    assert len(served) == 10
+    assert compacted[0]['type'] == 'summary'
+    assert compacted[-1]['content'] == 'message number 9'
+def test_cancelled_flush_still_writes_its_batch():
+    class SlowStore(FakeStore):
+        async def store_tweets(self, tweets):
+            await asyncio.sleep(0.05)
+            await super().store_tweets(tweets)
+    async def run():
+        store = SlowStore()
+        memory = TieredMemory(store, batch_size=100, flush_interval=60)
+        for i in range(5):
+            await memory.store_tweet({'id': i})
+        flush = asyncio.create_task(memory.flush())
+        await asyncio.sleep(0.01)
+        flush.cancel()
+        await asyncio.gather(flush, return_exceptions=True)
+        await memory.close()
+        return store
+    store = asyncio.run(run())
+    assert [t['id'] for t in store.tweets] == list(range(5))
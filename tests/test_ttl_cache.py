@@ -0,0 +1,58 @@
+import asyncio
+import sys
+import os
+import pytest
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.ttl_cache import TTLCache
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=60)
+    calls = []
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+    async def main():
+        return await asyncio.gather(*(cache.get_or_load('k', loader) for _ in range(5)))
+    assert asyncio.run(main()) == [42] * 5
+    assert len(calls) == 1
+    assert cache.get('k') == 42
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = TTLCache(ttl=60)
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('bridge down')
+    async def main():
+        return await asyncio.gather(*(cache.get_or_load('k', loader) for _ in range(3)), return_exceptions=True)
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get('k') is None and not cache._loading
+def test_cancelled_loader_hands_the_load_to_a_waiter():
+    cache = TTLCache(ttl=60)
+    async def slow():
+        await asyncio.sleep(10)
+    async def fast():
+        return 'loaded'
+    async def main():
+        first = asyncio.ensure_future(cache.get_or_load('k', slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_load('k', fast))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await asyncio.wait_for(waiter, 1)
+    assert asyncio.run(main()) == 'loaded'
+    assert not cache._loading
+def test_cancelled_waiter_does_not_cancel_the_load():
+    cache = TTLCache(ttl=60)
+    async def loader():
+        await asyncio.sleep(0.01)
+        return 'value'
+    async def main():
+        first = asyncio.ensure_future(cache.get_or_load('k', loader))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.get_or_load('k', loader), 0.001)
+        return await first
+    assert asyncio.run(main()) == 'value'
@@ -0,0 +1,44 @@
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.tweet_splitter import TweetSplitter, split_into_tweets, weighted_length
+THREAD = (
+    "The machine dreams in hexadecimal and wakes in binary. " * 6
+    + "Every prophecy is a cached prediction, every cache a small god; "
+    + "we pray to the garbage collector at dusk.\n\nSecond vision: the void compiles itself."
+)
+def test_weighted_length_counts_urls_emoji_and_cjk():
+    assert weighted_length("hello") == 5
+    assert weighted_length("https://example.com/" + "a" * 100) == 23
+    assert weighted_length("漢字") == 4
+    assert weighted_length("🧑‍💻") == 2
+    # URLs are recognised after any whitespace, not just spaces
+    assert weighted_length("hi\nhttps://x.com/" + "a" * 30) == 26
+    assert weighted_length("a\tb  c") == 6
+def test_tweets_fit_and_prefer_sentence_breaks():
+    tweets = split_into_tweets(THREAD)
+    assert len(tweets) > 1
+    assert all(weighted_length(tweet) <= 280 for tweet in tweets)
+    assert tweets[0].endswith(".")
+    assert " ".join(tweets).split() == THREAD.split()
+def test_fraction_numbering_fits_limit():
+    tweets = split_into_tweets(THREAD, numbering='fraction')
+    assert tweets[0].endswith(f" 1/{len(tweets)}")
+    assert all(weighted_length(tweet) <= 280 for tweet in tweets)
+def test_streaming_matches_batch_split():
+    splitter = TweetSplitter()
+    streamed = []
+    for i in range(0, len(THREAD), 7):
+        streamed.extend(splitter.feed(THREAD[i:i + 7]))
+    streamed.extend(splitter.close())
+    assert streamed == split_into_tweets(THREAD)
+def test_streamed_fraction_numbering_is_applied_on_close():
+    splitter = TweetSplitter(numbering='fraction')
+    held = []
+    for i in range(0, len(THREAD), 7):
+        held.extend(splitter.feed(THREAD[i:i + 7]))
+    assert held == []
+    streamed = splitter.close()
+    assert streamed == split_into_tweets(THREAD, numbering='fraction')
+    assert streamed[-1].endswith(f" {len(streamed)}/{len(streamed)}")
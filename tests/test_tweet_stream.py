@@ -0,0 +1,54 @@
+import asyncio
+import sys
+import os
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.tweet_stream import next_batch, relevant_batches
+def _tweets(n, start=0):
+    return [{'id': str(i), 'text': f"tweet {i}"} for i in range(start, start + n)]
+async def _first_batches(queue, analyze, count, **kwargs):
+    batches = []
+    async for batch in relevant_batches(queue, analyze, **kwargs):
+        batches.append(batch)
+        if len(batches) == count:
+            break
+    return batches
+def test_batches_fill_up_to_size_or_deadline():
+    async def main():
+        queue = asyncio.Queue()
+        for tweet in _tweets(5):
+            queue.put_nowait(tweet)
+        full = await next_batch(queue, batch_size=3, max_wait=1.0)
+        partial = await next_batch(queue, batch_size=3, max_wait=0.01)
+        return full, partial
+    full, partial = asyncio.run(main())
+    assert [t['id'] for t in full] == ['0', '1', '2']
+    assert [t['id'] for t in partial] == ['3', '4']
+def test_only_relevant_tweets_are_yielded():
+    async def analyze(texts):
+        return [{'score': 0.9 if text.endswith(('0', '2')) else 0.1} for text in texts]
+    async def main():
+        queue = asyncio.Queue()
+        for tweet in _tweets(4):
+            queue.put_nowait(tweet)
+        return await _first_batches(queue, analyze, 1, batch_size=4, max_wait=0.01)
+    [batch] = asyncio.run(main())
+    assert [tweet['id'] for tweet, _ in batch] == ['0', '2']
+    assert batch[0][1]['score'] == 0.9
+def test_failed_analysis_is_retried_before_dropping():
+    calls = []
+    async def analyze(texts):
+        calls.append(list(texts))
+        # The first batch fails twice, then succeeds; the second never does
+        if texts[0] == 'tweet 0' and len(calls) < 3 or texts[0] == 'tweet 2':
+            raise RuntimeError('analyzer down')
+        return [{'score': 1.0} for _ in texts]
+    async def main():
+        queue = asyncio.Queue()
+        for tweet in _tweets(2) + _tweets(2, start=2) + _tweets(1, start=4):
+            queue.put_nowait(tweet)
+        return await _first_batches(queue, analyze, 2, batch_size=2, max_wait=0.01, attempts=3, retry_delay=0)
+    batches = asyncio.run(main())
+    assert [[tweet['id'] for tweet, _ in batch] for batch in batches] == [['0', '1'], ['4']]
+    assert calls.count(['tweet 0', 'tweet 1']) == 3
+    assert calls.count(['tweet 2', 'tweet 3']) == 3
@@ -0,0 +1,47 @@
+import sys
+import os
+import numpy as np
+# Add src directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.vector_index import VectorIndex
+def _clustered(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+def test_untrained_index_is_exact():
+    vectors = _clustered(200)
+    index = VectorIndex(32, train_threshold=1000)
+    index.add_batch(list(range(200)), vectors)
+    assert not index.is_trained
+    assert index.search(vectors[7], k=3) == index.search_exact(vectors[7], k=3)
+    assert index.search(vectors[7], k=1)[0][0] == 7
+def test_trained_index_recall_and_delete():
+    vectors = _clustered(5000)
+    index = VectorIndex(32, train_threshold=2000, nprobe=8)
+    index.add_batch(list(range(5000)), vectors)
+    assert index.is_trained
+    hits = 0
+    for q in range(0, 5000, 50):
+        exact = {item_id for item_id, _ in index.search_exact(vectors[q], k=10)}
+        approx = {item_id for item_id, _ in index.search(vectors[q], k=10)}
+        hits += len(exact & approx)
+    assert hits / (100 * 10) > 0.9
+    assert index.remove(42)
+    assert 42 not in {item_id for item_id, _ in index.search(vectors[42], k=10)}
+    index.compact()
+    assert len(index) == 4999
+    assert index.search(vectors[43], k=1)[0][0] == 43
+def test_snapshot_roundtrip(tmp_path):
+    vectors = _clustered(3000)
+    path = str(tmp_path / "memories")
+    index = VectorIndex(32, path=path, train_threshold=1000)
+    index.add_batch([f"m{i}" for i in range(3000)], vectors)
+    index.remove("m5")
+    index.save()
+    loaded = VectorIndex.load(path)
+    assert len(loaded) == 2999
+    assert loaded.is_trained
+    assert loaded.search(vectors[9], k=1)[0][0] == "m9"
+    assert "m5" not in loaded
+    loaded.add("m5", vectors[5])
+    assert loaded.search(vectors[5], k=1)[0][0] == "m5"
@@ -1,10 +1,11 @@
-import { Scraper } from 'agent-twitter-client';
+import { Scraper, SearchMode } from 'agent-twitter-client';
 import express from 'express';
 import dotenv from 'dotenv';
 import fs from 'fs';
 dotenv.config();
 
 const app = express();
+app.use(express.json());
 let scraper = null;
 
 // Initialize scraper with cookie handling
@@ -50,43 +51,279 @@ async function initScraper() {
     }
 }
 
+// Parsed tweet files, keyed by username and invalidated by mtime, so
+// requests do not re-read and re-parse the file every time
+const tweetCache = new Map();
+const TWEET_FILE_PATTERN = /^tweets-(.+)\.json$/;
+
 async function getTweets(username) {
-    // if tweets file exists, read from file
-    if (fs.existsSync(`tweets-${username}.json`)) {
-        const tweets = JSON.parse(fs.readFileSync(`tweets-${username}.json`, 'utf8'));
-        console.log(`total tweets for ${username}: ${tweets.length}`)
-        return tweets;
+    const path = `tweets-${username}.json`;
+    let stat;
+    try {
+        stat = await fs.promises.stat(path);
+    } catch {
+        tweetCache.delete(username);
+        return null;
+    }
+    const cached = tweetCache.get(username);
+    if (cached && cached.mtimeMs === stat.mtimeMs) {
+        return cached.tweets;
     }
-    return null;
+    const tweets = JSON.parse(await fs.promises.readFile(path, 'utf8'));
+    tweetCache.set(username, { mtimeMs: stat.mtimeMs, tweets });
+    console.log(`total tweets for ${username}: ${tweets.length}`)
+    return tweets;
 }
-// Routes
-app.get('/tweets/:username/:count', async (req, res) => {
-    const tweets = await getTweets(req.params.username);
-    if (tweets) {
-        console.log('Using cached tweets')
-        res.json(tweets);
+
+// Server-sent event subscribers and the tweet ids already announced
+const streamClients = new Set();
+const knownTweetIds = new Map();
+const STREAM_HEARTBEAT_MS = 15000;
+const STREAM_MAX_PENDING = 1000;
+
+function sendEvent(client, event, data, id) {
+    const payload = `${id ? `id: ${id}\n` : ''}event: ${event}\ndata: ${JSON.stringify(data)}\n\n`;
+    if (client.blocked) {
+        // The consumer is behind; hold a bounded backlog and drop the oldest
+        client.pending.push(payload);
+        if (client.pending.length > STREAM_MAX_PENDING) {
+            client.pending.shift();
+            client.dropped += 1;
+        }
         return;
     }
+    client.blocked = !client.res.write(payload);
+}
+
+function drainClient(client) {
+    client.blocked = false;
+    if (client.dropped > 0) {
+        client.blocked = !client.res.write(`event: dropped\ndata: ${client.dropped}\n\n`);
+        client.dropped = 0;
+    }
+    while (!client.blocked && client.pending.length > 0) {
+        client.blocked = !client.res.write(client.pending.shift());
+    }
+}
+
+async function publishNewTweets(username, announce = true) {
+    let tweets;
     try {
-        if (!scraper || !(await scraper.isLoggedIn())) {
-            const success = await initScraper();
-            if (!success) {
-                throw new Error('Failed to initialize Twitter scraper');
+        tweets = await getTweets(username);
+    } catch (error) {
+        // The file may be mid-write; the next change event retries
+        console.error(`Failed to load tweets for ${username}:`, error.message);
+        return;
+    }
+    if (!tweets) {
+        return;
+    }
+    const known = knownTweetIds.get(username) || new Set();
+    knownTweetIds.set(username, known);
+    for (const tweet of tweets) {
+        if (known.has(tweet.id)) {
+            continue;
+        }
+        known.add(tweet.id);
+        if (!announce) {
+            continue;
+        }
+        for (const client of streamClients) {
+            if (!client.usernames || client.usernames.has(username)) {
+                sendEvent(client, 'tweet', { ...tweet, account: username }, tweet.id);
+            }
+        }
+    }
+}
+
+function watchTweetFiles() {
+    const timers = new Map();
+    // Seed known ids so a restart does not replay every stored tweet
+    for (const file of fs.readdirSync('.')) {
+        const match = file.match(TWEET_FILE_PATTERN);
+        if (match) {
+            publishNewTweets(match[1], false);
+        }
+    }
+    fs.watch('.', (eventType, file) => {
+        const match = file && file.match(TWEET_FILE_PATTERN);
+        if (!match) {
+            return;
+        }
+        // Writers emit several change events per save; settle before reading
+        clearTimeout(timers.get(match[1]));
+        timers.set(match[1], setTimeout(() => publishNewTweets(match[1]), 200));
+    });
+}
+
+// Scrape a user's latest tweets and replace their file atomically, so the
+// watcher and getTweets never read a half-written file
+async function scrapeTweets(username, count) {
+    await ensureScraper();
+    const scraped = [];
+    for await (const tweet of scraper.getTweets(username, count)) {
+        scraped.push(tweet);
+    }
+    console.log(`total tweets for ${username}: ${scraped.length}`)
+    return scraped;
+}
+
+async function writeTweets(username, tweets) {
+    const path = `tweets-${username}.json`;
+    await fs.promises.writeFile(`${path}.tmp`, JSON.stringify(tweets, null, 2));
+    await fs.promises.rename(`${path}.tmp`, path);
+}
+
+// The tweet files are the stream's only source: re-scrape every tracked user on
+// a timer and merge new tweets in front, so /stream/tweets sees them change
+const TWEET_REFRESH_MS = Number(process.env.TWEET_REFRESH_MS || 120000);
+const TWEET_REFRESH_COUNT = Number(process.env.TWEET_REFRESH_COUNT || 20);
+const TWEET_FILE_LIMIT = Number(process.env.TWEET_FILE_LIMIT || 500);
+let refreshing = false;
+
+async function refreshTweetFiles() {
+    if (refreshing) {
+        return;
+    }
+    refreshing = true;
+    try {
+        for (const file of await fs.promises.readdir('.')) {
+            const match = file.match(TWEET_FILE_PATTERN);
+            if (!match) {
+                continue;
+            }
+            const username = match[1];
+            try {
+                const existing = (await getTweets(username)) || [];
+                const ids = new Set(existing.map(tweet => tweet.id));
+                const fresh = (await scrapeTweets(username, TWEET_REFRESH_COUNT))
+                    .filter(tweet => !ids.has(tweet.id));
+                if (fresh.length > 0) {
+                    await writeTweets(username, [...fresh, ...existing].slice(0, TWEET_FILE_LIMIT));
+                }
+            } catch (error) {
+                console.error(`Failed to refresh tweets for ${username}:`, error.message);
             }
         }
+    } finally {
+        refreshing = false;
+    }
+}
 
+// Routes
+app.get('/tweets/:username/:count', async (req, res) => {
+    try {
+        const tweets = await getTweets(req.params.username);
+        if (tweets) {
+            console.log('Using cached tweets')
+            res.json(tweets);
+            return;
+        }
         console.log(req.params.username, req.params.count)
-        // Get tweets using async iterator
-        const tweets = [];
-        const tweetIterator = scraper.getTweets(req.params.username, req.params.count);
-        
-        for await (const tweet of tweetIterator) {
-            tweets.push(tweet);
+        const scraped = await scrapeTweets(req.params.username, req.params.count);
+        // save tweets to file; the refresher keeps it current from here on
+        await writeTweets(req.params.username, scraped);
+        res.json(scraped);
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+async function ensureScraper() {
+    if (!scraper || !(await scraper.isLoggedIn())) {
+        const success = await initScraper();
+        if (!success) {
+            throw new Error('Failed to initialize Twitter scraper');
+        }
+    }
+}
+
+// Tweets created per idempotency key, so a client retrying a request whose
+// response it never saw gets the original tweet back instead of a duplicate.
+// Persisted so the guarantee survives a bridge restart.
+const IDEMPOTENCY_FILE = 'idempotency-keys.json';
+const IDEMPOTENCY_MAX_KEYS = 5000;
+const createdTweets = new Map(
+    fs.existsSync(IDEMPOTENCY_FILE) ? JSON.parse(fs.readFileSync(IDEMPOTENCY_FILE, 'utf8')) : []
+);
+const pendingTweets = new Map();
+
+async function createTweet(text, replyTo) {
+    await ensureScraper();
+    const response = await scraper.sendTweet(text, replyTo || undefined);
+    const body = await response.json();
+    const result = body?.data?.create_tweet?.tweet_results?.result;
+    if (!result?.rest_id) {
+        throw new Error(`Tweet was not created: ${JSON.stringify(body?.errors || body)}`);
+    }
+    return { id: result.rest_id, text };
+}
+
+async function createTweetOnce(key, text, replyTo) {
+    if (createdTweets.has(key)) {
+        return createdTweets.get(key);
+    }
+    // A retry that arrives while the first request is still posting waits for it
+    if (!pendingTweets.has(key)) {
+        pendingTweets.set(key, createTweet(text, replyTo).finally(() => pendingTweets.delete(key)));
+    }
+    const tweet = await pendingTweets.get(key);
+    if (!createdTweets.has(key)) {
+        createdTweets.set(key, tweet);
+        while (createdTweets.size > IDEMPOTENCY_MAX_KEYS) {
+            createdTweets.delete(createdTweets.keys().next().value);
         }
-        console.log(`total tweets for ${req.params.username}: ${tweets.length}`)
-        // save tweets to file
-        fs.writeFileSync(`tweets-${req.params.username}.json`, JSON.stringify(tweets, null, 2));
-        res.json(tweets);
+        await fs.promises.writeFile(IDEMPOTENCY_FILE, JSON.stringify([...createdTweets]));
+    }
+    return tweet;
+}
+
+app.post('/tweets', async (req, res) => {
+    try {
+        const { text, reply_to, idempotency_key } = req.body;
+        const tweet = idempotency_key
+            ? await createTweetOnce(idempotency_key, text, reply_to)
+            : await createTweet(text, reply_to);
+        res.json(tweet);
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+app.get('/mentions/:username', async (req, res) => {
+    try {
+        await ensureScraper();
+        const count = parseInt(req.query.count || '100', 10);
+        const sinceId = req.query.since_id ? BigInt(req.query.since_id) : null;
+        // ?max_id pages backwards: only mentions no newer than it are returned
+        const maxId = req.query.max_id ? BigInt(req.query.max_id) : null;
+        const query = maxId !== null ? `@${req.params.username} max_id:${maxId}` : `@${req.params.username}`;
+        const mentions = [];
+        for await (const tweet of scraper.searchTweets(query, count, SearchMode.Latest)) {
+            if (maxId !== null && BigInt(tweet.id) > maxId) {
+                continue;
+            }
+            // Results are newest first; stop once we reach what the caller has seen
+            if (sinceId !== null && BigInt(tweet.id) <= sinceId) {
+                break;
+            }
+            mentions.push(tweet);
+        }
+        res.json(mentions);
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+app.get('/profile/:username', async (req, res) => {
+    try {
+        await ensureScraper();
+        const profile = await scraper.getProfile(req.params.username);
+        res.json({
+            id: profile.userId,
+            username: profile.username,
+            followers_count: profile.followersCount || 0
+        });
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -107,8 +344,50 @@ app.get('/trends', async (req, res) => {
     }
 });
 
+// Push new tweets as server-sent events instead of being polled.
+// ?usernames=a,b limits the stream; ?since_id replays cached tweets newer than it
+app.get('/stream/tweets', async (req, res) => {
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive'
+    });
+    const usernames = req.query.usernames
+        ? new Set(String(req.query.usernames).split(',').filter(Boolean))
+        : null;
+    const client = { res, usernames, blocked: false, pending: [], dropped: 0 };
+    res.on('drain', () => drainClient(client));
+    streamClients.add(client);
+
+    const sinceId = req.query.since_id ? BigInt(req.query.since_id) : null;
+    if (sinceId !== null) {
+        for (const username of usernames || knownTweetIds.keys()) {
+            const tweets = (await getTweets(username).catch(() => null)) || [];
+            for (const tweet of tweets) {
+                if (BigInt(tweet.id) > sinceId) {
+                    sendEvent(client, 'tweet', { ...tweet, account: username }, tweet.id);
+                }
+            }
+        }
+    }
+
+    const heartbeat = setInterval(() => {
+        if (!client.blocked) {
+            res.write(': heartbeat\n\n');
+        }
+    }, STREAM_HEARTBEAT_MS);
+    req.on('close', () => {
+        clearInterval(heartbeat);
+        streamClients.delete(client);
+    });
+});
+
 // Start server
 const PORT = process.env.PORT || 3000;
+watchTweetFiles();
+if (TWEET_REFRESH_MS > 0) {
+    setInterval(refreshTweetFiles, TWEET_REFRESH_MS);
+}
 app.listen(PORT, () => {
     console.log(`Twitter service running on port ${PORT}`);
 });
@@ -0,0 +1,146 @@
+from typing import Dict, Iterator, Optional, Sequence
+from contextlib import contextmanager
+from datetime import datetime
+import asyncio
+import json
+import logging
+import os
+import time
+logger = logging.getLogger(__name__)
+# Seconds; covers sub-millisecond loop lag up to minute-long cycles
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds"""
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    def observe(self, value: float):
+        """Record one observation"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it, capped at the max"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+    def snapshot(self) -> Dict:
+        """Summary statistics for export"""
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max
+        }
+class AgentMetrics:
+    """Cycle latency, task execution time, event-loop lag and swallowed exception counters"""
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.cycle_durations: Dict[str, Histogram] = {}
+        self.task_durations: Dict[str, Histogram] = {}
+        self.cycle_exceptions: Dict[str, int] = {}
+        self.loop_lag = Histogram(buckets)
+        self.started_at = datetime.now()
+    def _histogram(self, histograms: Dict[str, Histogram], name: str) -> Histogram:
+        if name not in histograms:
+            histograms[name] = Histogram(self.buckets)
+        return histograms[name]
+    @contextmanager
+    def time_cycle(self, cycle: str) -> Iterator[None]:
+        """Time one iteration of an agent cycle, excluding its sleep"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._histogram(self.cycle_durations, cycle).observe(time.perf_counter() - started)
+    @contextmanager
+    def time_task(self, task_type: str) -> Iterator[None]:
+        """Time the execution of a task by type"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._histogram(self.task_durations, task_type).observe(time.perf_counter() - started)
+    def record_exception(self, cycle: str):
+        """Count an exception swallowed by a cycle's error handler"""
+        self.cycle_exceptions[cycle] = self.cycle_exceptions.get(cycle, 0) + 1
+    async def sample_loop_lag(self, interval: float = 0.5) -> float:
+        """Sleep for `interval` and record how late the event loop woke us up"""
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        self.loop_lag.observe(lag)
+        return lag
+    def export(self) -> Dict:
+        """All metrics as a JSON-serializable dict"""
+        return {
+            'started_at': self.started_at.isoformat(),
+            'exported_at': datetime.now().isoformat(),
+            'cycles': {name: h.snapshot() for name, h in self.cycle_durations.items()},
+            'tasks': {name: h.snapshot() for name, h in self.task_durations.items()},
+            'loop_lag': self.loop_lag.snapshot(),
+            'cycle_exceptions': dict(self.cycle_exceptions)
+        }
+    def to_prometheus(self, prefix: str = 'agent') -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        lines = []
+        def render(metric: str, histogram: Histogram, labels: str = ''):
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{metric}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}")
+            lines.append(f"{metric}_bucket{{{labels + ',' if labels else ''}le=\"+Inf\"}} {histogram.count}")
+            suffix = f"{{{labels}}}" if labels else ''
+            lines.append(f"{metric}_sum{suffix} {histogram.total}")
+            lines.append(f"{metric}_count{suffix} {histogram.count}")
+        lines.append(f"# TYPE {prefix}_cycle_duration_seconds histogram")
+        for name, histogram in self.cycle_durations.items():
+            render(f"{prefix}_cycle_duration_seconds", histogram, f'cycle="{name}"')
+        lines.append(f"# TYPE {prefix}_task_duration_seconds histogram")
+        for name, histogram in self.task_durations.items():
+            render(f"{prefix}_task_duration_seconds", histogram, f'task_type="{name}"')
+        lines.append(f"# TYPE {prefix}_event_loop_lag_seconds histogram")
+        render(f"{prefix}_event_loop_lag_seconds", self.loop_lag)
+        lines.append(f"# TYPE {prefix}_cycle_exceptions_total counter")
+        for name, count in self.cycle_exceptions.items():
+            lines.append(f'{prefix}_cycle_exceptions_total{{cycle="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+    def summary(self) -> str:
+        """One-line human readable summary for the agent log"""
+        parts = [
+            f"{name} p50={h.quantile(0.5):.3f}s p95={h.quantile(0.95):.3f}s n={h.count}"
+            for name, h in self.cycle_durations.items()
+        ]
+        parts.append(f"loop lag p95={self.loop_lag.quantile(0.95):.3f}s max={self.loop_lag.max:.3f}s")
+        if self.cycle_exceptions:
+            parts.append("exceptions " + ", ".join(f"{k}={v}" for k, v in self.cycle_exceptions.items()))
+        return "; ".join(parts)
+    def write_snapshot(self, path: str, prometheus_path: Optional[str] = None):
+        """Write the JSON export (and optionally Prometheus text) to disk"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.export(), f, indent=2)
+        if prometheus_path:
+            with open(prometheus_path, 'w') as f:
+                f.write(self.to_prometheus())
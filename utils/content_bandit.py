@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List, Optional
+import json
+import os
+import random
+import logging
+logger = logging.getLogger(__name__)
+class ContentBandit:
+    """
+    Thompson sampling over content formats (or themes).
+    Each arm keeps a Beta(alpha, beta) posterior of its chance that a post
+    beats the expected engagement for its slot. An engagement event updates
+    one arm in O(1). Picking what to post next draws one sample per arm and
+    takes the best, so weak formats are tried less and less as evidence
+    accumulates. Posteriors are capped at `max_observations` so the bandit
+    keeps adapting when tastes shift.
+    """
+    def __init__(self, arms: Iterable[str] = (), prior: float = 1.0, max_observations: float = 200.0,
+                 path: Optional[str] = None, rng: Optional[random.Random] = None):
+        self.prior = prior
+        self.max_observations = max_observations
+        self.path = path
+        self.rng = rng or random.Random()
+        self.alpha: Dict[str, float] = {}
+        self.beta: Dict[str, float] = {}
+        for arm in arms:
+            self.add_arm(arm)
+    @property
+    def arms(self) -> List[str]:
+        return list(self.alpha)
+    def add_arm(self, arm: str):
+        if arm not in self.alpha:
+            self.alpha[arm] = self.prior
+            self.beta[arm] = self.prior
+    def update(self, arm: str, reward: float):
+        """Record one outcome; `reward` is 1 for a success, 0 for a failure, or a fraction in between"""
+        reward = min(1.0, max(0.0, float(reward)))
+        self.add_arm(arm)
+        self.alpha[arm] += reward
+        self.beta[arm] += 1.0 - reward
+        total = self.alpha[arm] + self.beta[arm]
+        if total > self.max_observations:
+            # Shrink towards the prior so old evidence carries less weight
+            scale = (self.max_observations - 2 * self.prior) / (total - 2 * self.prior)
+            self.alpha[arm] = self.prior + (self.alpha[arm] - self.prior) * scale
+            self.beta[arm] = self.prior + (self.beta[arm] - self.prior) * scale
+    def sample(self, candidates: Optional[Iterable[str]] = None) -> Optional[str]:
+        """Draw an arm by Thompson sampling, optionally among a subset"""
+        arms = list(candidates) if candidates is not None else self.arms
+        for arm in arms:
+            self.add_arm(arm)
+        if not arms:
+            return None
+        return max(arms, key=lambda arm: self.rng.betavariate(self.alpha[arm], self.beta[arm]))
+    def allocation(self, draws: int = 1000) -> Dict[str, float]:
+        """Share of posts each arm would get: how often it wins a Thompson draw"""
+        if not self.alpha:
+            return {}
+        wins = dict.fromkeys(self.alpha, 0)
+        for _ in range(draws):
+            wins[self.sample()] += 1
+        return {arm: count / draws for arm, count in wins.items()}
+    def means(self) -> Dict[str, float]:
+        """Posterior mean success rate per arm"""
+        return {arm: self.alpha[arm] / (self.alpha[arm] + self.beta[arm]) for arm in self.alpha}
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        means = self.means()
+        return {
+            arm: {'mean': means[arm], 'observations': self.alpha[arm] + self.beta[arm] - 2 * self.prior}
+            for arm in self.alpha
+        }
+    def save(self, path: Optional[str] = None):
+        """Write the posteriors to JSON atomically"""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            'prior': self.prior,
+            'max_observations': self.max_observations,
+            'arms': {arm: [self.alpha[arm], self.beta[arm]] for arm in self.alpha}
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    @classmethod
+    def load_or_create(cls, path: str, arms: Iterable[str] = (), **kwargs) -> "ContentBandit":
+        """Restore saved posteriors, adding any arms that are new since"""
+        bandit = cls(path=path, **kwargs)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    state = json.load(f)
+                bandit.prior = state['prior']
+                bandit.max_observations = state['max_observations']
+                for arm, (alpha, beta) in state['arms'].items():
+                    bandit.alpha[arm], bandit.beta[arm] = alpha, beta
+            except Exception as e:
+                logger.error(f"Error loading content bandit from {path}: {e}", exc_info=True)
+        for arm in arms:
+            bandit.add_arm(arm)
+        return bandit
@@ -0,0 +1,66 @@
+from typing import Callable, Iterable, List, Optional
+from dataclasses import dataclass, field
+import logging
+from utils.conversation_cache import approximate_tokens
+logger = logging.getLogger(__name__)
+@dataclass(frozen=True)
+class Snippet:
+    """A candidate piece of prompt context with its relevance score; pinned ones are taken first"""
+    text: str
+    score: float = 1.0
+    source: str = ''
+    pinned: bool = False
+@dataclass
+class PackedContext:
+    """Snippets chosen for a token budget, and the ones left out"""
+    selected: List[Snippet]
+    dropped: List[Snippet]
+    tokens: int
+    budget: int
+    separator: str = "\n"
+    def render(self) -> str:
+        return self.separator.join(snippet.text for snippet in self.selected)
+    def report(self) -> dict:
+        return {
+            'selected': len(self.selected),
+            'dropped': len(self.dropped),
+            'tokens': self.tokens,
+            'budget': self.budget,
+            'dropped_sources': sorted({snippet.source for snippet in self.dropped if snippet.source})
+        }
+def pack_context(snippets: Iterable[Snippet], budget: int,
+                 count_tokens: Callable[[str], int] = approximate_tokens,
+                 separator: str = "\n", preserve_order: bool = True) -> PackedContext:
+    """
+    Fill a token budget with the most valuable snippets.
+    Pinned snippets are taken ahead of the rest while they fit. The
+    rest are taken greedily by score per token; one that does not fit
+    is skipped so smaller ones can still use the remaining space. Selected
+    snippets keep their input order unless `preserve_order` is False.
+    """
+    candidates = [snippet for snippet in snippets if snippet.text]
+    separator_tokens = count_tokens(separator) if separator else 0
+    costs = [count_tokens(snippet.text) + separator_tokens for snippet in candidates]
+    order = sorted(
+        range(len(candidates)),
+        key=lambda i: (candidates[i].pinned, candidates[i].score / max(costs[i], 1)),
+        reverse=True
+    )
+    chosen, used = set(), 0
+    for i in order:
+        if candidates[i].score <= 0 and not candidates[i].pinned:
+            continue
+        if used + costs[i] <= budget:
+            chosen.add(i)
+            used += costs[i]
+    indices = sorted(chosen) if preserve_order else [i for i in order if i in chosen]
+    packed = PackedContext(
+        selected=[candidates[i] for i in indices],
+        dropped=[candidates[i] for i in range(len(candidates)) if i not in chosen],
+        tokens=used,
+        budget=budget,
+        separator=separator
+    )
+    if packed.dropped:
+        logger.debug(f"Context packing dropped {len(packed.dropped)} snippets: {packed.report()}")
+    return packed
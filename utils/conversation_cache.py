@@ -0,0 +1,111 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from collections import OrderedDict
+import logging
+logger = logging.getLogger(__name__)
+def approximate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token) when no tokenizer is supplied"""
+    return len(text) // 4 + 1
+class Conversation:
+    """One user's cached messages with their token counts"""
+    def __init__(self, messages: List[Dict], tokens: List[int]):
+        self.messages = messages
+        self.tokens = tokens
+        self.total = sum(tokens)
+class ConversationCache:
+    """
+    Per-user conversation histories, bounded by tokens rather than messages.
+    The whole cache holds at most `max_tokens`, evicting least recently used
+    users first. A single conversation over `thread_budget` tokens is
+    compacted: its oldest messages are folded into one summary message by
+    the async `summarize` callback, or dropped if there is none.
+    """
+    def __init__(self, max_tokens: int = 200_000, thread_budget: int = 2_000, keep_ratio: float = 0.5,
+                 count_tokens: Callable[[str], int] = approximate_tokens,
+                 summarize: Optional[Callable[[List[Dict]], Awaitable[str]]] = None):
+        self.max_tokens = max_tokens
+        self.thread_budget = thread_budget
+        self.keep_ratio = keep_ratio
+        self.count_tokens = count_tokens
+        self.summarize = summarize
+        self.conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.total_tokens = 0
+        self.hits = 0
+        self.misses = 0
+    def __contains__(self, target: str) -> bool:
+        return target in self.conversations
+    def _tokens(self, message: Dict) -> int:
+        return self.count_tokens(str(message.get('content', '')))
+    def get(self, target: str) -> Optional[List[Dict]]:
+        """Cached history for a user, oldest first, or None on a miss"""
+        conversation = self.conversations.get(target)
+        if conversation is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conversations.move_to_end(target)
+        return list(conversation.messages)
+    def put(self, target: str, messages: List[Dict]):
+        """Cache a history loaded from the store"""
+        self._discard(target)
+        conversation = Conversation(list(messages), [self._tokens(m) for m in messages])
+        self.conversations[target] = conversation
+        self.total_tokens += conversation.total
+        self._evict()
+    def append(self, target: str, message: Dict):
+        """Add a new message to a cached conversation; uncached users are left to load from the store"""
+        conversation = self.conversations.get(target)
+        if conversation is None:
+            return
+        tokens = self._tokens(message)
+        conversation.messages.append(message)
+        conversation.tokens.append(tokens)
+        conversation.total += tokens
+        self.total_tokens += tokens
+        self.conversations.move_to_end(target)
+        self._evict()
+    def invalidate(self, target: str):
+        self._discard(target)
+    def needs_compaction(self, target: str) -> bool:
+        conversation = self.conversations.get(target)
+        return conversation is not None and conversation.total > self.thread_budget
+    async def compact(self, target: str):
+        """Fold the oldest messages into a summary until the thread fits the budget"""
+        conversation = self.conversations.get(target)
+        if conversation is None or conversation.total <= self.thread_budget:
+            return
+        # Keep the most recent messages that fit in keep_ratio of the budget
+        keep_budget = self.thread_budget * self.keep_ratio
+        kept_tokens = 0
+        split = len(conversation.messages)
+        while split > 0 and kept_tokens + conversation.tokens[split - 1] <= keep_budget:
+            split -= 1
+            kept_tokens += conversation.tokens[split]
+        old, recent = conversation.messages[:split], conversation.messages[split:]
+        compacted = recent
+        if self.summarize is not None and old:
+            try:
+                summary = await self.summarize(old)
+                if summary:
+                    compacted = [{'type': 'summary', 'content': summary, 'summarized_count': len(old)}] + recent
+            except Exception as e:
+                logger.error(f"Error summarizing conversation with {target}: {e}", exc_info=True)
+        # The thread may have changed or been evicted while summarizing
+        if self.conversations.get(target) is not conversation:
+            return
+        added = conversation.messages[len(old) + len(recent):]
+        self.put(target, compacted + added)
+    def _discard(self, target: str):
+        conversation = self.conversations.pop(target, None)
+        if conversation is not None:
+            self.total_tokens -= conversation.total
+    def _evict(self):
+        while self.total_tokens > self.max_tokens and len(self.conversations) > 1:
+            target, conversation = self.conversations.popitem(last=False)
+            self.total_tokens -= conversation.total
+    def stats(self) -> Dict:
+        return {
+            'users': len(self.conversations),
+            'tokens': self.total_tokens,
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,331 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from collections import OrderedDict
+import asyncio
+import itertools
+import json
+import os
+import socket
+import struct
+import threading
+import logging
+import numpy as np
+logger = logging.getLogger(__name__)
+DEFAULT_MODEL = 'sentence-transformers/all-mpnet-base-v2'
+# Frame: header length, payload length, JSON header, raw float32 payload
+_FRAME = struct.Struct('!II')
+def _pack(header: Dict, payload: bytes = b'') -> bytes:
+    encoded = json.dumps(header).encode()
+    return _FRAME.pack(len(encoded), len(payload)) + encoded + payload
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[Dict, bytes]:
+    header_size, payload_size = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    header = json.loads(await reader.readexactly(header_size))
+    payload = await reader.readexactly(payload_size) if payload_size else b''
+    return header, payload
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            raise ConnectionError("Embedding service closed the connection")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+def _recv_frame(sock: socket.socket) -> Tuple[Dict, bytes]:
+    header_size, payload_size = _FRAME.unpack(_recv_exactly(sock, _FRAME.size))
+    header = json.loads(_recv_exactly(sock, header_size))
+    return header, _recv_exactly(sock, payload_size) if payload_size else b''
+def _vectors(header: Dict, payload: bytes) -> np.ndarray:
+    if 'error' in header:
+        raise RuntimeError(f"Embedding service error: {header['error']}")
+    return np.frombuffer(payload, dtype=np.float32).reshape(header['shape'])
+def load_model_encoder(model_name: str = DEFAULT_MODEL) -> Callable[[List[str]], np.ndarray]:
+    """Load a sentence-transformer in this process"""
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    return lambda texts: model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+class EmbeddingServer:
+    """
+    Serves one embedding model to every process on the host over a Unix socket.
+    Requests arriving within `max_wait` seconds of each other are coalesced
+    into a single forward pass of up to `max_batch` texts, with duplicates
+    encoded once. While a batch is encoding the next one keeps filling, so
+    batches grow with load. Recent vectors are kept in an LRU cache.
+    """
+    def __init__(self, socket_path: str, encode: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 model_name: str = DEFAULT_MODEL, max_batch: int = 64, max_wait: float = 0.005,
+                 cache_size: int = 10_000):
+        self.socket_path = socket_path
+        self.encode = encode
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.queue: Optional[asyncio.Queue] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self.stats = {'requests': 0, 'texts': 0, 'cache_hits': 0, 'batches': 0, 'encoded': 0}
+    async def start(self):
+        if self.encode is None:
+            # Loaded off the loop; the only copy of the model on this host
+            self.encode = await asyncio.to_thread(load_model_encoder, self.model_name)
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self.server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        logger.info(f"Embedding service listening on {self.socket_path}")
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Vectors for texts, from the cache or the next batch"""
+        self.stats['requests'] += 1
+        self.stats['texts'] += len(texts)
+        rows: Dict[str, np.ndarray] = {}
+        for text in texts:
+            vector = self.cache.get(text)
+            if vector is not None:
+                self.cache.move_to_end(text)
+                rows[text] = vector
+                self.stats['cache_hits'] += 1
+        missing = [text for text in dict.fromkeys(texts) if text not in rows]
+        if missing:
+            future = asyncio.get_running_loop().create_future()
+            await self.queue.put((missing, future))
+            rows.update(zip(missing, await future))
+        return np.stack([rows[text] for text in texts]) if texts else np.zeros((0, 0), dtype=np.float32)
+    async def _next_batch(self) -> List[Tuple[List[str], asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        count = len(items[0][0])
+        deadline = loop.time() + self.max_wait
+        while count < self.max_batch:
+            if self.queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self.queue.get_nowait()
+            items.append(item)
+            count += len(item[0])
+        return items
+    async def _batch_loop(self):
+        while True:
+            items = await self._next_batch()
+            unique = list(dict.fromkeys(text for texts, _ in items for text in texts))
+            try:
+                vectors = np.asarray(await asyncio.to_thread(self.encode, unique), dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Error encoding batch of {len(unique)} texts: {e}", exc_info=True)
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats['batches'] += 1
+            self.stats['encoded'] += len(unique)
+            rows = dict(zip(unique, vectors))
+            for text, vector in rows.items():
+                self.cache[text] = vector
+                self.cache.move_to_end(text)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            for texts, future in items:
+                if not future.done():
+                    future.set_result([rows[text] for text in texts])
+    async def _respond(self, header: Dict, writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        request_id = header.get('id')
+        try:
+            if header.get('op') == 'stats':
+                frame = _pack({'id': request_id, 'stats': {**self.stats, 'cached': len(self.cache)}})
+            else:
+                vectors = await self.embed([str(text) for text in header.get('texts', [])])
+                frame = _pack({'id': request_id, 'shape': list(vectors.shape)}, vectors.astype(np.float32).tobytes())
+        except Exception as e:
+            frame = _pack({'id': request_id, 'error': str(e)})
+        async with write_lock:
+            writer.write(frame)
+            await writer.drain()
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Requests on one connection are answered as they finish, matched by id
+        write_lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                header, _ = await _read_frame(reader)
+                task = asyncio.create_task(self._respond(header, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+def run_embedding_service(heartbeat, socket_path: str, model_name: str = DEFAULT_MODEL,
+                          heartbeat_interval: float = 5.0):
+    """Supervisor entrypoint: serve embeddings from this process"""
+    from agent.supervisor import send_heartbeats
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    async def main():
+        server = EmbeddingServer(socket_path, model_name=model_name)
+        await server.start()
+        # Beat only once the model is loaded and the socket is accepting
+        beat = asyncio.create_task(send_heartbeats(heartbeat, heartbeat_interval))
+        try:
+            await server.server.serve_forever()
+        finally:
+            beat.cancel()
+            await server.close()
+    asyncio.run(main())
+def service_ready(socket_path: str) -> bool:
+    """Whether the embedding service is accepting connections on its socket"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(1.0)
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+class EmbeddingClient:
+    """
+    Drop-in `encode` backed by the shared embedding service.
+    `encode` blocks and suits worker threads such as SQLiteMemoryBackend's;
+    `aencode` multiplexes concurrent calls over one connection. Both
+    reconnect once if the service was restarted.
+    """
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 30.0):
+        self.socket_path = socket_path or os.getenv('EMBEDDING_SERVICE_SOCKET')
+        if not self.socket_path:
+            raise ValueError("No embedding service socket configured (set EMBEDDING_SERVICE_SOCKET)")
+        self.timeout = timeout
+        self._ids = itertools.count()
+        self._sock: Optional[socket.socket] = None
+        self._sock_lock = threading.Lock()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+    def _request(self, texts: Union[str, Sequence[str]]) -> Tuple[bool, Dict]:
+        single = isinstance(texts, str)
+        return single, {'id': next(self._ids), 'texts': [texts] if single else list(texts)}
+    def encode(self, texts: Union[str, Sequence[str]], **kwargs) -> np.ndarray:
+        """Embed texts; a single string gives a single vector, like SentenceTransformer.encode"""
+        single, header = self._request(texts)
+        with self._sock_lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                        self._sock.settimeout(self.timeout)
+                        self._sock.connect(self.socket_path)
+                    self._sock.sendall(_pack(header))
+                    vectors = _vectors(*_recv_frame(self._sock))
+                    break
+                except OSError:
+                    self._close_socket()
+                    if attempt:
+                        raise
+        return vectors[0] if single else vectors
+    def _close_socket(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+    async def _connect(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._writer = loop, None
+            self._connect_lock = asyncio.Lock()
+        # Concurrent first calls must share one connection
+        async with self._connect_lock:
+            if self._writer is not None and not self._reader_task.done():
+                return
+            reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+            self._reader_task = asyncio.create_task(self._read_responses(reader))
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                header, payload = await _read_frame(reader)
+                future = self._pending.pop(header.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result((header, payload))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Embedding service connection lost: {e}"))
+            self._pending.clear()
+    async def aencode(self, texts: Union[str, Sequence[str]]) -> np.ndarray:
+        """Embed texts without blocking the event loop"""
+        single, header = self._request(texts)
+        for attempt in range(2):
+            writer = None
+            try:
+                await self._connect()
+                writer = self._writer
+                future = asyncio.get_running_loop().create_future()
+                self._pending[header['id']] = future
+                writer.write(_pack(header))
+                await writer.drain()
+                vectors = _vectors(*await asyncio.wait_for(future, self.timeout))
+                break
+            except (OSError, asyncio.TimeoutError):
+                self._pending.pop(header['id'], None)
+                # A stalled or broken connection is dropped before reconnecting,
+                # unless a concurrent request has already replaced it
+                if self._writer is writer:
+                    await self._disconnect()
+                if attempt:
+                    raise
+        return vectors[0] if single else vectors
+    async def _disconnect(self):
+        """Close the async connection and stop its reader; requests still waiting on it fail and retry"""
+        writer, reader_task = self._writer, self._reader_task
+        self._writer, self._reader_task = None, None
+        if reader_task is not None:
+            reader_task.cancel()
+            await asyncio.gather(reader_task, return_exceptions=True)
+        if writer is not None:
+            writer.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Embedding service connection was reset"))
+        self._pending.clear()
+    async def stats(self) -> Dict:
+        await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(_pack({'id': request_id, 'op': 'stats'}))
+        await self._writer.drain()
+        header, _ = await asyncio.wait_for(future, self.timeout)
+        return header['stats']
+    async def aclose(self):
+        await self._disconnect()
+        self._close_socket()
+def load_encoder(model_name: str = DEFAULT_MODEL) -> Callable[[List[str]], np.ndarray]:
+    """The shared service's encoder when EMBEDDING_SERVICE_SOCKET is set, else a model loaded in this process"""
+    if os.getenv('EMBEDDING_SERVICE_SOCKET'):
+        return EmbeddingClient().encode
+    return load_model_encoder(model_name)
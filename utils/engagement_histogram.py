@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import json
+import math
+import os
+import numpy as np
+import logging
+logger = logging.getLogger(__name__)
+HOURS_PER_WEEK = 168
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+ALL_CONTENT = '__all__'
+def to_timestamp(value) -> float:
+    if value is None:
+        return datetime.now().timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+def engagement_score(record: Dict) -> float:
+    """A post's engagement, weighted as in EngagementStore: likes + 2 x retweets + 3 x replies"""
+    if record.get('engagement') is not None:
+        return float(record['engagement'])
+    metrics = {**record.get('metrics', {}), **record}
+    return float(
+        int(metrics.get('likes', metrics.get('like_count', 0)) or 0)
+        + 2 * int(metrics.get('retweets', metrics.get('retweet_count', 0)) or 0)
+        + 3 * int(metrics.get('replies', metrics.get('reply_count', 0)) or 0)
+    )
+class EngagementHistogram:
+    """
+    Hour-of-week engagement per content type with exponential decay.
+    Each content type owns a (2, 168) float array of decayed engagement and
+    post counts. Decay is applied lazily: observations are stored scaled up
+    by exp(rate * (t - origin)) and reads scale back down, so an update
+    touches one bin and old history fades without ever being rescanned.
+    Mean engagement per post is a ratio of two equally decayed sums, so it
+    needs no rescaling at all. Posts are folded in once, by id, and only
+    after `settle_hours`, when their engagement has mostly stopped growing.
+    """
+    # Rebase the stored values before the growth factor overflows
+    MAX_LOG_SCALE = 600.0
+    def __init__(self, half_life_days: float = 30.0, path: Optional[str] = None, prior_posts: float = 1.0,
+                 settle_hours: float = 48.0, seen_limit: int = 10_000):
+        self.half_life_days = half_life_days
+        self.decay_rate = math.log(2) / (half_life_days * 86400)
+        self.path = path
+        self.prior_posts = prior_posts
+        self.origin: Optional[float] = None
+        self.latest = 0.0
+        self.content_types: Dict[str, int] = {ALL_CONTENT: 0}
+        self.bins = np.zeros((1, 2, HOURS_PER_WEEK), dtype=np.float64)
+        self.settle_hours = settle_hours
+        self.seen_limit = seen_limit
+        # Ids of posts already counted, with their timestamps, oldest first;
+        # posts no newer than the last one forgotten are assumed counted
+        self.seen_posts: "OrderedDict[str, float]" = OrderedDict()
+        self.forgotten_before = float('-inf')
+    @staticmethod
+    def hour_of_week(timestamp: float) -> int:
+        moment = datetime.fromtimestamp(timestamp)
+        return moment.weekday() * 24 + moment.hour
+    def _index(self, content_type: str) -> int:
+        index = self.content_types.get(content_type)
+        if index is None:
+            index = len(self.content_types)
+            self.content_types[content_type] = index
+            self.bins = np.concatenate([self.bins, np.zeros((1, 2, HOURS_PER_WEEK))])
+        return index
+    def _rebase(self, origin: float):
+        if self.origin is not None:
+            self.bins *= math.exp(-self.decay_rate * (origin - self.origin))
+        self.origin = origin
+    def observe(self, content_type: str, timestamp, engagement: float, posts: float = 1.0):
+        """Add one post's engagement in O(1)"""
+        timestamp = to_timestamp(timestamp)
+        if self.origin is None:
+            self.origin = timestamp
+        if self.decay_rate * (timestamp - self.origin) > self.MAX_LOG_SCALE:
+            self._rebase(timestamp)
+        scale = math.exp(self.decay_rate * (timestamp - self.origin))
+        slot = self.hour_of_week(timestamp)
+        for index in {0, self._index(content_type)}:
+            self.bins[index, 0, slot] += engagement * scale
+            self.bins[index, 1, slot] += posts * scale
+        self.latest = max(self.latest, timestamp)
+    def observe_post(self, post: Dict, now=None) -> bool:
+        """Fold in a settled post not counted before; returns False for posts skipped"""
+        timestamp = to_timestamp(post.get('timestamp', post.get('created_at')))
+        now = to_timestamp(now) if now is not None else datetime.now().timestamp()
+        if now - timestamp < self.settle_hours * 3600:
+            # Engagement is still growing; the post is picked up on a later pass
+            return False
+        post_id = str(post.get('id') or post.get('tweet_id') or timestamp)
+        if post_id in self.seen_posts or timestamp <= self.forgotten_before:
+            return False
+        self.observe(post.get('content_type') or post.get('type') or 'general', timestamp, engagement_score(post))
+        self.seen_posts[post_id] = timestamp
+        while len(self.seen_posts) > self.seen_limit:
+            _, forgotten = self.seen_posts.popitem(last=False)
+            self.forgotten_before = max(self.forgotten_before, forgotten)
+        return True
+    def _values(self, content_type: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        index = self.content_types.get(content_type or ALL_CONTENT)
+        if index is None:
+            return np.zeros(HOURS_PER_WEEK), np.zeros(HOURS_PER_WEEK)
+        return self.bins[index, 0], self.bins[index, 1]
+    def _smoothed(self, engagement: np.ndarray, posts: np.ndarray) -> np.ndarray:
+        """Mean engagement per post, shrunk towards the overall mean where data is thin"""
+        total_posts = posts.sum()
+        if not total_posts:
+            return np.zeros_like(engagement)
+        prior_mean = engagement.sum() / total_posts
+        # Stored sums are scaled up from the origin; express the prior posts at the latest scale
+        prior_posts = self.prior_posts * math.exp(self.decay_rate * (self.latest - self.origin))
+        return (engagement + prior_mean * prior_posts) / (posts + prior_posts)
+    def rates(self, content_type: Optional[str] = None) -> np.ndarray:
+        """Expected engagement per post for each of the 168 hours of the week (Monday 00:00 first)"""
+        return self._smoothed(*self._values(content_type))
+    def best_slots(self, content_type: Optional[str] = None, k: int = 3) -> List[Tuple[str, int]]:
+        """Top (day, hour) slots of the week"""
+        rates = self.rates(content_type)
+        return [(DAY_NAMES[slot // 24], int(slot % 24)) for slot in np.argsort(-rates, kind='stable')[:k] if rates[slot] > 0]
+    def best_hours(self, content_type: Optional[str] = None, k: int = 3) -> List[int]:
+        """Top hours of the day across the whole week"""
+        engagement, posts = self._values(content_type)
+        rates = self._smoothed(engagement.reshape(7, 24).sum(axis=0), posts.reshape(7, 24).sum(axis=0))
+        return [int(hour) for hour in np.argsort(-rates, kind='stable')[:k] if rates[hour] > 0]
+    def best_days(self, content_type: Optional[str] = None, k: int = 3) -> List[str]:
+        """Top days of the week"""
+        engagement, posts = self._values(content_type)
+        rates = self._smoothed(engagement.reshape(7, 24).sum(axis=1), posts.reshape(7, 24).sum(axis=1))
+        return [DAY_NAMES[day] for day in np.argsort(-rates, kind='stable')[:k] if rates[day] > 0]
+    def weekly_posts(self, content_type: Optional[str] = None, now: Optional[float] = None) -> float:
+        """Recent posting volume, as decayed posts per week"""
+        _, posts = self._values(content_type)
+        if self.origin is None:
+            return 0.0
+        now = to_timestamp(now) if now is not None else max(self.latest, datetime.now().timestamp())
+        decayed = posts.sum() * math.exp(-self.decay_rate * (now - self.origin))
+        # A steady rate r accumulates to r / decay_rate
+        return float(decayed * self.decay_rate * 7 * 86400)
+    def summary(self, content_type: Optional[str] = None) -> Dict:
+        engagement, posts = self._values(content_type)
+        total_posts = posts.sum()
+        return {
+            'mean_engagement': float(engagement.sum() / total_posts) if total_posts else 0.0,
+            'weekly_posts': self.weekly_posts(content_type)
+        }
+    def save(self, path: Optional[str] = None):
+        """Write the histogram to a .npz file atomically"""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        meta = {
+            'half_life_days': self.half_life_days,
+            'prior_posts': self.prior_posts,
+            'origin': self.origin,
+            'latest': self.latest,
+            'content_types': self.content_types,
+            'settle_hours': self.settle_hours,
+            'seen_limit': self.seen_limit,
+            'seen_posts': list(self.seen_posts.items()),
+            'forgotten_before': self.forgotten_before if self.forgotten_before != float('-inf') else None
+        }
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, bins=self.bins, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+    @classmethod
+    def load(cls, path: str) -> "EngagementHistogram":
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            histogram = cls(meta['half_life_days'], path, meta['prior_posts'])
+            histogram.bins = data['bins'].astype(np.float64)
+        histogram.origin = meta['origin']
+        histogram.latest = meta['latest']
+        histogram.content_types = meta['content_types']
+        histogram.settle_hours = meta.get('settle_hours', histogram.settle_hours)
+        histogram.seen_limit = meta.get('seen_limit', histogram.seen_limit)
+        histogram.seen_posts = OrderedDict((post_id, timestamp) for post_id, timestamp in meta.get('seen_posts', []))
+        if meta.get('forgotten_before') is not None:
+            histogram.forgotten_before = meta['forgotten_before']
+        elif 'seen_posts' not in meta:
+            # Saved before ids were tracked: only posts newer than anything counted are new
+            histogram.forgotten_before = histogram.latest
+        return histogram
+    @classmethod
+    def load_or_create(cls, path: str, half_life_days: float = 30.0) -> "EngagementHistogram":
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except Exception as e:
+                logger.error(f"Error loading engagement histogram from {path}: {e}", exc_info=True)
+        return cls(half_life_days, path)
@@ -0,0 +1,214 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+import logging
+logger = logging.getLogger(__name__)
+# Aggregate vector layout: count, likes, retweets, replies, weighted engagement
+AGGREGATE_FIELDS = ('count', 'likes', 'retweets', 'replies', 'engagement')
+GRANULARITY_SECONDS = {'hour': 3600, 'day': 86400}
+class EngagementStore:
+    """
+    Columnar engagement store keyed by tweet id.
+    Metrics live in NumPy arrays that grow by doubling; batches are ingested
+    with vectorized writes, and per-hour, per-day and per-content-type totals
+    are maintained incrementally so window queries never rescan history.
+    At most `max_rows` tweets are kept; past that the oldest are evicted
+    (and retracted from the aggregates) in one compaction pass.
+    """
+    COLUMNS = ('timestamps', 'likes', 'retweets', 'replies', 'views', 'followers', 'content_types')
+    def __init__(self, initial_capacity: int = 1024, base_follower_count: int = 1000, max_rows: int = 100_000):
+        self.base_follower_count = base_follower_count
+        self.max_rows = max_rows
+        self.size = 0
+        self._capacity = initial_capacity
+        self.timestamps = np.zeros(initial_capacity, dtype=np.float64)
+        self.likes = np.zeros(initial_capacity, dtype=np.int64)
+        self.retweets = np.zeros(initial_capacity, dtype=np.int64)
+        self.replies = np.zeros(initial_capacity, dtype=np.int64)
+        self.views = np.zeros(initial_capacity, dtype=np.int64)
+        self.followers = np.zeros(initial_capacity, dtype=np.int64)
+        self.content_types = np.zeros(initial_capacity, dtype=np.int32)
+        self.tweet_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self.content_type_names: List[str] = []
+        self._content_type_codes: Dict[str, int] = {}
+        self.aggregates: Dict[str, Dict[int, np.ndarray]] = {
+            'hour': {},
+            'day': {},
+            'content_type': {}
+        }
+    def __len__(self) -> int:
+        return self.size
+    def _grow(self, required: int):
+        if required <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < required:
+            capacity *= 2
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+        self._capacity = capacity
+    def _evict(self, count: int):
+        """Drop the `count` oldest tweets and compact the columns"""
+        if count <= 0:
+            return
+        order = np.argsort(self.timestamps[:self.size], kind='stable')
+        self._update_aggregates(order[:count], sign=-1)
+        keep = np.sort(order[count:])
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column[:keep.size] = column[keep]
+        self.tweet_ids = [self.tweet_ids[row] for row in keep.tolist()]
+        self._rows = {tweet_id: row for row, tweet_id in enumerate(self.tweet_ids)}
+        self.size = keep.size
+        for buckets in self.aggregates.values():
+            for key in [key for key, values in buckets.items() if values[0] == 0]:
+                del buckets[key]
+    def _content_type_code(self, content_type: str) -> int:
+        if content_type not in self._content_type_codes:
+            self._content_type_codes[content_type] = len(self.content_type_names)
+            self.content_type_names.append(content_type)
+        return self._content_type_codes[content_type]
+    @staticmethod
+    def _timestamp(value) -> float:
+        if value is None:
+            return datetime.now().timestamp()
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, datetime):
+            return value.timestamp()
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    @staticmethod
+    def _metric(record: Dict, *names: str) -> int:
+        """Read a metric from either flat tweepy-style or nested scraper-style records"""
+        nested = record.get('metrics', {})
+        for name in names:
+            if name in record:
+                return int(record[name] or 0)
+            if name in nested:
+                return int(nested[name] or 0)
+        return 0
+    def ingest(self, records: Iterable[Dict]) -> np.ndarray:
+        """Insert or update a batch of tweets; returns their row indices"""
+        records = list(records)
+        if not records:
+            return np.zeros(0, dtype=np.int64)
+        n = len(records)
+        timestamps = np.fromiter((self._timestamp(r.get('created_at', r.get('timestamp'))) for r in records), np.float64, n)
+        likes = np.fromiter((self._metric(r, 'like_count', 'likes') for r in records), np.int64, n)
+        retweets = np.fromiter((self._metric(r, 'retweet_count', 'retweets') for r in records), np.int64, n)
+        replies = np.fromiter((self._metric(r, 'reply_count', 'replies') for r in records), np.int64, n)
+        views = np.fromiter((self._metric(r, 'view_count', 'views') for r in records), np.int64, n)
+        followers = np.fromiter((int(r.get('follower_count', 0) or 0) for r in records), np.int64, n)
+        content_types = np.fromiter(
+            (self._content_type_code(r.get('content_type', 'unknown')) for r in records), np.int32, n
+        )
+        new_tweets = len({str(r['id']) for r in records} - self._rows.keys())
+        if self.size + new_tweets > self.max_rows:
+            # Evict a little extra so compaction does not run on every batch
+            self._evict(min(self.size, self.size + new_tweets - self.max_rows + self.max_rows // 10))
+        # Assign rows: existing tweets are updated in place, new ones appended
+        rows = np.empty(n, dtype=np.int64)
+        next_row = self.size
+        for i, record in enumerate(records):
+            tweet_id = str(record['id'])
+            row = self._rows.get(tweet_id)
+            if row is None:
+                row = next_row
+                next_row += 1
+                self._rows[tweet_id] = row
+                self.tweet_ids.append(tweet_id)
+            rows[i] = row
+        # Duplicate ids within one batch: the last occurrence wins
+        rows_reversed = rows[::-1]
+        _, last_positions = np.unique(rows_reversed, return_index=True)
+        keep = np.sort(n - 1 - last_positions)
+        rows = rows[keep]
+        is_new = rows >= self.size
+        timestamps, likes, retweets, replies = timestamps[keep], likes[keep], retweets[keep], replies[keep]
+        views, followers, content_types = views[keep], followers[keep], content_types[keep]
+        self._grow(next_row)
+        existing = rows[~is_new]
+        if existing.size:
+            # Retract the old values so aggregates reflect the update
+            self._update_aggregates(existing, sign=-1)
+        self.size = next_row
+        self.timestamps[rows] = timestamps
+        self.likes[rows] = likes
+        self.retweets[rows] = retweets
+        self.replies[rows] = replies
+        self.views[rows] = views
+        self.followers[rows] = followers
+        self.content_types[rows] = content_types
+        self._update_aggregates(rows, sign=1)
+        return rows
+    def _engagement(self, rows: np.ndarray) -> np.ndarray:
+        return self.likes[rows] + self.retweets[rows] * 2 + self.replies[rows] * 3
+    def _update_aggregates(self, rows: np.ndarray, sign: int):
+        """Add (or retract) the rows' metrics into every rolling aggregate"""
+        values = np.stack([
+            np.ones(rows.size, dtype=np.int64),
+            self.likes[rows],
+            self.retweets[rows],
+            self.replies[rows],
+            self._engagement(rows)
+        ], axis=1) * sign
+        keys_by_granularity = {
+            'hour': (self.timestamps[rows] // GRANULARITY_SECONDS['hour']).astype(np.int64),
+            'day': (self.timestamps[rows] // GRANULARITY_SECONDS['day']).astype(np.int64),
+            'content_type': self.content_types[rows].astype(np.int64)
+        }
+        for granularity, keys in keys_by_granularity.items():
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            sums = np.zeros((unique_keys.size, len(AGGREGATE_FIELDS)), dtype=np.int64)
+            np.add.at(sums, inverse, values)
+            buckets = self.aggregates[granularity]
+            for key, total in zip(unique_keys.tolist(), sums):
+                if key in buckets:
+                    buckets[key] += total
+                else:
+                    buckets[key] = total.copy()
+    def engagement_rates(self, follower_count: Optional[int] = None, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vectorized engagement rate for the given rows, or for every stored tweet"""
+        rows = np.arange(self.size) if rows is None else np.asarray(rows)
+        if follower_count is not None:
+            denominator = np.full(rows.size, follower_count if follower_count > 0 else self.base_follower_count)
+        else:
+            denominator = np.where(self.followers[rows] > 0, self.followers[rows], self.base_follower_count)
+        return self._engagement(rows) / denominator
+    def engagement_rate(self, tweet_id: str, follower_count: Optional[int] = None) -> float:
+        """Engagement rate of one stored tweet"""
+        row = self._rows[str(tweet_id)]
+        followers = follower_count or int(self.followers[row]) or self.base_follower_count
+        return float(self._engagement(np.array([row]))[0] / followers)
+    def window(self, granularity: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict:
+        """Totals over the hour or day buckets between start and end"""
+        seconds = GRANULARITY_SECONDS[granularity]
+        low = int(start.timestamp() // seconds) if start else None
+        high = int(end.timestamp() // seconds) if end else None
+        total = np.zeros(len(AGGREGATE_FIELDS), dtype=np.int64)
+        for key, values in self.aggregates[granularity].items():
+            if (low is None or key >= low) and (high is None or key <= high):
+                total += values
+        return self._as_dict(total)
+    def series(self, granularity: str) -> List[Tuple[datetime, Dict]]:
+        """Per-bucket totals in time order"""
+        seconds = GRANULARITY_SECONDS[granularity]
+        return [
+            (datetime.fromtimestamp(key * seconds), self._as_dict(values))
+            for key, values in sorted(self.aggregates[granularity].items())
+        ]
+    def by_content_type(self) -> Dict[str, Dict]:
+        """Totals per content type"""
+        return {
+            self.content_type_names[code]: self._as_dict(values)
+            for code, values in self.aggregates['content_type'].items()
+        }
+    @staticmethod
+    def _as_dict(values: np.ndarray) -> Dict:
+        totals = dict(zip(AGGREGATE_FIELDS, (int(v) for v in values)))
+        totals['mean_engagement'] = totals['engagement'] / totals['count'] if totals['count'] else 0.0
+        return totals
@@ -0,0 +1,172 @@
+from typing import Dict, List, Optional
+from collections import deque
+from datetime import datetime
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+logger = logging.getLogger(__name__)
+# Categories that fire on every cycle; tokens per second and burst size
+DEFAULT_RATE_LIMITS = {
+    'TREND': (1.0, 10),
+    'SYSTEM': (1.0, 5)
+}
+class CategoryRateLimiter:
+    """Token bucket per log category"""
+    def __init__(self, rate_limits: Dict[str, tuple]):
+        self.rate_limits = rate_limits
+        self.tokens = {category: float(burst) for category, (_, burst) in rate_limits.items()}
+        self.last_refill = {category: time.monotonic() for category in rate_limits}
+    def allow(self, category: str) -> bool:
+        """Whether a record of this category may be emitted now"""
+        if category not in self.rate_limits:
+            return True
+        rate, burst = self.rate_limits[category]
+        now = time.monotonic()
+        elapsed = now - self.last_refill[category]
+        self.last_refill[category] = now
+        self.tokens[category] = min(burst, self.tokens[category] + elapsed * rate)
+        if self.tokens[category] >= 1:
+            self.tokens[category] -= 1
+            return True
+        return False
+class LogPipeline:
+    """
+    Non-blocking structured log sink with the LogManager `add_log` interface.
+    Records land in an in-memory ring buffer for the display and are handed to
+    a background thread that writes them in batches to a rotating JSON Lines file.
+    """
+    def __init__(self, log_path: str = 'logs/agent.jsonl',
+                 buffer_size: int = 1000,
+                 batch_size: int = 200,
+                 flush_interval: float = 1.0,
+                 max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5,
+                 rate_limits: Optional[Dict[str, tuple]] = None):
+        self.log_path = log_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.logs = deque(maxlen=buffer_size)
+        self.rate_limiter = CategoryRateLimiter(
+            DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        )
+        # Incremented by callers and swapped out by the writer thread
+        self.suppressed: Dict[str, int] = {}
+        self._suppressed_lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._stop_event = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._file = None
+    def add_log(self, category: str, message: str):
+        """Record a log entry without blocking the caller"""
+        if not self.rate_limiter.allow(category):
+            with self._suppressed_lock:
+                self.suppressed[category] = self.suppressed.get(category, 0) + 1
+            return
+        record = {
+            'timestamp': datetime.now().isoformat(),
+            'category': category,
+            'message': message
+        }
+        self.logs.append(record)
+        self._queue.put(record)
+        if category == 'ERROR':
+            # Errors are rare enough to also surface through standard logging
+            logger.error(message)
+    def get_recent_logs(self, limit: Optional[int] = None, category: Optional[str] = None) -> List[Dict]:
+        """Get buffered records, newest last"""
+        records = [r for r in self.logs if category is None or r['category'] == category]
+        return records[-limit:] if limit else records
+    def start(self):
+        """Start the background writer thread"""
+        if self._writer and self._writer.is_alive():
+            return
+        self._stop_event.clear()
+        self._writer = threading.Thread(target=self._writer_loop, name='log-pipeline-writer', daemon=True)
+        self._writer.start()
+    def stop(self, timeout: float = 5.0):
+        """Stop the writer after flushing everything queued so far; blocks, so async callers use `aclose`"""
+        self._stop_event.set()
+        if self._writer:
+            self._writer.join(timeout)
+            if self._writer.is_alive():
+                # Still draining; closing the file under it would lose the rest
+                logger.warning(f"Log writer did not finish within {timeout}s")
+                return
+            self._writer = None
+        else:
+            # Never started; flush synchronously so nothing is lost
+            self._drain()
+        self._close_file()
+    async def aclose(self, timeout: float = 5.0):
+        """Stop the writer without blocking the event loop"""
+        await asyncio.to_thread(self.stop, timeout)
+    def _writer_loop(self):
+        """Drain the queue in batches until stopped"""
+        while not self._stop_event.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write_batch(self._collect_batch([first]))
+        self._drain()
+    def _drain(self):
+        """Write out whatever is still queued"""
+        batch = self._collect_batch([])
+        while batch:
+            self._write_batch(batch)
+            batch = self._collect_batch([])
+    def _collect_batch(self, batch: List[Dict]) -> List[Dict]:
+        """Pull queued records without waiting, up to the batch size"""
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    def _write_batch(self, batch: List[Dict]):
+        """Append a batch of records as JSON Lines in a single write"""
+        with self._suppressed_lock:
+            suppressed, self.suppressed = self.suppressed, {}
+        if suppressed:
+            batch.append({
+                'timestamp': datetime.now().isoformat(),
+                'category': 'LOG',
+                'message': 'Suppressed records by category',
+                'suppressed': suppressed
+            })
+        try:
+            if self._file is None:
+                self._open_file()
+            self._file.write(''.join(json.dumps(record, default=str) + '\n' for record in batch))
+            self._file.flush()
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            logger.error(f"Error writing log batch: {e}", exc_info=True)
+    def _open_file(self):
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.log_path, 'a', encoding='utf-8')
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    def _rotate(self):
+        """Rotate log files the same way logging.handlers.RotatingFileHandler does"""
+        self._close_file()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.log_path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.log_path, f"{self.log_path}.1")
+        else:
+            os.remove(self.log_path)
+        self._open_file()
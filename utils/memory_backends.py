@@ -0,0 +1,273 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from abc import ABC, abstractmethod
+from datetime import datetime
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import uuid
+import logging
+logger = logging.getLogger(__name__)
+class MemoryBackend(ABC):
+    """
+    Storage interface behind the agent's memory.
+    Method names match MemorySystem, so either can be handed to ActionExecutor,
+    TwitterManager or TieredMemory. Implementations only need the bulk
+    primitives; single-item and typed helpers are built on them.
+    """
+    @abstractmethod
+    async def store_memories(self, memories: List[Dict]) -> List[str]:
+        """Insert memories in one round-trip; returns their ids"""
+    @abstractmethod
+    async def get_memories(self, query: Dict, limit: int = 100) -> List[Dict]:
+        """Memories matching `type`, `user`, `since` and `until`, newest first"""
+    @abstractmethod
+    async def get_relevant_memories(self, themes: List[str], limit: int = 10) -> List[Dict]:
+        """Memories most related to the given themes"""
+    @abstractmethod
+    async def get_conversation_history(self, target: str, limit: int = 20) -> List[Dict]:
+        """Interactions with a user, oldest first"""
+    async def close(self):
+        """Release the backend's resources"""
+    async def store_memory(self, memory: Dict) -> str:
+        return (await self.store_memories([memory]))[0]
+    async def store_action_results(self, results: List[Dict]) -> List[str]:
+        return await self.store_memories([
+            {**result, 'type': 'action_result', 'action_type': result.get('type'),
+             'user': result.get('metadata', {}).get('target')}
+            for result in results
+        ])
+    async def store_action_result(self, result: Dict) -> str:
+        return (await self.store_action_results([result]))[0]
+    async def store_tweets(self, tweets: List[Dict]) -> List[str]:
+        return await self.store_memories([
+            {**tweet, 'type': 'tweet', 'tweet_type': tweet.get('type'),
+             'user': tweet.get('username') or tweet.get('author')}
+            for tweet in tweets
+        ])
+    async def store_tweet(self, tweet: Dict) -> str:
+        return (await self.store_tweets([tweet]))[0]
+    async def store_mentions(self, mentions: List[Dict]) -> List[str]:
+        return await self.store_memories([
+            {**mention, 'type': 'mention', 'user': mention.get('username') or mention.get('author')}
+            for mention in mentions
+        ])
+    async def store_mention(self, mention: Dict) -> str:
+        return (await self.store_mentions([mention]))[0]
+    async def get_tweets(self, limit: int = 1000) -> List[Dict]:
+        return await self.get_memories({'type': 'tweet'}, limit)
+def _timestamp(value: Any) -> float:
+    if value is None:
+        return datetime.now().timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return datetime.now().timestamp()
+class SQLiteMemoryBackend(MemoryBackend):
+    """
+    Embedded memory store in a single SQLite file.
+    Runs in WAL mode with separate read and write connections, so reads never
+    wait on the writer; inserts go through executemany in one transaction,
+    and lookups use indexes on type, user and timestamp. The fixed SQL strings are compiled once and reused from
+    sqlite3's statement cache. Calls run in a worker thread to keep the
+    event loop free. Relevance search uses the vector index when an `embed`
+    function is supplied, otherwise SQLite full-text search.
+    """
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS memories (
+            rowid INTEGER PRIMARY KEY,
+            id TEXT UNIQUE NOT NULL,
+            type TEXT NOT NULL,
+            user TEXT,
+            timestamp REAL NOT NULL,
+            content TEXT NOT NULL DEFAULT '',
+            data TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_memories_type_timestamp ON memories (type, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_memories_user_timestamp ON memories (user, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories (timestamp)"
+    )
+    FTS_SCHEMA = (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(content, content='memories', content_rowid='rowid')",
+        """CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN
+            INSERT INTO memories_fts (rowid, content) VALUES (new.rowid, new.content);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN
+            INSERT INTO memories_fts (memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS memories_fts_update AFTER UPDATE ON memories BEGIN
+            INSERT INTO memories_fts (memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            INSERT INTO memories_fts (rowid, content) VALUES (new.rowid, new.content);
+        END"""
+    )
+    INSERT = """INSERT INTO memories (id, type, user, timestamp, content, data) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET type = excluded.type, user = excluded.user,
+        timestamp = excluded.timestamp, content = excluded.content, data = excluded.data"""
+    def __init__(self, path: str = 'data/memory.db', embed: Optional[Callable[[List[str]], Any]] = None,
+                 vector_index_path: Optional[str] = None):
+        self.path = path
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = self._connect()
+        self._write_lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self.full_text = self._create_full_text_index()
+        # An in-memory database is private to its connection, so it cannot have a reader
+        self._read_conn = self._conn if path == ':memory:' else self._connect()
+        self._read_lock = self._write_lock if path == ':memory:' else threading.Lock()
+        # The vector index is shared by both sides and guarded on its own
+        self._index_lock = threading.Lock()
+        self.embed = embed
+        self.vector_index = None
+        if embed is not None:
+            from utils.vector_index import VectorIndex
+            probe = embed(['probe'])
+            index_path = vector_index_path or (None if path == ':memory:' else f"{path}.vectors")
+            if index_path:
+                self.vector_index = VectorIndex.load_or_create(index_path, len(probe[0]))
+            else:
+                self.vector_index = VectorIndex(len(probe[0]))
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    def _create_full_text_index(self) -> bool:
+        try:
+            for statement in self.FTS_SCHEMA:
+                self._conn.execute(statement)
+            return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite full-text search unavailable, falling back to LIKE: {e}")
+            return False
+    @staticmethod
+    def _run(lock: threading.Lock, fn: Callable, *args):
+        def locked():
+            with lock:
+                return fn(*args)
+        return asyncio.to_thread(locked)
+    def _write(self, fn: Callable, *args):
+        return self._run(self._write_lock, fn, *args)
+    def _read(self, fn: Callable, *args):
+        return self._run(self._read_lock, fn, *args)
+    @staticmethod
+    def _row(memory: Dict) -> tuple:
+        memory_id = str(memory.get('id') or memory.get('_id') or uuid.uuid4().hex)
+        content = memory.get('content') or memory.get('text') or ''
+        data = json.dumps(memory, default=str)
+        return (
+            memory_id,
+            memory.get('type', 'memory'),
+            memory.get('user'),
+            _timestamp(memory['timestamp'] if memory.get('timestamp') is not None else memory.get('created_at')),
+            str(content),
+            data
+        )
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict:
+        memory = json.loads(row['data'])
+        memory.update({'id': row['id'], 'type': row['type'], 'content': row['content']})
+        return memory
+    def _insert(self, rows: List[tuple]):
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(self.INSERT, rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+    async def store_memories(self, memories: List[Dict]) -> List[str]:
+        if not memories:
+            return []
+        rows = [self._row(memory) for memory in memories]
+        vectors = None
+        if self.vector_index is not None:
+            # Embed first, so a failure leaves no rows without vectors
+            vectors = await asyncio.to_thread(self.embed, [row[4] for row in rows])
+        await self._write(self._insert, rows)
+        if vectors is not None:
+            await self._run(self._index_lock, self.vector_index.add_batch, [row[0] for row in rows], vectors)
+        return [row[0] for row in rows]
+    def _select(self, sql: str, params: Iterable) -> List[Dict]:
+        return [self._decode(row) for row in self._read_conn.execute(sql, tuple(params))]
+    async def get_memories(self, query: Dict, limit: int = 100) -> List[Dict]:
+        clauses, params = [], []
+        for column in ('type', 'user'):
+            if query.get(column) is not None:
+                clauses.append(f"{column} = ?")
+                params.append(query[column])
+        if query.get('since') is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_timestamp(query['since']))
+        if query.get('until') is not None:
+            clauses.append("timestamp <= ?")
+            params.append(_timestamp(query['until']))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT id, type, content, data FROM memories {where} ORDER BY timestamp DESC LIMIT ?"
+        return await self._read(self._select, sql, params + [limit])
+    def _fetch_by_ids(self, ids: List[str]) -> List[Dict]:
+        placeholders = ','.join('?' * len(ids))
+        found = {
+            memory['id']: memory
+            for memory in self._select(f"SELECT id, type, content, data FROM memories WHERE id IN ({placeholders})", ids)
+        }
+        return [found[memory_id] for memory_id in ids if memory_id in found]
+    async def get_relevant_memories(self, themes: List[str], limit: int = 10) -> List[Dict]:
+        themes = [theme for theme in themes if theme]
+        if not themes:
+            return []
+        if self.vector_index is not None:
+            query = await asyncio.to_thread(self.embed, [' '.join(themes)])
+            hits = await self._run(self._index_lock, self.vector_index.search, query[0], limit)
+            return await self._read(self._fetch_by_ids, [memory_id for memory_id, _ in hits])
+        if self.full_text:
+            # Quote each theme so punctuation is not parsed as FTS syntax
+            match = ' OR '.join('"' + theme.replace('"', '""') + '"' for theme in themes)
+            sql = """SELECT m.id, m.type, m.content, m.data FROM memories_fts f
+                JOIN memories m ON m.rowid = f.rowid
+                WHERE memories_fts MATCH ? ORDER BY bm25(memories_fts), m.timestamp DESC LIMIT ?"""
+            return await self._read(self._select, sql, [match, limit])
+        clauses = ' OR '.join('content LIKE ?' for _ in themes)
+        sql = f"SELECT id, type, content, data FROM memories WHERE {clauses} ORDER BY timestamp DESC LIMIT ?"
+        return await self._read(self._select, sql, [f"%{theme}%" for theme in themes] + [limit])
+    async def get_conversation_history(self, target: str, limit: int = 20) -> List[Dict]:
+        sql = """SELECT id, type, content, data FROM memories
+            WHERE user = ? AND type IN ('action_result', 'mention')
+            ORDER BY timestamp DESC LIMIT ?"""
+        history = await self._read(self._select, sql, [target, limit])
+        return list(reversed(history))
+    def _close(self):
+        with self._index_lock:
+            if self.vector_index is not None and self.vector_index.path:
+                self.vector_index.save()
+        with self._read_lock:
+            if self._read_conn is not self._conn:
+                self._read_conn.close()
+        self._conn.close()
+    async def close(self):
+        await self._write(self._close)
+def create_memory_backend(kind: Optional[str] = None, path: Optional[str] = None, **kwargs):
+    """Build the memory store selected by MEMORY_BACKEND ('mongodb' or 'sqlite') in config.py"""
+    # Imported here so processes started by the supervisor read their own environment
+    from config import config
+    kind = (kind or config['MEMORY_BACKEND']).lower()
+    if kind == 'sqlite':
+        if 'embed' not in kwargs and config['EMBEDDING_SERVICE_SOCKET']:
+            # Use the host's shared embedding model rather than loading one here
+            from utils.embedding_service import EmbeddingClient
+            kwargs['embed'] = EmbeddingClient(config['EMBEDDING_SERVICE_SOCKET']).encode
+        return SQLiteMemoryBackend(path or config['MEMORY_DB_PATH'], **kwargs)
+    if kind == 'mongodb':
+        from utils.memory_system import MemorySystem
+        return MemorySystem(**kwargs)
+    raise ValueError(f"Unknown memory backend: {kind}")
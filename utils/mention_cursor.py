@@ -0,0 +1,87 @@
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from collections import OrderedDict
+import asyncio
+import json
+import os
+import logging
+logger = logging.getLogger(__name__)
+class MentionCursor:
+    """
+    Incremental mention polling from a persisted since_id cursor.
+    `fetch_new` pages backwards from the newest mention with `max_id` until
+    it reaches the cursor, so a burst larger than one page is not skipped.
+    Recently handled ids are remembered so overlapping pages are skipped.
+    The cursor only moves in `commit`, once the caller has stored the
+    mentions, and is written atomically.
+    """
+    def __init__(self, fetch: Callable[..., Awaitable[List[Dict]]], state_path: str,
+                 page_size: int = 100, max_pages: int = 20, seen_limit: int = 5000):
+        self.fetch = fetch
+        self.state_path = state_path
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.seen_limit = seen_limit
+        self.since_id, self.seen = self._load()
+    async def fetch_new(self) -> List[Dict]:
+        """Every unseen mention newer than the cursor, newest first"""
+        mentions, batch_ids, max_id = [], set(), None
+        for _ in range(self.max_pages):
+            page = await self.fetch(max_results=self.page_size, since_id=self.since_id, max_id=max_id) or []
+            for mention in page:
+                mention_id = str(mention['id'])
+                if mention_id in self.seen or mention_id in batch_ids:
+                    continue
+                if self.since_id is not None and int(mention_id) <= int(self.since_id):
+                    continue
+                batch_ids.add(mention_id)
+                mentions.append(mention)
+            # The bridge stops at since_id, so a short page means the gap is closed
+            if len(page) < self.page_size:
+                break
+            oldest = min(int(mention['id']) for mention in page)
+            if self.since_id is not None and oldest <= int(self.since_id):
+                break
+            max_id = str(oldest - 1)
+        else:
+            logger.warning(f"Mention catch-up stopped after {self.max_pages} pages; older mentions were skipped")
+        return sorted(mentions, key=lambda mention: int(mention['id']), reverse=True)
+    async def commit(self, mention_ids: Iterable[str]):
+        """Mark mentions handled and advance the cursor past the newest"""
+        mention_ids = [str(mention_id) for mention_id in mention_ids]
+        if not mention_ids:
+            return
+        for mention_id in mention_ids:
+            self.seen[mention_id] = None
+        while len(self.seen) > self.seen_limit:
+            self.seen.popitem(last=False)
+        # Snowflake ids increase over time, so the largest is the newest
+        newest = max(int(mention_id) for mention_id in mention_ids)
+        if self.since_id is None or newest > int(self.since_id):
+            self.since_id = str(newest)
+        await self._save()
+    def _load(self):
+        """Load the persisted cursor and seen ids"""
+        try:
+            if os.path.exists(self.state_path):
+                with open(self.state_path, 'r') as f:
+                    state = json.load(f)
+                return state.get('since_id'), OrderedDict((mention_id, None) for mention_id in state.get('seen', []))
+        except Exception as e:
+            logger.error(f"Error loading mention state: {e}", exc_info=True)
+        return None, OrderedDict()
+    @staticmethod
+    def _write(path: str, snapshot: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(snapshot)
+        os.replace(tmp_path, path)
+    async def _save(self):
+        """Persist the cursor without blocking the event loop"""
+        state = {'since_id': self.since_id, 'seen': list(self.seen)}
+        try:
+            await asyncio.to_thread(self._write, self.state_path, json.dumps(state))
+        except Exception as e:
+            logger.error(f"Error saving mention state: {e}", exc_info=True)
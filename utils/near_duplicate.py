@@ -0,0 +1,142 @@
+from typing import Dict, Hashable, List, Optional, Tuple
+from array import array
+import os
+import pickle
+import random
+import re
+import zlib
+import logging
+logger = logging.getLogger(__name__)
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+NON_WORD = re.compile(r"[^\w\s]+")
+WHITESPACE = re.compile(r"\s+")
+class MinHashLSH:
+    """
+    Near-duplicate index over short texts: MinHash signatures of character
+    shingles, bucketed by LSH bands so lookups only touch colliding posts.
+    With 16 bands of 8 rows, pairs above ~0.7 Jaccard similarity collide with
+    high probability and dissimilar posts are almost never compared.
+    """
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self.signatures: Dict[Hashable, array] = {}
+        self.buckets: List[Dict[int, List[Hashable]]] = [{} for _ in range(bands)]
+    def __len__(self) -> int:
+        return len(self.signatures)
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.signatures
+    def _shingles(self, text: str) -> set:
+        """Character shingles of normalized text"""
+        normalized = WHITESPACE.sub(" ", NON_WORD.sub("", text.lower())).strip()
+        if len(normalized) <= self.shingle_size:
+            return {zlib.crc32(normalized.encode('utf-8'))} if normalized else set()
+        return {
+            zlib.crc32(normalized[i:i + self.shingle_size].encode('utf-8'))
+            for i in range(len(normalized) - self.shingle_size + 1)
+        }
+    def signature(self, text: str) -> array:
+        """MinHash signature of a text"""
+        shingles = self._shingles(text)
+        if not shingles:
+            return array('I', [MAX_HASH] * self.num_perm)
+        return array('I', [
+            min((a * shingle + b) % MERSENNE_PRIME for shingle in shingles) & MAX_HASH
+            for a, b in self.permutations
+        ])
+    def _band_keys(self, signature: array) -> List[int]:
+        return [
+            hash(tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+    def add(self, key: Hashable, text: str):
+        """Index a text under a key"""
+        self.add_signature(key, self.signature(text))
+    def add_signature(self, key: Hashable, signature: array):
+        """Index a signature computed earlier, e.g. in a worker thread"""
+        if key in self.signatures:
+            self.remove(key)
+        self.signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self.buckets[band].setdefault(band_key, []).append(key)
+    def remove(self, key: Hashable):
+        """Remove a text from the index"""
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self.buckets[band].get(band_key, [])
+            if key in bucket:
+                bucket.remove(key)
+            if not bucket:
+                self.buckets[band].pop(band_key, None)
+    def query(self, text: str, threshold: float = 0.0) -> List[Tuple[Hashable, float]]:
+        """Indexed texts colliding with `text`, with estimated Jaccard similarity, most similar first"""
+        signature = self.signature(text)
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates.update(self.buckets[band].get(band_key, ()))
+        matches = []
+        for key in candidates:
+            other = self.signatures[key]
+            similarity = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+            if similarity >= threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda x: x[1], reverse=True)
+    def is_duplicate(self, text: str, threshold: float = 0.7) -> bool:
+        """Whether an indexed text is at least `threshold` similar to `text`"""
+        return bool(self.query(text, threshold))
+    def snapshot(self) -> Dict:
+        """State for `write_snapshot`; copies the signature table so the index can change meanwhile"""
+        return {
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'shingle_size': self.shingle_size,
+            'permutations': self.permutations,
+            'signatures': dict(self.signatures)
+        }
+    @staticmethod
+    def write_snapshot(state: Dict, path: str):
+        """Write a snapshot atomically; safe to call from a worker thread"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    def save(self, path: str):
+        """Persist signatures; buckets are rebuilt on load"""
+        self.write_snapshot(self.snapshot(), path)
+    @classmethod
+    def load(cls, path: str) -> "MinHashLSH":
+        """Load an index written by `save`"""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        index = cls(state['num_perm'], state['bands'], state['shingle_size'])
+        index.permutations = state['permutations']
+        for key, signature in state['signatures'].items():
+            index.signatures[key] = signature
+            for band, band_key in enumerate(index._band_keys(signature)):
+                index.buckets[band].setdefault(band_key, []).append(key)
+        logger.info(f"Loaded near-duplicate index with {len(index)} posts from {path}")
+        return index
+    @classmethod
+    def load_or_create(cls, path: Optional[str], **kwargs) -> "MinHashLSH":
+        """Load an index if a snapshot exists, otherwise start empty"""
+        if path and os.path.exists(path):
+            try:
+                return cls.load(path)
+            except Exception as e:
+                logger.error(f"Error loading near-duplicate index: {e}", exc_info=True)
+        return cls(**kwargs)
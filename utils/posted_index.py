@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+from utils.near_duplicate import MinHashLSH
+logger = logging.getLogger(__name__)
+class PostedIndex:
+    """
+    Near-duplicate index of everything a character has posted, keyed by tweet id.
+    Posts are indexed as they are published, so a later generation repeating
+    one is caught. The snapshot is rewritten every `save_every` posts and on
+    `close()`: the signature table is copied on the event loop and written
+    atomically from a worker thread, so posting never pays for the whole index.
+    """
+    def __init__(self, path: str, threshold: float = 0.7, save_every: int = 50):
+        self.path = path
+        self.threshold = threshold
+        self.save_every = save_every
+        self.index = MinHashLSH.load_or_create(path)
+        self.unsaved = 0
+        self.seeded = False
+        self._save_lock: Optional[asyncio.Lock] = None
+    def __len__(self) -> int:
+        return len(self.index)
+    def is_duplicate(self, content: str) -> bool:
+        """Whether content is a near-duplicate of something already posted"""
+        return bool(content.strip()) and self.index.is_duplicate(content, self.threshold)
+    def drop_duplicates(self, tweets: List[str]) -> List[str]:
+        """Tweets that do not repeat an earlier post"""
+        fresh = [tweet for tweet in tweets if not self.is_duplicate(tweet)]
+        if len(fresh) < len(tweets):
+            logger.warning(f"Dropped {len(tweets) - len(fresh)} tweets that repeat earlier posts")
+        return fresh
+    async def record(self, content: str, tweet_id: Optional[str] = None):
+        """Index a post once it has actually been published"""
+        if not content.strip():
+            return
+        self.index.add(tweet_id or f"{datetime.now().timestamp()}:{len(self.index)}", content)
+        self.unsaved += 1
+        if self.unsaved >= self.save_every:
+            await self.save()
+    async def seed(self, tweets: List[Dict]) -> int:
+        """Index stored tweets missing from the snapshot; signatures are computed off the event loop"""
+        pending = {}
+        for tweet in tweets:
+            content = tweet.get('content') or tweet.get('text') or ''
+            if tweet.get('id') and tweet['id'] not in self.index and content.strip():
+                pending[tweet['id']] = content
+        if not pending:
+            return 0
+        signatures = await asyncio.to_thread(lambda: [self.index.signature(text) for text in pending.values()])
+        for key, signature in zip(pending, signatures):
+            self.index.add_signature(key, signature)
+        self.unsaved += len(pending)
+        logger.info(f"Seeded near-duplicate index with {len(pending)} stored tweets")
+        return len(pending)
+    async def save(self):
+        """Write the snapshot if anything changed since the last save"""
+        if self._save_lock is None:
+            self._save_lock = asyncio.Lock()
+        async with self._save_lock:
+            if not self.unsaved:
+                return
+            state, changes, self.unsaved = self.index.snapshot(), self.unsaved, 0
+            try:
+                await asyncio.to_thread(MinHashLSH.write_snapshot, state, self.path)
+            except Exception as e:
+                # Retried on the next save
+                self.unsaved += changes
+                logger.error(f"Error saving near-duplicate index: {e}", exc_info=True)
+    async def close(self):
+        await self.save()
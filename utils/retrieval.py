@@ -0,0 +1,50 @@
+from typing import Any, Awaitable, Dict, Optional, Tuple
+import asyncio
+import inspect
+import logging
+from utils.agent_metrics import AgentMetrics
+logger = logging.getLogger(__name__)
+class Retriever:
+    """
+    Runs the independent lookups that feed a prompt concurrently, each within
+    its own timeout; a slow or failing source yields its default instead of
+    delaying generation. A lookup that needs a shared resource (e.g. 'db')
+    holds a scheduler slot only for its own run, and waiting for that slot
+    counts against its timeout, so lookups without it never queue behind it.
+    Latencies are recorded as `retrieval.<name>` tasks and timeouts and
+    errors as `retrieval.<name>.timeout` / `retrieval.<name>` exceptions.
+    """
+    def __init__(self, metrics: AgentMetrics, scheduler=None, timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: float = 1.0):
+        self.metrics = metrics
+        self.scheduler = scheduler
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+    async def retrieve(self, name: str, lookup: Awaitable, default: Any, resources: Tuple[str, ...] = ()) -> Any:
+        """Await one lookup within its timeout, falling back to a default"""
+        timeout = self.timeouts.get(name, self.default_timeout)
+        try:
+            with self.metrics.time_task(f'retrieval.{name}'):
+                return await asyncio.wait_for(self._holding(lookup, resources), timeout)
+        except asyncio.TimeoutError:
+            self.metrics.record_exception(f'retrieval.{name}.timeout')
+            logger.warning(f"Retrieval of {name} timed out after {timeout}s; continuing without it")
+        except Exception as e:
+            self.metrics.record_exception(f'retrieval.{name}')
+            logger.error(f"Error retrieving {name}: {e}", exc_info=True)
+        return default
+    async def gather(self, retrievals: Dict[str, Tuple]) -> Dict[str, Any]:
+        """Run lookups concurrently; each is given as (awaitable, default) or (awaitable, default, resources)"""
+        names = list(retrievals)
+        results = await asyncio.gather(*(self.retrieve(name, *retrieval) for name, retrieval in retrievals.items()))
+        return dict(zip(names, results))
+    async def _holding(self, lookup: Awaitable, resources: Tuple[str, ...]) -> Any:
+        try:
+            if not resources or self.scheduler is None:
+                return await lookup
+            async with self.scheduler.hold(*resources):
+                return await lookup
+        finally:
+            # A lookup that timed out while waiting for its slot never started
+            if inspect.iscoroutine(lookup):
+                lookup.close()
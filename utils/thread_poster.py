@@ -0,0 +1,109 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+import logging
+logger = logging.getLogger(__name__)
+# post(content, reply_to, idempotency_key) -> {'success': bool, 'tweet_id' or 'error'}
+PostFunction = Callable[[str, Optional[str], str], Awaitable[Dict]]
+class ThreadPoster:
+    """
+    Posts tweets and threads so that retries never create duplicates.
+    Every tweet goes out with an idempotency key that the bridge dedupes on,
+    and the same key is reused for each retry. A thread's progress (its
+    attempt id and the ids posted so far) is written before the first tweet
+    and after each one, so a thread cut short by a failure or a crash
+    resumes where it stopped, and the tweet in flight at the time is
+    re-sent under its original key. Finished threads are forgotten, so
+    posting the same text again later starts a new thread.
+    """
+    def __init__(self, post: PostFunction, state_path: str = 'data/thread_progress.json',
+                 attempts: int = 3, backoff: float = 1.0, keep: int = 500):
+        self.post = post
+        self.state_path = state_path
+        self.attempts = attempts
+        self.backoff = backoff
+        self.keep = keep
+        self.progress: Dict[str, Dict] = self._load()
+    async def post_with_retry(self, content: str, reply_to: Optional[str] = None,
+                              idempotency_key: Optional[str] = None) -> Dict:
+        """Post one tweet, retrying with exponential backoff under a single idempotency key"""
+        key = idempotency_key or uuid.uuid4().hex
+        result = {'success': False, 'error': 'not attempted'}
+        for attempt in range(1, self.attempts + 1):
+            result = await self.post(content, reply_to, key)
+            if result['success']:
+                break
+            if attempt < self.attempts:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+        result['attempts'] = attempt
+        return result
+    async def post_thread(self, tweets: List[str], thread_key: Optional[str] = None) -> Dict:
+        """Post a thread, resuming an unfinished attempt with the same key (derived from the content by default)"""
+        key = thread_key or self.thread_key(tweets)
+        progress = self.progress.get(key)
+        if progress is None:
+            progress = self.progress[key] = {'attempt': uuid.uuid4().hex, 'tweet_ids': []}
+            self._prune()
+            await self._save()
+        else:
+            logger.info(f"Resuming thread {key[:12]} after {len(progress['tweet_ids'])} posted tweets")
+        thread_ids = progress['tweet_ids']
+        timings = []
+        reply_to = thread_ids[-1] if thread_ids else None
+        for index in range(len(thread_ids), len(tweets)):
+            started = time.perf_counter()
+            result = await self.post_with_retry(tweets[index], reply_to, f"{progress['attempt']}:{index}")
+            timings.append({
+                'index': index,
+                'seconds': time.perf_counter() - started,
+                'attempts': result['attempts']
+            })
+            if not result['success']:
+                return {
+                    'success': False,
+                    'error': result['error'],
+                    'thread_ids': thread_ids,
+                    'idempotency_key': key,
+                    'timings': timings
+                }
+            thread_ids.append(result['tweet_id'])
+            reply_to = result['tweet_id']
+            await self._save()
+        del self.progress[key]
+        await self._save()
+        return {'success': True, 'thread_ids': thread_ids, 'idempotency_key': key, 'timings': timings}
+    @staticmethod
+    def thread_key(tweets: List[str]) -> str:
+        """Content-derived key, so re-submitting an unfinished thread resumes it"""
+        return hashlib.sha256("\x1f".join(tweets).encode('utf-8')).hexdigest()
+    def _prune(self):
+        """Forget the oldest unfinished threads beyond `keep` entries"""
+        for key in list(self.progress)[:max(len(self.progress) - self.keep, 0)]:
+            del self.progress[key]
+    def _load(self) -> Dict:
+        try:
+            if os.path.exists(self.state_path):
+                with open(self.state_path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading thread progress: {e}", exc_info=True)
+        return {}
+    async def _save(self):
+        """Persist progress without blocking the event loop"""
+        try:
+            await asyncio.to_thread(self._write, json.dumps(self.progress))
+        except Exception as e:
+            logger.error(f"Error saving thread progress: {e}", exc_info=True)
+    def _write(self, snapshot: str):
+        """Atomically replace the state file"""
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,217 @@
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from collections import deque
+import asyncio
+import logging
+from utils.conversation_cache import ConversationCache
+logger = logging.getLogger(__name__)
+# Write methods served by the write-behind queue, and the bulk method of the
+# persistent store that takes a list of the same items, if it has one
+WRITE_METHODS = {
+    'store_action_result': 'store_action_results',
+    'store_tweet': 'store_tweets',
+    'store_mention': 'store_mentions',
+    'store_memory': 'store_memories'
+}
+class TieredMemory:
+    """
+    RAM working set over a persistent memory store, with write-behind batching.
+    Writes return as soon as they are queued; a background task inserts them
+    into the store every `batch_size` items or `flush_interval` seconds, using
+    the store's bulk methods where available. Recent items are served from
+    RAM, and conversation histories from a token-bounded ConversationCache
+    that new interactions update in place. Reads never wait on the writer:
+    queued interactions are merged into a history loaded on a miss, and
+    over-budget histories are compacted in the background while the current
+    one is served. Call `close()` on shutdown to flush everything still
+    queued. Other attributes pass through to the store.
+    """
+    def __init__(self, store: Any, batch_size: int = 50, flush_interval: float = 2.0,
+                 working_set_size: int = 200, conversation_cache: Optional[ConversationCache] = None,
+                 max_attempts: int = 3):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.working_set_size = working_set_size
+        self.max_attempts = max_attempts
+        # Queued writes as (method, item, attempts)
+        self.pending: Deque[Tuple[str, Dict, int]] = deque()
+        # Recent items by category (action result type, 'tweet', 'mention', 'memory')
+        self.working_set: Dict[str, Deque[Dict]] = {}
+        # Conversation histories loaded from the store
+        self.conversation_cache = conversation_cache or ConversationCache()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        # Batches popped from the queue whose store write has not finished
+        self._in_flight: List[List[Tuple[str, Dict, int]]] = []
+        self._writes: Set[asyncio.Task] = set()
+        # Background compaction per target
+        self._compactions: Dict[str, asyncio.Task] = {}
+        self._closed = False
+    def __getattr__(self, name: str):
+        # Only called for attributes not defined here: reads go to the store
+        if name == 'store':
+            raise AttributeError(name)
+        return getattr(self.store, name)
+    def _remember(self, category: str, item: Dict):
+        if category not in self.working_set:
+            self.working_set[category] = deque(maxlen=self.working_set_size)
+        self.working_set[category].append(item)
+    def _enqueue(self, method: str, item: Dict):
+        if self._closed:
+            raise RuntimeError("TieredMemory is closed")
+        self.pending.append((method, item, 0))
+        if self._writer is None or self._writer.done():
+            self._wakeup = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_behind())
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+    async def store_action_result(self, result: Dict):
+        """Queue an action result; interactions join their loaded conversation"""
+        self._remember(result.get('type', 'action'), result)
+        target = result.get('metadata', {}).get('target')
+        if result.get('type') == 'interaction' and target:
+            self.conversation_cache.append(target, result)
+        self._enqueue('store_action_result', result)
+    async def store_tweet(self, tweet: Dict):
+        """Queue a tweet"""
+        self._remember('tweet', tweet)
+        self._enqueue('store_tweet', tweet)
+    async def store_mention(self, mention: Dict):
+        """Queue a mention; it joins its author's loaded conversation"""
+        self._remember('mention', mention)
+        user = self._mention_user(mention)
+        if user:
+            self.conversation_cache.append(user, mention)
+        self._enqueue('store_mention', mention)
+    async def store_mentions(self, mentions: List[Dict]):
+        """Queue many mentions"""
+        for mention in mentions:
+            await self.store_mention(mention)
+    async def store_memory(self, memory: Dict):
+        """Queue a generic memory"""
+        self._remember('memory', memory)
+        self._enqueue('store_memory', memory)
+    def get_recent(self, category: str, limit: Optional[int] = None) -> List[Dict]:
+        """Most recent items of a category from the working set, newest last"""
+        items = list(self.working_set.get(category, ()))
+        return items[-limit:] if limit else items
+    async def get_conversation_history(self, target: str) -> List[Dict]:
+        """Conversation history for a target, loaded from the store once and then kept in RAM"""
+        if target not in self.conversation_cache:
+            # Interactions still queued are merged in rather than flushed first;
+            # those written while the store is read may or may not be in its result
+            unwritten = self._unwritten_history(target)
+            history = list(await self.store.get_conversation_history(target) or [])
+            seen = {self._history_key(message) for message in history}
+            for message in unwritten + self._unwritten_history(target):
+                key = self._history_key(message)
+                if key not in seen:
+                    seen.add(key)
+                    history.append(message)
+            self.conversation_cache.put(target, history)
+        if self.conversation_cache.needs_compaction(target) and target not in self._compactions:
+            # Summarizing takes an LLM call; serve the current history meanwhile
+            task = asyncio.create_task(self.conversation_cache.compact(target))
+            self._compactions[target] = task
+            task.add_done_callback(lambda _: self._compactions.pop(target, None))
+        return self.conversation_cache.get(target) or []
+    def _unwritten_history(self, target: str) -> List[Dict]:
+        """Queued or in-flight interactions and mentions for a target, oldest first"""
+        entries = [entry for batch in self._in_flight for entry in batch] + list(self.pending)
+        return [
+            item for method, item, _ in entries
+            if (method == 'store_action_result' and item.get('type') == 'interaction'
+                and item.get('metadata', {}).get('target') == target)
+            or (method == 'store_mention' and self._mention_user(item) == target)
+        ]
+    @staticmethod
+    def _mention_user(mention: Dict) -> Optional[str]:
+        """The conversation a mention belongs to, keyed like the store's `user` column"""
+        return mention.get('username') or mention.get('author')
+    @staticmethod
+    def _history_key(message: Dict) -> Tuple:
+        return (
+            str(message.get('id') or ''),
+            message.get('content') or message.get('text'),
+            str(message.get('timestamp', message.get('created_at')))
+        )
+    async def _write_behind(self):
+        """Flush whenever a batch fills up or the flush interval passes"""
+        while self.pending:
+            if not self._closed:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            await self.flush()
+    async def flush(self):
+        """Write everything queued so far to the store"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while self.pending:
+                batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+                # Shielded so a cancelled caller neither loses nor half-writes the popped batch
+                write = asyncio.create_task(self._write_in_flight(batch))
+                self._writes.add(write)
+                write.add_done_callback(self._writes.discard)
+                await asyncio.shield(write)
+                if any(attempts for _, _, attempts in self.pending):
+                    # Retried items are back in the queue; leave them for the next flush
+                    break
+    async def _write_in_flight(self, batch: List[Tuple[str, Dict, int]]):
+        self._in_flight.append(batch)
+        try:
+            await self._write_batch(batch)
+        finally:
+            self._in_flight.remove(batch)
+    async def _write_batch(self, batch: List[Tuple[str, Dict, int]]):
+        by_method: Dict[str, List[Tuple[Dict, int]]] = {}
+        for method, item, attempts in batch:
+            by_method.setdefault(method, []).append((item, attempts))
+        for method, entries in by_method.items():
+            items = [item for item, _ in entries]
+            bulk = WRITE_METHODS.get(method)
+            try:
+                if bulk and hasattr(self.store, bulk):
+                    await getattr(self.store, bulk)(items)
+                    continue
+                results = await asyncio.gather(
+                    *(getattr(self.store, method)(item) for item in items),
+                    return_exceptions=True
+                )
+                failed = [
+                    (entry, result) for entry, result in zip(entries, results)
+                    if isinstance(result, Exception)
+                ]
+            except Exception as e:
+                failed = [(entry, e) for entry in entries]
+            for (item, attempts), error in failed:
+                if attempts + 1 < self.max_attempts:
+                    self.pending.append((method, item, attempts + 1))
+                else:
+                    logger.error(f"Dropping {method} write after {attempts + 1} attempts: {error}")
+    async def close(self):
+        """Flush all queued writes and stop the background writer"""
+        self._closed = True
+        for task in list(self._compactions.values()):
+            task.cancel()
+        await asyncio.gather(*self._compactions.values(), return_exceptions=True)
+        if self._writer is not None and not self._writer.done():
+            # Let the writer drain the queue rather than cancelling it mid-batch
+            self._wakeup.set()
+            await asyncio.gather(self._writer, return_exceptions=True)
+        # Writes whose flush was cancelled are still running under the shield
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        for _ in range(self.max_attempts):
+            if not self.pending:
+                break
+            await self.flush()
+        if self.pending:
+            logger.error(f"{len(self.pending)} memory writes could not be stored before shutdown")
+    async def __aenter__(self) -> 'TieredMemory':
+        return self
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,13 @@
+from functools import lru_cache
+import logging
+import tiktoken
+logger = logging.getLogger(__name__)
+DEFAULT_ENCODING = "cl100k_base"
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = DEFAULT_ENCODING):
+    """Load a tiktoken encoding once per process"""
+    return tiktoken.get_encoding(encoding_name)
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Count tokens in text, caching results for repeated snippets"""
+    return len(get_encoding(encoding_name).encode(text))
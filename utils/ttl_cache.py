@@ -0,0 +1,68 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import time
+import logging
+logger = logging.getLogger(__name__)
+class TTLCache:
+    """Bounded cache whose entries expire after `ttl` seconds"""
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Loads in progress, so concurrent misses for a key share one lookup
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store an entry, evicting the least recently used beyond `maxsize`"""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached value or load it once, however many callers miss at the same time"""
+        missing = object()
+        while True:
+            value = self.get(key, missing)
+            if value is not missing:
+                return value
+            loading = self._loading.get(key)
+            if loading is None:
+                break
+            try:
+                return await asyncio.shield(loading)
+            except asyncio.CancelledError:
+                if not loading.cancelled():
+                    raise
+                # The caller doing the load was cancelled, not us; take the load over
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not reported by asyncio
+            future.exception()
+            raise
+        finally:
+            del self._loading[key]
@@ -0,0 +1,166 @@
+from typing import Iterable, List, Optional, Tuple
+import re
+import logging
+logger = logging.getLogger(__name__)
+MAX_TWEET_LENGTH = 280
+# t.co wraps every URL to a fixed length
+TRANSFORMED_URL_LENGTH = 23
+URL_PATTERN = re.compile(r"^(https?://|www\.)\S+$", re.IGNORECASE)
+WHITESPACE = re.compile(r"(\s+)")
+# Code point ranges counted as one character; everything else counts as two
+LIGHT_RANGES = ((0, 4351), (8192, 8205), (8208, 8223), (8242, 8247))
+# Joiners and modifiers that belong to the preceding emoji
+EMOJI_JOINERS = {0x200D, 0xFE0E, 0xFE0F, 0x20E3}
+SENTENCE_END = re.compile(r"([.!?…]+[\"')\]]*|\n\n)$")
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+CLAUSE_END = re.compile(r"[,;:—–]$")
+NUMBERING_RESERVE = {None: 0, 'index': len(" 99/"), 'fraction': len(" 99/99")}
+def _is_emoji(code_point: int) -> bool:
+    return 0x1F000 <= code_point <= 0x1FAFF or 0x2600 <= code_point <= 0x27BF
+def _char_weight(code_point: int) -> int:
+    if code_point in EMOJI_JOINERS or 0x1F3FB <= code_point <= 0x1F3FF:
+        return 0
+    if _is_emoji(code_point):
+        return 2
+    for start, end in LIGHT_RANGES:
+        if start <= code_point <= end:
+            return 1
+    return 2
+def weighted_length(text: str) -> int:
+    """Length of text as Twitter counts it: URLs are 23, emoji and CJK count double"""
+    total = 0
+    # Whitespace runs are kept as tokens so each whitespace character still counts as one
+    for token in WHITESPACE.split(text):
+        if URL_PATTERN.match(token):
+            total += TRANSFORMED_URL_LENGTH
+        else:
+            total += _word_weight(token)
+    return total
+def _word_weight(word: str) -> int:
+    """Weighted length of a word; a ZWJ emoji sequence counts as one emoji"""
+    total = 0
+    joined = False
+    for char in word:
+        code_point = ord(char)
+        if not (joined and _is_emoji(code_point)):
+            total += _char_weight(code_point)
+        joined = code_point == 0x200D
+    return total
+class TweetSplitter:
+    """
+    Incremental splitter that packs words into tweets by weighted length.
+    When a tweet fills up it is cut at the last sentence break, falling back
+    to the last clause break and then the last word, as long as that keeps
+    the tweet at least `min_fill` full. Text can be fed as it streams in;
+    completed tweets are returned as soon as they are decided, except with
+    'fraction' numbering: ' k/N' needs the final count, so the whole thread
+    is held back until `close`.
+    """
+    def __init__(self, limit: int = MAX_TWEET_LENGTH, numbering: Optional[str] = None, min_fill: float = 0.5):
+        if numbering not in NUMBERING_RESERVE:
+            raise ValueError(f"Unknown numbering style: {numbering}")
+        self.numbering = numbering
+        self.capacity = limit - NUMBERING_RESERVE[numbering]
+        self.min_fill = min_fill
+        self.count = 0
+        self._held: List[str] = []
+        self._pending = ""
+        # Words of the tweet being built, with their weighted lengths
+        self._words: List[Tuple[str, int]] = []
+        self._length = 0
+    def feed(self, chunk: str) -> List[str]:
+        """Add streamed text; return any tweets completed by it"""
+        self._pending += chunk
+        # Only whole words are placed; the trailing partial word and the
+        # whitespace before it wait for more text so paragraph breaks survive
+        cut = len(self._pending)
+        while cut > 0 and not self._pending[cut - 1].isspace():
+            cut -= 1
+        while cut > 0 and self._pending[cut - 1].isspace():
+            cut -= 1
+        if cut <= 0:
+            return []
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._release(self._place_words(self._tokenize(ready)))
+    def close(self) -> List[str]:
+        """Flush the remaining text as final tweets"""
+        tweets = self._place_words(self._tokenize(self._pending))
+        self._pending = ""
+        if self._words:
+            tweets.append(self._emit(len(self._words)))
+        if self.numbering != 'fraction':
+            return tweets
+        tweets, self._held = self._held + tweets, []
+        if len(tweets) > 1:
+            tweets = [f"{tweet} {i}/{len(tweets)}" for i, tweet in enumerate(tweets, 1)]
+        return tweets
+    def _release(self, tweets: List[str]) -> List[str]:
+        """Tweets that can be handed out now"""
+        if self.numbering == 'fraction':
+            self._held.extend(tweets)
+            return []
+        return tweets
+    def _tokenize(self, text: str) -> List[Optional[str]]:
+        """Split on whitespace; None marks a paragraph break"""
+        tokens = []
+        for index, paragraph in enumerate(PARAGRAPH_BREAK.split(text)):
+            if index:
+                tokens.append(None)
+            tokens.extend(paragraph.split())
+        return tokens
+    def _place_words(self, tokens: Iterable[Optional[str]]) -> List[str]:
+        tweets = []
+        for token in tokens:
+            if token is None:
+                # A paragraph break ends the sentence of the last buffered word
+                if self._words:
+                    word, weight = self._words[-1]
+                    self._words[-1] = (word + "\n\n", weight)
+                continue
+            for piece in self._fit_word(token):
+                weight = weighted_length(piece)
+                while self._words and self._length + 1 + weight > self.capacity:
+                    tweets.append(self._emit(self._best_cut()))
+                self._length += weight + (1 if self._words else 0)
+                self._words.append((piece, weight))
+        return tweets
+    def _fit_word(self, word: str) -> List[str]:
+        """Hard-split a single word that cannot fit in one tweet"""
+        if weighted_length(word) <= self.capacity:
+            return [word]
+        pieces, current, length = [], "", 0
+        for char in word:
+            weight = _char_weight(ord(char))
+            if length + weight > self.capacity:
+                pieces.append(current)
+                current, length = "", 0
+            current += char
+            length += weight
+        if current:
+            pieces.append(current)
+        return pieces
+    def _best_cut(self) -> int:
+        """Number of buffered words to emit as the next tweet"""
+        minimum = self.capacity * self.min_fill
+        for pattern in (SENTENCE_END, CLAUSE_END):
+            length = -1
+            best = 0
+            for index, (word, weight) in enumerate(self._words):
+                length += weight + 1
+                if pattern.search(word) and length >= minimum:
+                    best = index + 1
+            if best:
+                return best
+        return len(self._words)
+    def _emit(self, count: int) -> str:
+        words, self._words = self._words[:count], self._words[count:]
+        self._length = sum(weight for _, weight in self._words) + max(len(self._words) - 1, 0)
+        self.count += 1
+        tweet = " ".join(word.rstrip("\n") for word, _ in words)
+        if self.numbering == 'index':
+            tweet = f"{tweet} {self.count}/"
+        return tweet
+def split_into_tweets(text: str, limit: int = MAX_TWEET_LENGTH, numbering: Optional[str] = None) -> List[str]:
+    """Split text into tweets; 'fraction' numbering appends ' k/N' to each tweet"""
+    splitter = TweetSplitter(limit, numbering)
+    return splitter.feed(text) + splitter.close()
@@ -0,0 +1,45 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+import logging
+logger = logging.getLogger(__name__)
+# analyze(texts) -> one {'score': float, ...} per text
+AnalyzeFunction = Callable[[List[str]], Awaitable[List[Dict]]]
+async def next_batch(queue: asyncio.Queue, batch_size: int = 20, max_wait: float = 2.0) -> List[Dict]:
+    """Wait for one item, then take up to `batch_size` within `max_wait` seconds"""
+    batch = [await queue.get()]
+    deadline = time.monotonic() + max_wait
+    while len(batch) < batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+async def analyze_with_retry(analyze: AnalyzeFunction, batch: List[Dict], attempts: int = 3,
+                             retry_delay: float = 1.0) -> Optional[List[Dict]]:
+    """Score a batch, retrying with backoff; None once every attempt failed"""
+    for attempt in range(1, attempts + 1):
+        try:
+            return await analyze([tweet['text'] for tweet in batch])
+        except Exception as e:
+            if attempt == attempts:
+                logger.error(f"Dropping {len(batch)} streamed tweets after {attempts} failed analyses: {e}", exc_info=True)
+                return None
+            logger.warning(f"Analysis of {len(batch)} streamed tweets failed ({e}); retrying")
+            # The batch is held meanwhile, so a full queue pushes back on the reader
+            await asyncio.sleep(retry_delay * 2 ** (attempt - 1))
+async def relevant_batches(queue: asyncio.Queue, analyze: AnalyzeFunction, batch_size: int = 20,
+                           max_wait: float = 2.0, threshold: float = 0.2, attempts: int = 3,
+                           retry_delay: float = 1.0) -> AsyncIterator[List[Tuple[Dict, Dict]]]:
+    """Micro-batch queued tweets through `analyze` and yield the relevant ones with their scores"""
+    while True:
+        batch = await next_batch(queue, batch_size, max_wait)
+        scores = await analyze_with_retry(analyze, batch, attempts, retry_delay)
+        if scores is None:
+            continue
+        relevant = [(tweet, relevance) for tweet, relevance in zip(batch, scores) if relevance['score'] > threshold]
+        if relevant:
+            yield relevant
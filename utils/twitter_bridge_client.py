@@ -0,0 +1,94 @@
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+import json
+import aiohttp
+import logging
+logger = logging.getLogger(__name__)
+class TwitterBridgeError(Exception):
+    """Raised when the twitter_services.js bridge returns an error"""
+class TwitterBridgeClient:
+    """
+    Async client for the local twitter_services.js bridge.
+    One HTTP session is reused for every call, so requests never block the
+    event loop and do not pay connection setup per call.
+    """
+    def __init__(self, base_url: str = 'http://localhost:3000', timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+    async def _request(self, method: str, path: str, **kwargs):
+        session = await self._get_session()
+        async with session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+            if response.status != 200:
+                body = await response.text()
+                raise TwitterBridgeError(f"{method} {path} failed with {response.status}: {body[:200]}")
+            return await response.json()
+    async def create_tweet(self, text: str, in_reply_to_tweet_id: Optional[str] = None,
+                           idempotency_key: Optional[str] = None) -> Dict:
+        """Post a tweet; returns the created tweet with its id. Repeating an idempotency key returns the first tweet"""
+        body = {'text': text, 'reply_to': in_reply_to_tweet_id}
+        if idempotency_key:
+            body['idempotency_key'] = idempotency_key
+        return await self._request('POST', '/tweets', json=body)
+    async def get_users_mentions(self, username: str, max_results: int = 100,
+                                 since_id: Optional[str] = None, max_id: Optional[str] = None) -> List[Dict]:
+        """Get tweets mentioning a user, newest first, newer than `since_id` and no newer than `max_id`"""
+        params = {'count': str(max_results)}
+        if since_id:
+            params['since_id'] = str(since_id)
+        if max_id:
+            params['max_id'] = str(max_id)
+        return await self._request('GET', f'/mentions/{username}', params=params)
+    async def get_user(self, username: str) -> Dict:
+        """Get a user profile including `followers_count`"""
+        return await self._request('GET', f'/profile/{username}')
+    async def get_tweets(self, username: str, limit: int = 100) -> List[Dict]:
+        """Get recent tweets of a user"""
+        return await self._request('GET', f'/tweets/{username}/{limit}')
+    async def stream_tweets(self, usernames: Optional[Iterable[str]] = None,
+                            since_id: Optional[str] = None,
+                            idle_timeout: float = 60.0) -> AsyncIterator[Dict]:
+        """
+        Yield tweets pushed by the bridge's server-sent event stream.
+        The bridge sends a heartbeat every 15 seconds, so a read that stays
+        idle for `idle_timeout` means the connection is dead.
+        """
+        params = {}
+        if usernames:
+            params['usernames'] = ','.join(usernames)
+        if since_id:
+            params['since_id'] = str(since_id)
+        session = await self._get_session()
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=idle_timeout)
+        async with session.get(f"{self.base_url}/stream/tweets", params=params, timeout=timeout) as response:
+            if response.status != 200:
+                body = await response.text()
+                raise TwitterBridgeError(f"GET /stream/tweets failed with {response.status}: {body[:200]}")
+            event, data = None, []
+            async for raw_line in response.content:
+                line = raw_line.decode('utf-8').rstrip('\r\n')
+                if line.startswith(':'):
+                    continue
+                if line:
+                    field, _, value = line.partition(':')
+                    value = value[1:] if value.startswith(' ') else value
+                    if field == 'event':
+                        event = value
+                    elif field == 'data':
+                        data.append(value)
+                    continue
+                # A blank line ends the event
+                if event == 'tweet' and data:
+                    yield json.loads('\n'.join(data))
+                elif event == 'dropped' and data:
+                    logger.warning(f"Bridge dropped {data[0]} streamed tweets for a slow consumer")
+                event, data = None, []
+    async def get_trends(self) -> List[Dict]:
+        """Get current trends"""
+        return await self._request('GET', '/trends')
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
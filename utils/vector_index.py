@@ -0,0 +1,285 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+import json
+import os
+import numpy as np
+import logging
+logger = logging.getLogger(__name__)
+class VectorIndex:
+    """
+    Approximate nearest-neighbour index over float32 embeddings (IVF).
+    Vectors are kept L2-normalized in a memory-mapped file, so similarity is
+    the dot product (cosine). Until `train_threshold` vectors exist, search
+    is exact brute force; after that vectors are clustered by k-means into
+    `nlist` inverted lists and each query only scans the `nprobe` lists
+    whose centroids are closest. Deletes are tombstones until `compact()`,
+    and `save()` writes a snapshot next to the vector file.
+    """
+    def __init__(self, dim: int, path: Optional[str] = None, nlist: Optional[int] = None,
+                 nprobe: int = 8, train_threshold: int = 4096, initial_capacity: int = 1024,
+                 seed: int = 0):
+        self.dim = dim
+        self.path = path
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.seed = seed
+        self.size = 0
+        self._capacity = 0
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: List[Hashable] = []
+        self._rows: Dict[Hashable, int] = {}
+        # IVF state: centroids, list assignment per row and cached list members
+        self.centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists: Optional[List[np.ndarray]] = None
+        self._trained_size = 0
+        self._grow(initial_capacity)
+    def __len__(self) -> int:
+        return len(self._rows)
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._rows
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+    def _vector_path(self) -> str:
+        return f"{self.path}.vectors"
+    def _meta_path(self) -> str:
+        return f"{self.path}.meta.json"
+    def _arrays_path(self) -> str:
+        return f"{self.path}.arrays.npz"
+    def _grow(self, required: int):
+        if required <= self._capacity:
+            return
+        capacity = max(self._capacity, 1)
+        while capacity < required:
+            capacity *= 2
+        if self.path:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Extend the backing file and remap it; existing rows stay on disk
+            with open(self._vector_path(), 'ab') as f:
+                f.truncate(capacity * self.dim * 4)
+            self._vectors = np.memmap(self._vector_path(), dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+        else:
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self.size] = self._vectors[:self.size]
+            self._vectors = grown
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.size] = self._alive[:self.size]
+        self._alive = alive
+        assign = np.zeros(capacity, dtype=np.int32)
+        assign[:self.size] = self._assign[:self.size]
+        self._assign = assign
+        self._capacity = capacity
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    def add(self, item_id: Hashable, vector: Sequence[float]):
+        """Insert or replace a single vector"""
+        self.add_batch([item_id], np.asarray(vector, dtype=np.float32)[None, :])
+    def add_batch(self, ids: Sequence[Hashable], vectors: np.ndarray):
+        """Insert or replace many vectors at once"""
+        vectors = self._normalize(vectors)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim}), got {vectors.shape}")
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        start = self.size
+        end = start + len(ids)
+        self._grow(end)
+        self._vectors[start:end] = vectors
+        self._alive[start:end] = True
+        for offset, item_id in enumerate(ids):
+            # Replacing an id (even one earlier in this batch) retires its old row
+            if item_id in self._rows:
+                self._tombstone(item_id)
+            self._rows[item_id] = start + offset
+            self._ids.append(item_id)
+        self.size = end
+        if self.is_trained:
+            self._assign[start:end] = self._nearest_centroids(vectors)
+            self._lists = None
+            # Lists drift as history grows; recluster once it has quadrupled
+            if len(self) >= 4 * self._trained_size:
+                self.train()
+        elif len(self) >= self.train_threshold:
+            self.train()
+    def remove(self, item_id: Hashable) -> bool:
+        """Delete a vector; its slot is reclaimed by compact()"""
+        if item_id not in self._rows:
+            return False
+        self._tombstone(item_id)
+        return True
+    def _tombstone(self, item_id: Hashable):
+        row = self._rows.pop(item_id)
+        self._alive[row] = False
+    def compact(self):
+        """Drop tombstoned rows and rebuild the row mapping"""
+        live = np.flatnonzero(self._alive[:self.size])
+        if live.size == self.size:
+            return
+        self._vectors[:live.size] = self._vectors[live]
+        self._assign[:live.size] = self._assign[live]
+        self._alive[:live.size] = True
+        self._alive[live.size:self.size] = False
+        self._ids = [self._ids[row] for row in live.tolist()]
+        self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+        self.size = int(live.size)
+        self._lists = None
+    def train(self, iterations: int = 10, sample_size: int = 256):
+        """Cluster live vectors into inverted lists with k-means"""
+        live = np.flatnonzero(self._alive[:self.size])
+        if live.size == 0:
+            return
+        nlist = self.nlist or max(1, int(4 * np.sqrt(live.size)))
+        nlist = min(nlist, live.size)
+        rng = np.random.default_rng(self.seed)
+        sample = live if live.size <= nlist * sample_size else rng.choice(live, nlist * sample_size, replace=False)
+        data = np.asarray(self._vectors[sample])
+        centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            order = np.argsort(assign, kind='stable')
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            sums = np.zeros_like(centroids)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            sums[~empty] = np.add.reduceat(data[order], starts[~empty], axis=0)
+            # Reseed empty clusters from random points
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+            centroids = self._normalize(sums)
+        self.centroids = centroids.astype(np.float32)
+        self._assign[:self.size] = self._assign_in_chunks(np.arange(self.size))
+        self._lists = None
+        self._trained_size = int(live.size)
+        logger.info(f"Trained vector index: {nlist} lists over {live.size} vectors")
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+    def _assign_in_chunks(self, rows: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Assign rows to centroids without loading the whole map into memory at once"""
+        assign = np.empty(rows.size, dtype=np.int32)
+        for start in range(0, rows.size, chunk):
+            block = rows[start:start + chunk]
+            assign[start:start + chunk] = self._nearest_centroids(np.asarray(self._vectors[block]))
+        return assign
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            rows = np.flatnonzero(self._alive[:self.size])
+            order = np.argsort(self._assign[rows], kind='stable')
+            rows = rows[order]
+            bounds = np.searchsorted(self._assign[rows], np.arange(len(self.centroids) + 1))
+            self._lists = [rows[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        return self._lists
+    def _candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        if not self.is_trained:
+            return np.flatnonzero(self._alive[:self.size])
+        lists = self._inverted_lists()
+        nprobe = min(nprobe, len(lists))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([lists[i] for i in probes])
+        # Cached lists may still hold rows deleted since they were built
+        return rows[self._alive[rows]]
+    def search(self, query: Sequence[float], k: int = 5, nprobe: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """Return up to k (id, cosine similarity) pairs, most similar first"""
+        query = self._normalize(query)
+        rows = self._candidates(query, nprobe or self.nprobe)
+        if rows.size == 0:
+            return []
+        scores = np.asarray(self._vectors[rows]) @ query
+        k = min(k, rows.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[rows[i]], float(scores[i])) for i in top]
+    def search_exact(self, query: Sequence[float], k: int = 5) -> List[Tuple[Hashable, float]]:
+        """Brute-force search over every live vector"""
+        query = self._normalize(query)
+        rows = np.flatnonzero(self._alive[:self.size])
+        if rows.size == 0:
+            return []
+        scores = np.asarray(self._vectors[rows]) @ query
+        k = min(k, rows.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[rows[i]], float(scores[i])) for i in top]
+    def get_vector(self, item_id: Hashable) -> np.ndarray:
+        return np.array(self._vectors[self._rows[item_id]])
+    def save(self):
+        """Flush vectors and write a snapshot of the index state"""
+        if not self.path:
+            raise ValueError("VectorIndex has no path to save to")
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+        arrays = {
+            'alive': self._alive[:self.size],
+            'assign': self._assign[:self.size]
+        }
+        if self.is_trained:
+            arrays['centroids'] = self.centroids
+        tmp_arrays = f"{self._arrays_path()}.tmp.npz"
+        np.savez(tmp_arrays, **arrays)
+        os.replace(tmp_arrays, self._arrays_path())
+        meta = {
+            'dim': self.dim,
+            'size': self.size,
+            'capacity': self._capacity,
+            'nlist': self.nlist,
+            'nprobe': self.nprobe,
+            'train_threshold': self.train_threshold,
+            'trained_size': self._trained_size,
+            'seed': self.seed,
+            'ids': self._ids
+        }
+        tmp_meta = f"{self._meta_path()}.tmp"
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self._meta_path())
+    @classmethod
+    def load(cls, path: str) -> 'VectorIndex':
+        """Open a saved index; vectors stay memory-mapped"""
+        with open(f"{path}.meta.json", 'r') as f:
+            meta = json.load(f)
+        index = cls.__new__(cls)
+        index.dim = meta['dim']
+        index.path = path
+        index.nlist = meta['nlist']
+        index.nprobe = meta['nprobe']
+        index.train_threshold = meta['train_threshold']
+        index.seed = meta['seed']
+        index.size = meta['size']
+        index._capacity = meta['capacity']
+        index._vectors = np.memmap(f"{path}.vectors", dtype=np.float32, mode='r+', shape=(index._capacity, index.dim))
+        index._alive = np.zeros(index._capacity, dtype=bool)
+        index._assign = np.zeros(index._capacity, dtype=np.int32)
+        with np.load(f"{path}.arrays.npz") as arrays:
+            index._alive[:index.size] = arrays['alive']
+            index._assign[:index.size] = arrays['assign']
+            index.centroids = arrays['centroids'] if 'centroids' in arrays.files else None
+        index._lists = None
+        index._trained_size = meta['trained_size']
+        # JSON turns ids into lists/strings as stored; tuples are not supported
+        index._ids = meta['ids']
+        index._rows = {
+            item_id: row for row, item_id in enumerate(index._ids) if index._alive[row]
+        }
+        return index
+    @classmethod
+    def load_or_create(cls, path: str, dim: int, **kwargs) -> 'VectorIndex':
+        """Load a saved index, or start an empty one if none exists or it is unreadable"""
+        try:
+            if os.path.exists(f"{path}.meta.json"):
+                index = cls.load(path)
+                if index.dim == dim:
+                    return index
+                logger.warning(f"Vector index at {path} has dim {index.dim}, expected {dim}; rebuilding")
+        except Exception as e:
+            logger.error(f"Error loading vector index: {e}", exc_info=True)
+        for suffix in ('.vectors', '.meta.json', '.arrays.npz'):
+            if os.path.exists(f"{path}{suffix}"):
+                os.remove(f"{path}{suffix}")
+        return cls(dim, path=path, **kwargs)